@@ -1,20 +1,27 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import ModelBackend
-from django.db.models import Q
+from accounts import identifiers
 
 class EmailBackend(ModelBackend):
-    def authenticate(self, request, username=None, password=None, **kwargs):
+    def get_login_user(self, identifier):
+        """The user whose username or email is ``identifier``, or None; no password check."""
         UserModel = get_user_model()
+        user_id = identifiers.resolve(identifier)
+        if user_id is None:
+            return None
         try:
-            # Try to fetch the user by searching the username or email field
-            user = UserModel.objects.filter(
-                Q(username=username) | Q(email=username)
-            ).first()
+            return UserModel._default_manager.get(pk=user_id)
         except UserModel.DoesNotExist:
             return None
-        except Exception:
-            return None
 
-        if user and user.check_password(password) and self.user_can_authenticate(user):
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None or password is None:
+            return None
+        user = self.get_login_user(username)
+        if user is None:
+            # Hash anyway, so unknown identifiers take as long as wrong passwords.
+            get_user_model()().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
             return user
         return None
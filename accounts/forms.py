@@ -1,5 +1,6 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
+from . import identifiers
 from .models import CustomUser
 
 class UserLoginForm(AuthenticationForm):
@@ -25,3 +26,16 @@ class SignUpForm(UserCreationForm):
         for field_name, field in self.fields.items():
             if field_name not in ['role', 'username', 'email']: # Passwords
                  field.widget.attrs['class'] = 'form-control'
+
+    # Usernames and emails share one login namespace (see accounts.identifiers).
+    def clean_username(self):
+        username = self.cleaned_data.get('username')
+        if username and identifiers.is_taken(username):
+            raise forms.ValidationError('This username is already in use.')
+        return username
+
+    def clean_email(self):
+        email = self.cleaned_data.get('email')
+        if email and identifiers.is_taken(email):
+            raise forms.ValidationError('This email is already in use.')
+        return email
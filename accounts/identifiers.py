@@ -0,0 +1,107 @@
+"""
+Login identifier lookup.
+
+Users log in with their username or email. Both are stored normalized
+(trimmed and case-folded) in the uniquely indexed ``LoginIdentifier`` table,
+so resolving what was typed is one point read instead of an ``OR`` over two
+columns, one of them unindexed. Resolved user ids are cached for
+``LOGIN_CACHE_TIMEOUT`` seconds; saving or deleting a user drops the entries
+for its identifiers.
+
+An identifier already held by another user (an email that matches someone's
+username, say) is left with its first holder. New accounts cannot collide
+(see ``accounts.forms``), but accounts created before identifiers were
+normalized can; ``rebuild_identifiers`` logs and returns every such case.
+"""
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+
+from accounts.models import LoginIdentifier
+
+logger = logging.getLogger('accounts.identifiers')
+
+
+def normalize(identifier):
+    return (identifier or '').strip().casefold()
+
+
+def identifiers_of(user):
+    """The normalized identifiers ``user`` can log in with."""
+    return {key for key in (normalize(user.username), normalize(user.email)) if key}
+
+
+def _cache_key(key):
+    return 'login:' + hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def forget(keys):
+    caches[settings.LOGIN_CACHE_ALIAS].delete_many([_cache_key(key) for key in keys])
+
+
+def resolve(identifier):
+    """The id of the user logging in as ``identifier``, or None."""
+    key = normalize(identifier)
+    if not key:
+        return None
+    cache = caches[settings.LOGIN_CACHE_ALIAS]
+    user_id = cache.get(_cache_key(key))
+    if user_id is None:
+        user_id = LoginIdentifier.objects.filter(key=key).values_list('user_id', flat=True).first()
+        if user_id is not None:
+            cache.set(_cache_key(key), user_id, timeout=settings.LOGIN_CACHE_TIMEOUT)
+    return user_id
+
+
+def is_taken(identifier, user=None):
+    """Whether a user other than ``user`` logs in as ``identifier``."""
+    holders = LoginIdentifier.objects.filter(key=normalize(identifier))
+    if user is not None and user.pk is not None:
+        holders = holders.exclude(user=user)
+    return holders.exists()
+
+
+def sync(user):
+    """Bring ``user``'s rows in line with its username and email."""
+    keys = identifiers_of(user)
+    held = set(LoginIdentifier.objects.filter(user=user).values_list('key', flat=True))
+    stale = held - keys
+    if stale:
+        LoginIdentifier.objects.filter(user=user, key__in=stale).delete()
+    for key in keys - held:
+        try:
+            with transaction.atomic():
+                LoginIdentifier.objects.create(key=key, user=user)
+        except IntegrityError:
+            pass  # Held by another user.
+    forget(stale | (keys - held))
+
+
+def rebuild_identifiers(LoginIdentifier, User):
+    """
+    Recreate every identifier, earliest user first. Returns the number of
+    identifiers and the collisions, ``[(key, holder_id, other_id), ...]``:
+    keys that several users' usernames or emails case-fold to, which stay
+    with the earliest user. The others can no longer log in with that key;
+    each collision is logged as a warning so they can be renamed.
+    """
+    rows = {}
+    collisions = []
+    for user_id, username, email in User.objects.order_by('pk').values_list('pk', 'username', 'email'):
+        for key in (normalize(username), normalize(email)):
+            if not key:
+                continue
+            holder = rows.setdefault(key, user_id)
+            if holder != user_id:
+                collisions.append((key, holder, user_id))
+                logger.warning('Login identifier %r is held by user %s; user %s cannot log in with it.',
+                               key, holder, user_id)
+    with transaction.atomic():
+        LoginIdentifier.objects.all().delete()
+        LoginIdentifier.objects.bulk_create(
+            [LoginIdentifier(key=key, user_id=user_id) for key, user_id in rows.items()], batch_size=5000,
+        )
+    return len(rows), collisions
@@ -0,0 +1,45 @@
+# Generated by Django 4.1.13 on 2026-10-18 08:52
+
+import logging
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_identifiers(apps, schema_editor):
+    # A copy of accounts.identifiers.rebuild_identifiers as it stood when this was written.
+    LoginIdentifier = apps.get_model('accounts', 'LoginIdentifier')
+    User = apps.get_model('accounts', 'CustomUser')
+    logger = logging.getLogger('accounts.identifiers')
+    rows = {}
+    for user_id, username, email in User.objects.order_by('pk').values_list('pk', 'username', 'email'):
+        for key in ((username or '').strip().casefold(), (email or '').strip().casefold()):
+            if not key:
+                continue
+            holder = rows.setdefault(key, user_id)
+            if holder != user_id:
+                logger.warning('Login identifier %r is held by user %s; user %s cannot log in with it.',
+                               key, holder, user_id)
+    LoginIdentifier.objects.bulk_create(
+        [LoginIdentifier(key=key, user_id=user_id) for key, user_id in rows.items()], batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoginIdentifier',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=254, unique=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='login_identifiers', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(build_identifiers, migrations.RunPython.noop),
+    ]
@@ -22,3 +22,12 @@ class CustomUser(AbstractUser):
         
     def is_admin_role(self):
         return self.role == self.ADMIN or self.is_superuser
+
+class LoginIdentifier(models.Model):
+    # Normalized username or email -> user, for one-read logins (see
+    # accounts.identifiers). The first user to claim an identifier keeps it.
+    key = models.CharField(max_length=254, unique=True)
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='login_identifiers')
+
+    def __str__(self):
+        return self.key
@@ -1,5 +1,6 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from . import identifiers
 from .models import CustomUser
 from employees.models import EmployeeProfile
 from employers.models import EmployerProfile
@@ -26,10 +27,22 @@ def create_user_profile(sender, instance, created, **kwargs):
             )
 
 @receiver(post_save, sender=CustomUser)
-def save_user_profile(sender, instance, **kwargs):
+def save_user_profile(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return  # Logging in.
     if instance.role == CustomUser.EMPLOYEE:
         if hasattr(instance, 'employee_profile'):
             instance.employee_profile.save()
     elif instance.role == CustomUser.EMPLOYER:
         if hasattr(instance, 'employer_profile'):
             instance.employer_profile.save()
+
+@receiver(post_save, sender=CustomUser)
+def sync_login_identifiers(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'username', 'email'} & set(update_fields):
+        return  # Neither identifier was saved.
+    identifiers.sync(instance)
+
+@receiver(post_delete, sender=CustomUser)
+def forget_login_identifiers(sender, instance, **kwargs):
+    identifiers.forget(identifiers.identifiers_of(instance))
@@ -1,3 +1,57 @@
+from unittest import mock
+
 from django.test import TestCase
 
-# Create your tests here.
+from accounts.forms import SignUpForm
+from accounts.identifiers import rebuild_identifiers
+from accounts.models import CustomUser, LoginIdentifier
+
+
+class LoginIdentifierTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('Asha', 'Asha@Example.com', 'password', role=CustomUser.EMPLOYEE)
+
+    def test_login_by_normalized_username_or_email(self):
+        for identifier in ('asha', ' ASHA ', 'asha@example.com', 'Asha@Example.com'):
+            with self.subTest(identifier=identifier):
+                self.assertTrue(self.client.login(username=identifier, password='password'))
+        self.assertFalse(self.client.login(username='asha', password='wrong'))
+        self.assertFalse(self.client.login(username='nobody', password='password'))
+
+    def test_changed_email_replaces_its_identifier(self):
+        self.client.login(username='asha@example.com', password='password')
+        self.user.email = 'asha@example.org'
+        self.user.save()
+        self.assertEqual(set(LoginIdentifier.objects.values_list('key', flat=True)), {'asha', 'asha@example.org'})
+        self.assertFalse(self.client.login(username='asha@example.com', password='password'))
+        self.assertTrue(self.client.login(username='asha@example.org', password='password'))
+
+    def test_identifiers_are_unique_across_users(self):
+        form = SignUpForm(data={
+            'username': 'ASHA', 'email': 'asha@EXAMPLE.com', 'role': CustomUser.EMPLOYEE,
+            'password1': 'a-long-password-1', 'password2': 'a-long-password-1',
+        })
+        self.assertEqual(set(form.errors), {'username', 'email'})
+
+    def test_saves_without_username_or_email_skip_sync(self):
+        with mock.patch('accounts.identifiers.sync') as sync:
+            self.client.login(username='asha', password='password')  # Saves update_fields=['last_login'].
+            self.user.save(update_fields=['role'])
+            sync.assert_not_called()
+            self.user.save(update_fields=['email'])
+            sync.assert_called_once_with(self.user)
+
+    def test_rebuild_reports_case_fold_collisions(self):
+        # Accounts from before identifiers were normalized: 'asha' is also
+        # someone else's email, and 'BO' / 'bo' differ only in case.
+        later = CustomUser.objects.create_user('Later', 'ASHA', 'password', role=CustomUser.EMPLOYEE)
+        bo = CustomUser.objects.create_user('BO', '', 'password', role=CustomUser.EMPLOYEE)
+        other_bo = CustomUser.objects.create_user('bo', '', 'password', role=CustomUser.EMPLOYEE)
+        with self.assertLogs('accounts.identifiers', 'WARNING') as logs:
+            count, collisions = rebuild_identifiers(LoginIdentifier, CustomUser)
+        self.assertEqual(count, 4)  # asha, asha@example.com, later, bo
+        self.assertEqual(collisions, [('asha', self.user.pk, later.pk), ('bo', bo.pk, other_bo.pk)])
+        self.assertEqual(len(logs.records), 2)
+        self.assertTrue(self.client.login(username='later', password='password'))
+        self.assertEqual(LoginIdentifier.objects.get(key='bo').user_id, bo.pk)
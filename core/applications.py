@@ -0,0 +1,103 @@
+"""
+The job application queue.
+
+Applying only records an :class:`~jobs.models.Application`; the
+``process_applications`` worker decides them in batches. A batch is claimed
+with one conditional UPDATE, so concurrent workers never decide the same
+application. Within a batch, the first application for each open job (in
+arrival order) is offered it, and all the offers are filled with one
+:func:`~jobs.models.fill_jobs` UPDATE, which stays correct alongside direct
+fills. Applicants who got their job are accepted, the rest rejected, and the
+outcomes are written with one UPDATE each.
+"""
+import uuid
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from jobs.models import Application, Job, fill_jobs
+
+
+def submit(job_id, employee):
+    """Queue ``employee``'s application for job ``job_id``; applying twice returns the first application."""
+    # A repeat costs one query; the unique constraint settles two racing first applications.
+    application = Application.objects.filter(job_id=job_id, employee=employee).first()
+    if application is not None:
+        return application
+    try:
+        with transaction.atomic():
+            return Application.objects.create(job_id=job_id, employee=employee)
+    except IntegrityError:
+        return Application.objects.get(job_id=job_id, employee=employee)
+
+
+def reclaim_stale(older_than):
+    """Return applications claimed more than ``older_than`` ago (by a worker that died) to the queue."""
+    cutoff = timezone.now() - older_than
+    return Application.objects.filter(status=Application.PROCESSING, claimed_at__lt=cutoff).update(
+        status=Application.PENDING, claim='', claimed_at=None,
+    )
+
+
+def claim_batch(size):
+    """Claim up to ``size`` pending applications, oldest first."""
+    claim = uuid.uuid4().hex
+    pending = Application.objects.filter(status=Application.PENDING).order_by('pk')
+    ids = list(pending.values_list('pk', flat=True)[:size])
+    # Claimed applications are no longer pending, so another worker's
+    # UPDATE skips them.
+    Application.objects.filter(pk__in=ids, status=Application.PENDING).update(
+        status=Application.PROCESSING, claim=claim, claimed_at=timezone.now(),
+    )
+    return list(
+        Application.objects.filter(claim=claim, status=Application.PROCESSING)
+        .select_related('employee').order_by('pk')
+    )
+
+
+def decide(applications):
+    """Accept or reject claimed ``applications``. Returns ``(accepted, rejected)`` counts."""
+    filled_by = dict(
+        Job.objects.filter(pk__in={application.job_id for application in applications})
+        .values_list('pk', 'filled_by_id')
+    )
+    offers = {}
+    for application in applications:
+        if filled_by.get(application.job_id) is None:
+            offers.setdefault(application.job_id, application.employee)
+    for job_id in fill_jobs(offers):
+        filled_by[job_id] = offers[job_id].pk
+
+    accepted, rejected = [], []
+    for application in applications:
+        if filled_by.get(application.job_id) == application.employee_id:
+            # Also covers a batch that was reclaimed after its fill.
+            accepted.append(application.pk)
+        else:
+            rejected.append(application.pk)
+    now = timezone.now()
+    for status, ids in ((Application.ACCEPTED, accepted), (Application.REJECTED, rejected)):
+        if ids:
+            Application.objects.filter(pk__in=ids).update(status=status, decided_at=now)
+    return len(accepted), len(rejected)
+
+
+def process_batch(size, stale_after=timedelta(minutes=5)):
+    """Claim and decide one batch. Returns ``(accepted, rejected)``, ``(0, 0)`` if the queue is empty."""
+    reclaim_stale(stale_after)
+    applications = claim_batch(size)
+    if not applications:
+        return 0, 0
+    return decide(applications)
+
+
+def drain(size):
+    """Decide batches until the queue is empty. Returns total ``(accepted, rejected)``."""
+    accepted = rejected = 0
+    while True:
+        batch_accepted, batch_rejected = process_batch(size)
+        if not batch_accepted and not batch_rejected:
+            return accepted, rejected
+        accepted += batch_accepted
+        rejected += batch_rejected
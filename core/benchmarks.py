@@ -0,0 +1,442 @@
+"""
+Synthetic datasets and timing helpers for the ``benchmark`` command.
+
+Datasets are generated deterministically from a seed. Skill and location
+popularity follow a Zipf-like curve, so a few skills and cities dominate, as
+they do in production. Bulk inserts skip model signals, so derived data
+(places, stored match scores, dashboard counters and rollups) is filled in explicitly.
+"""
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.messages import SUCCESS, get_messages
+from django.core.cache import caches
+from django.db import connection, connections, reset_queries
+from django.db.models import Q
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.backends import EmailBackend
+from accounts.identifiers import forget, normalize, rebuild_identifiers
+from accounts.models import LoginIdentifier
+from core.applications import drain
+from core.gazetteer import read_gazetteer
+from core.matching import placement_scores, refresh_employee_scores
+from core.models import Skill, StatCounter, TrendBucket
+from core.places import place_index
+from core.rollups import rebuild_rollups
+from core.stats import rebuild_counters
+from employees.models import EmployeeProfile
+from employers.models import EmployerProfile
+from jobs.models import Application, Job, MatchScore
+
+BASE_SKILLS = [
+    'Plumbing', 'Tailoring', 'Cooking', 'Cleaning', 'Driving',
+    'Electrician', 'Carpentry', 'Masonry', 'Security Guard',
+    'Housekeeping', 'Painting', 'Babysitting', 'Laundry', 'Gardening',
+    'Communication', 'Teamwork', 'Labor',
+]
+SKILL_COUNT = 200
+USER_PREFIX = 'bench-'
+PASSWORD = 'bench-password'
+
+
+def parse_size(value):
+    """``'10k'`` -> 10000, ``'1m'`` -> 1000000."""
+    value = value.strip().lower()
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(value[-1:], 1)
+    return int(value.rstrip('km')) * multiplier
+
+
+def zipf_weights(n, exponent=1.1):
+    return [1 / (rank ** exponent) for rank in range(1, n + 1)]
+
+
+def clear_dataset():
+    Application.objects.all().delete()
+    MatchScore.objects.all().delete()
+    Job.objects.all().delete()
+    EmployeeProfile.objects.all().delete()
+    EmployerProfile.objects.all().delete()
+    get_user_model().objects.filter(username__startswith=USER_PREFIX).delete()
+    Skill.objects.all().delete()
+    for cache in caches.all():
+        cache.clear()
+
+
+def _create_users(prefix, count, role, password, batch_size):
+    User = get_user_model()
+    User.objects.bulk_create(
+        [
+            User(username=f'{prefix}{i}', email=f'{prefix}{i}@bench.local', password=password, role=role)
+            for i in range(count)
+        ],
+        batch_size=batch_size,
+    )
+    return list(User.objects.filter(username__startswith=prefix).order_by('pk').values_list('pk', flat=True))
+
+
+def generate_dataset(size, seed=0, batch_size=5000):
+    """
+    Create ``size`` jobs and ``size`` employees (plus one employer per 20
+    jobs). About 30% of jobs are filled over the past year. Returns the
+    username of a sample employee and the most common skill and location.
+    """
+    rng = random.Random(seed)
+    clear_dataset()
+    password = make_password(PASSWORD)
+
+    names = BASE_SKILLS + [f'Skill {i:03d}' for i in range(len(BASE_SKILLS), SKILL_COUNT)]
+    Skill.objects.bulk_create([Skill(name=name) for name in names])
+    skill_ids = list(Skill.objects.order_by('pk').values_list('pk', flat=True))
+    skill_weights = zipf_weights(len(skill_ids))
+
+    cities = [name for name, _, _, _ in read_gazetteer()]
+    city_weights = zipf_weights(len(cities))
+    index = place_index()
+    place_ids = {city: index.resolve(city) for city in cities}
+
+    def pick_skills(counts):
+        return set(rng.choices(skill_ids, skill_weights, k=rng.choice(counts)))
+
+    employer_user_ids = _create_users(f'{USER_PREFIX}employer-', size // 20 + 1, 'employer', password, batch_size)
+    EmployerProfile.objects.bulk_create(
+        [
+            EmployerProfile(user_id=user_id, company_name=f'Company {i}', contact_email=f'company{i}@bench.local',
+                            phone='', location=rng.choices(cities, city_weights)[0])
+            for i, user_id in enumerate(employer_user_ids)
+        ],
+        batch_size=batch_size,
+    )
+    employer_ids = list(EmployerProfile.objects.order_by('pk').values_list('pk', flat=True))
+
+    employee_user_ids = _create_users(f'{USER_PREFIX}employee-', size, 'employee', password, batch_size)
+    employees = []
+    for i, user_id in enumerate(employee_user_ids):
+        city = rng.choices(cities, city_weights)[0]
+        employees.append(EmployeeProfile(
+            user_id=user_id, name=f'Employee {i}', age=rng.randint(18, 60),
+            experience_years=min(int(rng.expovariate(1 / 4)), 30), phone='',
+            location=city, place_id=place_ids[city],
+        ))
+    EmployeeProfile.objects.bulk_create(employees, batch_size=batch_size)
+    employee_ids = list(EmployeeProfile.objects.order_by('pk').values_list('pk', flat=True))
+    EmployeeProfile.skills.through.objects.bulk_create(
+        [
+            EmployeeProfile.skills.through(employeeprofile_id=employee_id, skill_id=skill_id)
+            for employee_id in employee_ids
+            for skill_id in pick_skills((0, 1, 2, 2, 3, 3, 4, 5))
+        ],
+        batch_size=batch_size,
+    )
+
+    now = timezone.now()
+    jobs = []
+    for i in range(size):
+        city = rng.choices(cities, city_weights)[0]
+        filled = rng.random() < 0.3
+        jobs.append(Job(
+            employer_id=rng.choice(employer_ids), title=f'Job {i}',
+            experience_required=min(int(rng.expovariate(1 / 3)), 20),
+            salary=str(rng.randrange(8000, 40000, 500)), location=city, place_id=place_ids[city],
+            filled_by_id=rng.choice(employee_ids) if filled else None,
+            filled_at=now - timedelta(days=rng.randint(0, 365)) if filled else None,
+        ))
+    Job.objects.bulk_create(jobs, batch_size=batch_size)
+    job_ids = list(Job.objects.order_by('pk').values_list('pk', flat=True))
+    Job.required_skills.through.objects.bulk_create(
+        [
+            Job.required_skills.through(job_id=job_id, skill_id=skill_id)
+            for job_id in job_ids
+            for skill_id in pick_skills((1, 1, 2, 2, 2, 3, 3, 4))
+        ],
+        batch_size=batch_size,
+    )
+
+    rebuild_counters(StatCounter, Job, EmployeeProfile, EmployerProfile)
+    rebuild_rollups(TrendBucket, Job)
+    rebuild_identifiers(LoginIdentifier, get_user_model())
+
+    sample = EmployeeProfile.objects.select_related('user').get(pk=employee_ids[0])
+    refresh_employee_scores(EmployeeProfile.objects.filter(pk=sample.pk))
+    return {
+        'username': sample.user.username,
+        'skill': Skill.objects.get(pk=skill_ids[0]).name,
+        'location': cities[0],
+    }
+
+
+def measure(operation, repeat, warmup=1):
+    """
+    Time ``operation``: throughput and latency percentiles over ``repeat``
+    runs, plus the query count and peak Python memory of a single run.
+    """
+    for _ in range(warmup):
+        operation()
+
+    # The query log is a bounded deque; start from empty so the count is exact.
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        operation()
+    tracemalloc.start()
+    try:
+        operation()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        operation()
+        timings.append(time.perf_counter() - started)
+
+    return {
+        'runs': repeat,
+        'ops_per_sec': round(repeat / sum(timings), 2) if sum(timings) else None,
+        'p50_ms': round(statistics.median(timings) * 1000, 3),
+        'p95_ms': round(_percentile(timings, 95) * 1000, 3),
+        'queries': len(queries),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def _percentile(values, percent):
+    if len(values) < 2:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[percent - 1]
+
+
+def matching_operations(dataset):
+    """The match-path operations timed at each dataset size, by name."""
+    client = Client()
+    client.login(username=dataset['username'], password=PASSWORD)
+    match_cache = caches['matches']
+
+    def get(url_name, **params):
+        def operation():
+            response = client.get(reverse(url_name), params)
+            assert response.status_code == 200, response.status_code
+        return operation
+
+    matching_jobs = get('matching_jobs', radius='any')
+
+    def matching_jobs_uncached():
+        match_cache.clear()
+        matching_jobs()
+
+    return {
+        'matching_jobs': matching_jobs_uncached,
+        'matching_jobs_cached': matching_jobs,
+        'dashboard_match_quality': placement_scores,
+        'job_list_skill_filter': get('job_list', skill=dataset['skill'][:4]),
+        'job_list_location_filter': get('job_list', location=dataset['location'][:4]),
+        'employee_list_skill_filter': get('employee_list', skill=dataset['skill'][:4]),
+    }
+
+
+LOOKUPS_PER_RUN = 100
+
+
+def login_operations(sample=1000, seed=0):
+    """
+    Login identifier lookups, ``LOOKUPS_PER_RUN`` per run, over a sample of
+    the benchmark users' usernames and emails. Passwords are never checked,
+    so hashing cost is excluded.
+    """
+    User = get_user_model()
+    rng = random.Random(seed)
+    users = list(User.objects.filter(username__startswith=USER_PREFIX).values_list('username', 'email'))
+    identifiers = [rng.choice(pair) for pair in rng.sample(users, min(sample, len(users)))]
+    backend = EmailBackend()
+
+    def batch(lookup, before=None):
+        position = 0
+
+        def operation():
+            nonlocal position
+            for _ in range(LOOKUPS_PER_RUN):
+                identifier = identifiers[position % len(identifiers)]
+                position += 1
+                if before:
+                    before(identifier)
+                assert lookup(identifier) is not None
+        return operation
+
+    return {
+        # What EmailBackend did before: an OR across username and the unindexed email.
+        'or_lookup': batch(lambda identifier: User.objects.filter(Q(username=identifier) | Q(email=identifier)).first()),
+        'identifier_lookup_uncached': batch(backend.get_login_user, before=lambda identifier: forget([normalize(identifier)])),
+        'identifier_lookup_cached': batch(backend.get_login_user),
+    }
+
+
+def race_applications(job_ids, usernames, batch_size=200):
+    """
+    Have every user in ``usernames`` apply for each of ``job_ids`` at once,
+    one thread per applicant, and report fills per second, request latency,
+    server errors and lost updates: applicants told they filled a job that
+    the database does not record them as filling. With APPLICATION_QUEUE the
+    queue is then drained in ``batch_size`` batches, and the applicants told
+    they filled a job are those whose applications were accepted.
+    """
+    clients = []
+    for username in usernames:
+        client = Client(raise_request_exception=False)
+        client.login(username=username, password=PASSWORD)
+        clients.append((client, EmployeeProfile.objects.get(user__username=username).pk))
+    barrier = threading.Barrier(len(clients))
+    lock = threading.Lock()
+    winners = {job_id: [] for job_id in job_ids}
+    timings = []
+    server_errors = []
+    errors = []
+
+    def applicant(client, employee_id):
+        try:
+            for job_id in job_ids:
+                # Drop the message from the previous application, which the
+                # redirect target never displayed.
+                client.cookies.pop('messages', None)
+                barrier.wait()
+                started = time.perf_counter()
+                response = client.post(reverse('apply_job', args=[job_id]))
+                elapsed = time.perf_counter() - started
+                won = any(message.level == SUCCESS for message in get_messages(response.wsgi_request))
+                with lock:
+                    timings.append(elapsed)
+                    if response.status_code >= 500:
+                        server_errors.append(response.status_code)
+                    if won:
+                        winners[job_id].append(employee_id)
+        except Exception as error:
+            errors.append(error)
+            barrier.abort()
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=applicant, args=args) for args in clients]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - started
+    if errors:
+        raise errors[0]
+
+    drain_seconds = None
+    if settings.APPLICATION_QUEUE:
+        started = time.perf_counter()
+        drain(batch_size)
+        drain_seconds = time.perf_counter() - started
+        accepted = Application.objects.filter(job_id__in=job_ids, status=Application.ACCEPTED)
+        for job_id, employee_id in accepted.values_list('job_id', 'employee_id'):
+            winners[job_id].append(employee_id)
+
+    filled_by = dict(Job.objects.filter(pk__in=job_ids).values_list('pk', 'filled_by_id'))
+    fills = sum(1 for job_id in job_ids if winners[job_id])
+    return {
+        'mode': 'queue' if settings.APPLICATION_QUEUE else 'direct',
+        'jobs': len(job_ids),
+        'applicants': len(clients),
+        'attempts_per_sec': round(len(timings) / seconds, 2),
+        'fills_per_sec': round(fills / (seconds + (drain_seconds or 0)), 2),
+        'drain_seconds': round(drain_seconds, 3) if drain_seconds is not None else None,
+        'p50_ms': round(statistics.median(timings) * 1000, 3),
+        'p95_ms': round(_percentile(timings, 95) * 1000, 3),
+        'p99_ms': round(_percentile(timings, 99) * 1000, 3),
+        'server_errors': len(server_errors),
+        'unfilled_jobs': sum(1 for job_id in job_ids if filled_by[job_id] is None),
+        'lost_updates': sum(
+            1 for job_id, employee_ids in winners.items() for employee_id in employee_ids
+            if employee_id != filled_by[job_id]
+        ),
+    }
+
+
+# Each startup scenario is timed in a fresh interpreter: Django setup plus the
+# URL conf every worker loads, the WSGI entry point a deployed worker actually
+# imports (which also starts the chart render pool), and the extra cost of
+# drawing a dashboard chart.
+STARTUP_SCENARIOS = {
+    'worker': [],
+    'wsgi': ['skill_match_system.wsgi'],
+    'dashboard': ['core.charts', 'core.chart_render'],
+}
+# Reported when a scenario leaves them imported.
+HEAVY_MODULES = ('numpy', 'pandas', 'matplotlib')
+STARTUP_SCRIPT = """
+import resource, sys, time
+# Keep -X importtime to this process, not the chart workers it may spawn.
+sys._xoptions.pop('importtime', None)
+started = time.perf_counter()
+import django
+django.setup()
+import importlib
+for module in sys.argv[1:]:
+    importlib.import_module(module)
+print(time.perf_counter() - started, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+      *[name for name in %r if name in sys.modules])
+""" % (HEAVY_MODULES,)
+
+
+def parse_importtime(output):
+    """
+    Parse ``-X importtime`` stderr into ``(name, self_us, cumulative_us, depth)``
+    rows, in the order the interpreter reported them.
+    """
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def profile_startup(modules, repeat, top=15):
+    """
+    Start ``repeat`` fresh interpreters that set up Django, load the URL conf
+    and import ``modules``. Reports median wall time and peak RSS, which of
+    ``HEAVY_MODULES`` ended up imported, and the slowest imports (by
+    cumulative time) of the median run.
+    """
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'skill_match_system.settings'))
+    runs = []
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT, settings.ROOT_URLCONF, *modules],
+            capture_output=True, text=True, env=env, check=True,
+        )
+        seconds, max_rss_kb, *heavy = completed.stdout.split()
+        runs.append((float(seconds), int(max_rss_kb), completed.stderr, heavy))
+    runs.sort()
+    seconds, max_rss_kb, importtime, heavy = runs[len(runs) // 2]
+
+    rows = parse_importtime(importtime)
+    slowest = sorted(rows, key=lambda row: row[2], reverse=True)[:top]
+    return {
+        'seconds_p50': round(seconds, 4),
+        'max_rss_mb': round(max_rss_kb / 1024, 1),
+        'modules_imported': len(rows),
+        'import_seconds': round(sum(row[1] for row in rows) / 1e6, 4),
+        'heavy_modules': heavy,
+        'slowest_imports': [
+            {'module': name, 'self_ms': round(self_us / 1000, 2), 'cumulative_ms': round(cumulative_us / 1000, 2)}
+            for name, self_us, cumulative_us, depth in slowest
+        ],
+    }
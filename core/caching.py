@@ -0,0 +1,119 @@
+"""
+Version-stamped cache keys.
+
+Rather than deleting entries when data changes, cache keys embed one or more
+version counters. Bumping a counter makes every entry built from the old value
+unreachable, and the cache's own LRU/TTL eviction reclaims it.
+
+``VersionedIndex`` applies the same counters to process-wide in-memory
+indexes, which follow small changes without being rebuilt.
+"""
+import threading
+import time
+
+from django.core.cache import caches
+
+VERSION_CACHE_ALIAS = 'default'
+
+
+def _version_key(name):
+    return f'version:{name}'
+
+
+def get_versions(*names):
+    """Current value of each named version counter, in order."""
+    cache = caches[VERSION_CACHE_ALIAS]
+    keys = [_version_key(name) for name in names]
+    found = cache.get_many(keys)
+    versions = []
+    for key in keys:
+        if key not in found:
+            # Seed from the clock so a counter that was evicted never comes
+            # back with a value that older entries were built with.
+            cache.add(key, time.time_ns(), timeout=None)
+            found[key] = cache.get(key, time.time_ns())
+        versions.append(found[key])
+    return versions
+
+
+def bump_version(*names):
+    """Invalidate everything keyed on the named version counters."""
+    cache = caches[VERSION_CACHE_ALIAS]
+    for name in names:
+        try:
+            cache.incr(_version_key(name))
+        except ValueError:
+            get_versions(name)
+
+
+# How long a published change stays available for other processes to replay.
+CHANGE_TIMEOUT = 60 * 60
+
+
+def _change_key(name, version):
+    return f'change:{name}:{version}'
+
+
+class RebuildIndex(Exception):
+    """Raised by a ``VersionedIndex`` ``apply`` function for a change it cannot apply in place."""
+
+
+class VersionedIndex:
+    """
+    A process-wide index kept current with the ``name`` version counter.
+
+    ``build()`` makes a fresh index. A writer calls ``publish(change)``;
+    processes holding an older index then replay the changes they missed,
+    all at once, with ``apply(index, changes)``, which must tolerate seeing
+    a change the index already has. They rebuild instead when a change has expired, when
+    they are more than ``max_replay`` versions behind, when ``apply`` raises
+    ``RebuildIndex``, or when the counter was moved with ``bump_version``,
+    which publishes no change.
+    """
+
+    def __init__(self, name, build, apply=None, max_replay=1000):
+        self.name = name
+        self.build = build
+        self.apply = apply
+        self.max_replay = max_replay
+        self._lock = threading.Lock()
+        self._version = None
+        self._index = None
+
+    def get(self):
+        """The index, brought up to date with the version counter."""
+        version, = get_versions(self.name)
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._catch_up(version)
+        return self._index
+
+    def peek(self):
+        """The index as this process last saw it (``None`` before the first ``get``), without checking for changes."""
+        return self._index
+
+    def publish(self, change):
+        """Bump the version counter, recording ``change`` for other processes to replay."""
+        cache = caches[VERSION_CACHE_ALIAS]
+        try:
+            version = cache.incr(_version_key(self.name))
+        except ValueError:
+            get_versions(self.name)
+            return
+        cache.set(_change_key(self.name, version), change, timeout=CHANGE_TIMEOUT)
+
+    def _catch_up(self, version):
+        if self._index is not None and self.apply is not None and 0 < version - self._version <= self.max_replay:
+            keys = [_change_key(self.name, missed) for missed in range(self._version + 1, version + 1)]
+            changes = caches[VERSION_CACHE_ALIAS].get_many(keys)
+            if len(changes) == len(keys):
+                try:
+                    self.apply(self._index, [changes[key] for key in keys])
+                except RebuildIndex:
+                    pass
+                else:
+                    self._version = version
+                    return
+        self._index = self.build()
+        self._version = version
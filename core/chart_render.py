@@ -0,0 +1,110 @@
+"""
+Matplotlib rendering for the dashboard charts.
+
+Free of Django imports, so it can be loaded by the chart worker processes
+(see ``core.charts.render_pool``) without setting up the project.
+"""
+import io
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.dates as mdates
+import matplotlib.pyplot as plt
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
+from matplotlib.figure import Figure
+from matplotlib.patches import Circle
+from matplotlib.ticker import MaxNLocator
+
+STYLE = 'ggplot'
+MATCH_COLORS = {'High Match (70-100%)': '#27ae60', 'Medium Match (40-69%)': '#f39c12', 'Low Match (<40%)': '#c0392b'}
+
+
+def figure_png(fig):
+    buffer = io.BytesIO()
+    FigureCanvas(fig).print_png(buffer)
+    return buffer.getvalue()
+
+
+def render_overview(data):
+    fig = Figure(figsize=(10, 6))
+    ax = fig.add_subplot(111)
+    bars = ax.bar(data['categories'], data['counts'], color=['#3498db', '#2ecc71', '#f1c40f', '#e74c3c'])
+    ax.set_title('System Overview')
+    ax.set_ylabel('Count')
+    ax.bar_label(bars, padding=3)
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    return fig
+
+
+def render_skills(data):
+    fig = Figure(figsize=(10, 6))
+    ax = fig.add_subplot(111)
+    bars = ax.barh(data['skills'], data['counts'], color='#9b59b6')
+    ax.set_title('Top Skills in Demand')
+    ax.set_xlabel('Number of Jobs')
+    ax.bar_label(bars, padding=3)
+    fig.tight_layout()
+    return fig
+
+
+def render_match_quality(data):
+    fig = Figure(figsize=(8, 8))
+    ax = fig.add_subplot(111)
+    colors = [MATCH_COLORS[label] for label in data['labels']]
+    wedges, texts, autotexts = ax.pie(
+        data['sizes'], labels=data['labels'], colors=colors,
+        autopct='%1.1f%%', startangle=140, pctdistance=0.85,
+    )
+    # Draw circle for Donut Chart style
+    ax.add_artist(Circle((0, 0), 0.70, fc='white'))
+    ax.set_title('Match Quality Distribution (Taken Jobs)')
+    plt.setp(autotexts, size=10, weight="bold", color="white")
+    fig.tight_layout()
+    return fig
+
+
+DATE_FORMATS = {'day': '%d %b %Y', 'week': '%d %b %Y', 'month': '%b %Y'}
+
+
+def render_jobs_taken(data):
+    dates = pd.to_datetime(data['periods'])
+    fig = Figure(figsize=(10, 6))
+    ax = fig.add_subplot(111)
+    ax.plot(dates, data['cumulative'], marker='o', linestyle='-', linewidth=2, color='#2980b9')
+    ax.set_title('Jobs Taken Trend (Cumulative)')
+    ax.set_ylabel('Cumulative Jobs')
+    ax.set_xlabel(data['granularity'].capitalize())
+    ax.grid(True, linestyle='--', alpha=0.7)
+    ax.xaxis.set_major_formatter(mdates.DateFormatter(DATE_FORMATS[data['granularity']]))
+    fig.autofmt_xdate()
+    # Ensure integer Y-axis
+    ax.yaxis.set_major_locator(MaxNLocator(integer=True))
+    return fig
+
+
+RENDERERS = {
+    'overview': render_overview,
+    'skills': render_skills,
+    'match_quality': render_match_quality,
+    'jobs_taken': render_jobs_taken,
+}
+
+
+def render_png(name, data):
+    with plt.style.context(STYLE):
+        return figure_png(RENDERERS[name](data))
+
+
+def init_worker():
+    """
+    Process-pool initializer: apply the style once and draw a throwaway
+    figure so fonts are loaded and cached before the first real chart.
+    """
+    plt.style.use(STYLE)
+    fig = Figure(figsize=(2, 2))
+    ax = fig.add_subplot(111)
+    ax.set_title('warm-up')
+    ax.bar(['a'], [1])
+    figure_png(fig)
@@ -0,0 +1,17 @@
+"""
+Entry points for the chart render pool (see ``core.charts.render_pool``).
+
+The pool pickles what it runs by module path, so handing it the functions in
+``core.chart_render`` directly would import matplotlib and pandas into every
+web worker. These wrappers only import them inside the render processes.
+"""
+
+
+def init_worker():
+    from core import chart_render
+    chart_render.init_worker()
+
+
+def render_png(name, data):
+    from core import chart_render
+    return chart_render.render_png(name, data)
@@ -0,0 +1,220 @@
+"""
+Dashboard charts.
+
+Each chart is split into a data step (a small JSON-serialisable dict, cheap
+to compute) and a render step (matplotlib, expensive, see
+``core.chart_render``). Rendered PNGs are cached under a fingerprint of their
+data, so a chart is only redrawn when the numbers behind it change; the same
+fingerprint doubles as the HTTP ETag.
+
+Totals come from the counters in ``core.stats`` rather than table scans.
+Rendering pulls in matplotlib and pandas, so this module is imported lazily
+by the views that need it rather than at URL-loading time, and leaves those
+libraries to the render pool's processes (see ``core.chart_worker``).
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from itertools import accumulate
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+
+from core import chart_worker, rollups, stats
+from core.matching import placement_scores
+
+MATCH_LABELS = ['High Match (70-100%)', 'Medium Match (40-69%)', 'Low Match (<40%)']
+MATCH_BINS = [40, 70]
+
+
+# --- Data ---
+
+def overview_data():
+    counts = stats.get_values(stats.EMPLOYEES, stats.EMPLOYERS, stats.JOBS, stats.JOBS_TAKEN)
+    return {
+        'categories': ['Employees', 'Employers', 'Jobs Posted', 'Jobs Taken'],
+        'counts': list(counts.values()),
+    }
+
+
+def skills_data():
+    skills = stats.top_skills(7)
+    if not skills:
+        return None
+    skills.reverse()  # Ascending, for the horizontal bar chart
+    return {'skills': [skill.name for skill in skills], 'counts': [skill.job_count for skill in skills]}
+
+
+def match_quality_data():
+    match_scores = placement_scores()
+    if len(match_scores) == 0:
+        return None
+    # One pass: bucket 0 is <40, 1 is 40-69, 2 is 70+; listed high to low.
+    sizes = np.bincount(np.digitize(match_scores, MATCH_BINS), minlength=len(MATCH_LABELS))[::-1].tolist()
+    # Filter out zero values for cleaner chart
+    return {
+        'labels': [label for label, size in zip(MATCH_LABELS, sizes) if size > 0],
+        'sizes': [size for size in sizes if size > 0],
+    }
+
+
+def jobs_taken_data(trend=None):
+    # Cumulative jobs taken over the range, read from the trend rollups
+    trend = trend or rollups.parse_trend_range({})
+    periods, counts = rollups.series(rollups.FILLED, trend)
+    cumulative = list(accumulate(counts))
+    if not cumulative[-1]:
+        return None
+    return {
+        'granularity': trend.granularity,
+        'periods': [period.isoformat() for period in periods],
+        'cumulative': cumulative,
+    }
+
+
+CHARTS = {
+    'overview': overview_data,
+    'skills': skills_data,
+    'match_quality': match_quality_data,
+    'jobs_taken': jobs_taken_data,
+}
+
+
+def chart_data(name, trend=None):
+    """Data for chart ``name``; ``trend`` (a ``rollups.TrendRange``) sets the trend chart's range."""
+    if name == 'jobs_taken':
+        return jobs_taken_data(trend)
+    return CHARTS[name]()
+
+
+def fingerprint(name, data):
+    payload = json.dumps([name, data], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def cache_key(name, etag):
+    return f'chart:{name}:{etag}'
+
+
+_pool = None
+
+
+def render_pool():
+    """
+    The process-wide pool of chart renderers, or ``None`` when
+    ``CHART_RENDER_WORKERS`` is 0 and charts are drawn in-process. Workers are
+    spawned (not forked from a threaded web worker) and warmed up by
+    ``chart_render.init_worker`` before they take their first chart. Work is
+    handed over through ``core.chart_worker``, so this process never imports
+    matplotlib unless it has to draw a chart itself.
+    """
+    global _pool
+    if _pool is None and settings.CHART_RENDER_WORKERS:
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.CHART_RENDER_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=chart_worker.init_worker,
+        )
+    return _pool
+
+
+def start_render_pool():
+    """
+    Create the render pool and start its workers now, from the WSGI/ASGI
+    entry point, so that no dashboard request waits for them to spawn and
+    import matplotlib.
+    """
+    if settings.DASHBOARD_CHART_MODE != 'server':
+        return None
+    pool = render_pool()
+    if pool is not None:
+        # The executor only spawns a worker when a task needs one.
+        for _ in range(settings.CHART_RENDER_WORKERS):
+            pool.submit(os.getpid)
+    return pool
+
+
+def discard_pool(pool):
+    """Drop a broken ``pool`` without waiting on it; the next render starts a fresh one."""
+    global _pool
+    if _pool is pool:
+        _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def render_charts(datasets, late=None):
+    """
+    Render ``{name: data}`` concurrently; returns ``{name: png_bytes}`` for
+    the charts drawn within ``CHART_RENDER_TIMEOUT`` seconds. Slower charts
+    are left out, and ``late(name, png_bytes)`` is called as each of them
+    finishes.
+    """
+    pool = render_pool()
+    if pool is not None:
+        try:
+            futures = {pool.submit(chart_worker.render_png, name, data): name for name, data in datasets.items()}
+            done, pending = wait(futures, timeout=settings.CHART_RENDER_TIMEOUT)
+            rendered = {futures[future]: future.result() for future in done}
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool next time and draw these here.
+            discard_pool(pool)
+        else:
+            if late is not None:
+                for future in pending:
+                    future.add_done_callback(partial(_finish_late, late, futures[future]))
+            return rendered
+    from core import chart_render
+    return {name: chart_render.render_png(name, data) for name, data in datasets.items()}
+
+
+def _finish_late(late, name, future):
+    if not future.cancelled() and future.exception() is None:
+        late(name, future.result())
+
+
+def render_missing(datasets):
+    """
+    Make sure every chart in ``{name: data}`` is cached, rendering the
+    missing ones together. Returns ``{name: etag}`` for the charts that are
+    cached now; charts still being drawn are cached when they finish.
+    """
+    cache = caches[settings.CHART_CACHE_ALIAS]
+    etags = {name: fingerprint(name, data) for name, data in datasets.items()}
+    keys = {name: cache_key(name, etag) for name, etag in etags.items()}
+    cached = cache.get_many(keys.values())
+    missing = {name: datasets[name] for name, key in keys.items() if key not in cached}
+    if missing:
+        def store(name, png):
+            cache.set(keys[name], png, timeout=settings.CHART_CACHE_TIMEOUT)
+
+        rendered = render_charts(missing, late=store)
+        cache.set_many(
+            {keys[name]: png for name, png in rendered.items()},
+            timeout=settings.CHART_CACHE_TIMEOUT,
+        )
+        for name in missing.keys() - rendered.keys():
+            del etags[name]
+    return etags
+
+
+def chart_png(name, data, etag):
+    """
+    PNG bytes for chart ``name``, rendered only when not already cached;
+    ``None`` while the chart is still being drawn.
+    """
+    cache = caches[settings.CHART_CACHE_ALIAS]
+    key = cache_key(name, etag)
+    png = cache.get(key)
+    if png is None:
+        def store(name, png):
+            cache.set(key, png, timeout=settings.CHART_CACHE_TIMEOUT)
+
+        png = render_charts({name: data}, late=store).get(name)
+        if png is not None:
+            store(name, png)
+    return png
@@ -0,0 +1,157 @@
+"""
+Streaming data exports.
+
+Each export reads its rows with ``.values_list().iterator()``, so rows arrive
+from the database cursor in chunks instead of being loaded as one list. Rows
+are processed ``chunk_size`` at a time: the skill names for a chunk are
+fetched with one query, and the chunk is encoded and yielded before the next
+one is read. Memory use therefore depends on the chunk size, not on the
+number of rows.
+"""
+import csv
+import io
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from employees.models import EmployeeProfile
+from jobs.models import Job
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class Export:
+    """
+    Named columns of ``queryset`` read by ``values_list``, plus a ``skills``
+    column when ``skills`` names an m2m. Every subclass sets ``queryset``.
+    """
+    queryset = None
+    columns = ()  # (heading, lookup)
+    skills = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.queryset is None:
+            raise TypeError(f'{cls.__name__} must set queryset.')
+
+    def get_queryset(self):
+        # A fresh copy, so the class attribute never caches results.
+        return self.queryset.all()
+
+    @property
+    def headings(self):
+        headings = [heading for heading, _ in self.columns]
+        return headings + ['skills'] if self.skills else headings
+
+    def chunks(self, chunk_size):
+        """Lists of rows (tuples in ``headings`` order), ``chunk_size`` at a time."""
+        rows = self.get_queryset().order_by('pk').values_list(*[lookup for _, lookup in self.columns])
+        rows = rows.iterator(chunk_size=chunk_size)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            if self.skills:
+                chunk = self.add_skills(chunk)
+            yield chunk
+
+    def add_skills(self, chunk):
+        # The first column is always the primary key.
+        field = self.queryset.model._meta.get_field(self.skills)
+        through = field.remote_field.through
+        owner = f'{field.m2m_field_name()}_id'
+        names = {}
+        links = through.objects.filter(**{f'{owner}__in': [row[0] for row in chunk]})
+        for pk, name in links.order_by('skill__name').values_list(owner, 'skill__name'):
+            names.setdefault(pk, []).append(name)
+        return [row + (names.get(row[0], []),) for row in chunk]
+
+
+class JobExport(Export):
+    columns = (
+        ('id', 'pk'),
+        ('title', 'title'),
+        ('employer', 'employer__company_name'),
+        ('location', 'location'),
+        ('place', 'place__name'),
+        ('experience_required', 'experience_required'),
+        ('salary', 'salary'),
+        ('salary_amount', 'salary_amount'),
+        ('created_at', 'created_at'),
+        ('filled_by', 'filled_by_id'),
+        ('filled_at', 'filled_at'),
+    )
+    skills = 'required_skills'
+    queryset = Job.objects.all()
+
+
+class EmployeeExport(Export):
+    columns = (
+        ('id', 'pk'),
+        ('name', 'name'),
+        ('age', 'age'),
+        ('experience_years', 'experience_years'),
+        ('phone', 'phone'),
+        ('location', 'location'),
+        ('place', 'place__name'),
+    )
+    skills = 'skills'
+    queryset = EmployeeProfile.objects.all()
+
+
+class PlacementExport(Export):
+    columns = (
+        ('job_id', 'pk'),
+        ('title', 'title'),
+        ('employer', 'employer__company_name'),
+        ('employee_id', 'filled_by_id'),
+        ('employee', 'filled_by__name'),
+        ('location', 'location'),
+        ('filled_at', 'filled_at'),
+    )
+    skills = 'required_skills'
+    queryset = Job.objects.filter(filled_by__isnull=False)
+
+
+EXPORTS = {
+    'jobs': JobExport,
+    'employees': EmployeeExport,
+    'placements': PlacementExport,
+}
+
+
+def encode_csv(export, chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(export.headings)
+    yield buffer.getvalue()
+    for chunk in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        for row in chunk:
+            if export.skills:
+                row = row[:-1] + (';'.join(row[-1]),)
+            writer.writerow(row)
+        yield buffer.getvalue()
+
+
+def encode_ndjson(export, chunks):
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    headings = export.headings
+    for chunk in chunks:
+        yield ''.join(encoder.encode(dict(zip(headings, row))) + '\n' for row in chunk)
+
+
+ENCODERS = {
+    'csv': encode_csv,
+    'ndjson': encode_ndjson,
+}
+
+
+def stream_export(name, format, chunk_size):
+    """Text pieces of export ``name`` in ``format``, one per chunk of rows."""
+    export = EXPORTS[name]()
+    return ENCODERS[format](export, export.chunks(chunk_size))
@@ -0,0 +1,315 @@
+"""
+Facet counts for the job list.
+
+Every facet value (a skill, a place, an experience or salary band) has a
+posting list of the open jobs carrying it, stored as a bitmap over the open
+job ids. A filter is the AND of the bitmaps it selects, and the counts for a
+facet are the popcounts of ``filter & posting`` for every value at once. Each
+facet is counted against the other filters only, so the counts show what
+choosing a different value would return.
+
+The index is built once per process. Saves, fills and deletes publish the
+ids of the jobs they touched under the ``facets`` version (see
+``core.signals``), and each process re-reads just those jobs into its index
+(see ``core.caching.VersionedIndex``). Cached counts are dropped whenever the
+``jobs`` version is bumped.
+"""
+import hashlib
+import re
+import threading
+from collections import defaultdict
+
+import numpy as np
+from django.core.cache import caches
+
+from core.caching import RebuildIndex, VersionedIndex, get_versions
+from core.scoring import popcount
+from core.search import search
+from jobs.models import Job
+
+FACET_CACHE_ALIAS = 'default'
+FACET_CACHE_TIMEOUT = 300
+
+# (key, label, lowest, highest); highest None means unbounded.
+EXPERIENCE_BANDS = [
+    ('0', 'No experience', 0, 0),
+    ('1-2', '1-2 years', 1, 2),
+    ('3-5', '3-5 years', 3, 5),
+    ('6-10', '6-10 years', 6, 10),
+    ('10+', 'Over 10 years', 11, None),
+]
+SALARY_BANDS = [
+    ('0-10k', 'Under 10,000', 0, 9999),
+    ('10k-20k', '10,000-19,999', 10000, 19999),
+    ('20k-30k', '20,000-29,999', 20000, 29999),
+    ('30k+', '30,000 and above', 30000, None),
+]
+FACETS = ('skill', 'place', 'experience', 'salary')
+# Query parameter selecting a value of each facet.
+FACET_PARAMS = {'skill': 'skill_id', 'place': 'place', 'experience': 'experience', 'salary': 'salary'}
+FACET_LABELS = {'skill': 'Skills', 'place': 'Locations', 'experience': 'Experience', 'salary': 'Salary'}
+
+_SALARY = re.compile(r'(\d[\d,]*(?:\.\d+)?)\s*([kK])?')
+
+
+def parse_salary(text):
+    """The first amount in a free-text salary (``'12,000/month'``, ``'15k'``), or None."""
+    match = _SALARY.search(text or '')
+    if not match:
+        return None
+    amount = float(match.group(1).replace(',', ''))
+    return int(amount * 1000 if match.group(2) else amount)
+
+
+def band_of(bands, value):
+    if value is None:
+        return None
+    for key, _, lowest, highest in bands:
+        if value >= lowest and (highest is None or value <= highest):
+            return key
+    return None
+
+
+def band_range(bands, key):
+    """``(lowest, highest)`` of band ``key``, or None if there is no such band."""
+    for band_key, _, lowest, highest in bands:
+        if band_key == key:
+            return lowest, highest
+    return None
+
+
+# Facets with posting lists; 'location' holds the raw spellings, for the
+# free-text location filter.
+POSTING_FACETS = (*FACETS, 'location')
+
+
+def read_jobs(jobs):
+    """
+    ``({job_id: [(facet, value), ...]}, {'skill': names, 'place': names})``
+    for the open jobs in ``jobs``, in two queries.
+    """
+    jobs = jobs.filter(filled_by__isnull=True)
+    values = {}
+    names = {'skill': {}, 'place': {}}
+    rows = jobs.values_list('pk', 'place_id', 'location', 'experience_required', 'salary_amount', 'place__name')
+    for pk, place_id, location, experience, salary, place_name in rows:
+        values[pk] = [
+            ('experience', band_of(EXPERIENCE_BANDS, experience)),
+            ('salary', band_of(SALARY_BANDS, salary)),
+            ('location', location.lower()),
+        ]
+        if place_id is not None:
+            values[pk].append(('place', place_id))
+            names['place'][place_id] = place_name
+    links = Job.required_skills.through.objects.filter(job__in=jobs).values_list('job_id', 'skill_id', 'skill__name')
+    for job_id, skill_id, name in links:
+        if job_id in values:
+            values[job_id].append(('skill', skill_id))
+            names['skill'][skill_id] = name
+    for pk, pairs in values.items():
+        values[pk] = [(facet, value) for facet, value in pairs if value is not None]
+    return values, names
+
+
+class FacetIndex:
+    # Rebuild once more than this many positions (or half of them) belong
+    # to jobs that have closed since.
+    max_closed = 1000
+
+    def __init__(self):
+        # update() changes the bitmaps in place; readers hold the lock too.
+        self.lock = threading.RLock()
+        self.held, self.names = read_jobs(Job.objects.all())
+        self.ids = np.array(sorted(self.held), dtype=np.int64)
+        self.n_words = max(1, (len(self.ids) + 63) // 64)
+        self.all = self._bitmap(np.arange(len(self.ids)))
+        self.closed = 0
+
+        positions = {facet: defaultdict(list) for facet in POSTING_FACETS}
+        for position, job_id in enumerate(self.ids.tolist()):
+            for facet, value in self.held[job_id]:
+                positions[facet][value].append(position)
+        self.postings = {
+            facet: {value: self._bitmap(np.array(found, dtype=np.int64)) for value, found in by_value.items()}
+            for facet, by_value in positions.items()
+        }
+
+    def update(self, job_ids):
+        """
+        Re-read ``job_ids`` (jobs posted, edited, filled or deleted) into the
+        index. New jobs are appended; raises ``RebuildIndex`` when an open job
+        without a position would fall between existing ones, like a job
+        reopened that was already filled when the index was built.
+        """
+        values, names = read_jobs(Job.objects.filter(pk__in=job_ids))
+        with self.lock:
+            for job_id in job_ids:
+                if job_id in self.held:
+                    self._set(self._position(job_id), self.held.pop(job_id), False)
+                    self.closed += 1
+            new = sorted(job_id for job_id in values if self._position(job_id) is None)
+            if new and len(self.ids) and new[0] < self.ids[-1]:
+                raise RebuildIndex
+            self._grow(len(self.ids) + len(new))
+            self.ids = np.concatenate([self.ids, np.array(new, dtype=np.int64)])
+            for job_id, pairs in values.items():
+                position = self._position(job_id)
+                if job_id not in new:
+                    self.closed -= 1
+                self._set(position, pairs, True)
+                self.held[job_id] = pairs
+            for facet, by_id in names.items():
+                self.names[facet].update(by_id)
+            if self.closed > max(self.max_closed, len(self.ids) // 2):
+                raise RebuildIndex
+
+    def _position(self, job_id):
+        """Position of ``job_id`` in the bitmaps, or None."""
+        position = int(np.searchsorted(self.ids, job_id))
+        if position < len(self.ids) and self.ids[position] == job_id:
+            return position
+        return None
+
+    def _grow(self, size):
+        n_words = max(1, (size + 63) // 64)
+        if n_words <= self.n_words:
+            return
+        padding = np.zeros(n_words - self.n_words, dtype=np.uint64)
+        self.all = np.concatenate([self.all, padding])
+        for postings in self.postings.values():
+            for value, bitmap in postings.items():
+                postings[value] = np.concatenate([bitmap, padding])
+        self.n_words = n_words
+
+    def _set(self, position, pairs, on):
+        """Set (or clear) the bit at ``position`` in ``all`` and the postings of ``(facet, value)`` ``pairs``."""
+        word, bit = divmod(position, 64)
+        mask = np.uint64(1) << np.uint64(bit)
+        for facet, value in [(None, None), *pairs]:
+            if facet is None:
+                bitmap = self.all
+            elif on:
+                bitmap = self.postings[facet].setdefault(value, np.zeros(self.n_words, dtype=np.uint64))
+            else:
+                bitmap = self.postings[facet][value]
+            if on:
+                bitmap[word] |= mask
+            else:
+                bitmap[word] &= ~mask
+
+    def _bitmap(self, positions):
+        words = np.zeros(self.n_words, dtype=np.uint64)
+        np.bitwise_or.at(words, positions // 64, np.left_shift(np.uint64(1), (positions % 64).astype(np.uint64)))
+        return words
+
+    def any_of(self, facet, values):
+        """Bitmap of the open jobs with any of ``values`` for ``facet``."""
+        result = np.zeros(self.n_words, dtype=np.uint64)
+        for value in values:
+            posting = self.postings[facet].get(value)
+            if posting is not None:
+                result |= posting
+        return result
+
+    def of_ids(self, job_ids):
+        """Bitmap of the open jobs among ``job_ids``."""
+        job_ids = np.array(sorted(job_ids), dtype=np.int64)
+        positions = np.searchsorted(self.ids, job_ids)
+        found = positions < len(self.ids)
+        found[found] = self.ids[positions[found]] == job_ids[found]
+        return self._bitmap(positions[found])
+
+    def counts(self, filters):
+        """
+        ``{facet: {value: count}}`` for ``filters`` (``{name: bitmap}``); each
+        facet is counted under every filter except its own.
+        """
+        result = {}
+        for facet in FACETS:
+            base = self.all.copy()
+            for name, bitmap in filters.items():
+                if name != facet:
+                    base &= bitmap
+            values = list(self.postings[facet])
+            if not values:
+                result[facet] = {}
+                continue
+            matrix = np.stack([self.postings[facet][value] for value in values])
+            totals = popcount(matrix & base)
+            result[facet] = {value: int(total) for value, total in zip(values, totals) if total}
+        return result
+
+
+def update_index(index, changes):
+    index.update(sorted({job_id for job_ids in changes for job_id in job_ids}))
+
+
+_index = VersionedIndex('facets', FacetIndex, update_index)
+
+
+def facet_index():
+    """The process-wide :class:`FacetIndex`."""
+    return _index.get()
+
+
+def note_jobs(*job_ids):
+    """Call after jobs are posted, edited, filled or deleted, to re-read them into every process's index."""
+    if job_ids:
+        _index.publish(sorted(set(job_ids)))
+
+
+def filter_bitmaps(index, params):
+    """Bitmaps for the job-list filters in ``params`` (the same ones JobListView applies)."""
+    filters = {}
+    if params.get('skill'):
+        names = set(search('skill', params['skill']))
+        skill_ids = [skill_id for skill_id, name in index.names['skill'].items() if name in names]
+        filters['skill_query'] = index.any_of('skill', skill_ids)
+    if params.get('location'):
+        filters['location'] = index.any_of('location', {value.lower() for value in search('location', params['location'])})
+    if params.get('title'):
+        filters['title'] = index.of_ids(search('title', params['title']))
+    for facet in ('skill', 'place'):
+        if params.get(FACET_PARAMS[facet], '').isdigit():
+            filters[facet] = index.any_of(facet, [int(params[FACET_PARAMS[facet]])])
+    for facet in ('experience', 'salary'):
+        if params.get(facet):
+            filters[facet] = index.any_of(facet, [params[facet]])
+    return filters
+
+
+def facet_counts(params):
+    """
+    Labelled facet counts for the job-list filters in ``params``:
+    ``{facet: [(value, label, count), ...]}``, most common first. Cached per
+    filter set until the jobs change.
+    """
+    names = ('skill', 'title', 'location', *FACET_PARAMS.values())
+    params = {name: params.get(name, '') for name in names}
+    versions = ':'.join(str(version) for version in get_versions('jobs', 'facets'))
+    digest = hashlib.sha1(repr(sorted(params.items())).encode('utf-8')).hexdigest()
+    key = f'facets:{versions}:{digest}'
+    cache = caches[FACET_CACHE_ALIAS]
+    result = cache.get(key)
+    if result is None:
+        index = facet_index()
+        with index.lock:
+            counts = index.counts(filter_bitmaps(index, params))
+            labels = {
+                'skill': dict(index.names['skill']),
+                'place': dict(index.names['place']),
+                'experience': {key: label for key, label, _, _ in EXPERIENCE_BANDS},
+                'salary': {key: label for key, label, _, _ in SALARY_BANDS},
+            }
+        result = {}
+        for facet in FACETS:
+            ordered = sorted(counts[facet].items(), key=lambda item: (-item[1], str(item[0])))
+            if facet in ('experience', 'salary'):
+                # Bands read best in their natural order.
+                order = [key for key, _, _, _ in (EXPERIENCE_BANDS if facet == 'experience' else SALARY_BANDS)]
+                ordered.sort(key=lambda item: order.index(item[0]))
+            result[facet] = [
+                (value, labels[facet][value], count) for value, count in ordered if value in labels[facet]
+            ]
+        cache.set(key, result, timeout=FACET_CACHE_TIMEOUT)
+    return result
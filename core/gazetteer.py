@@ -0,0 +1,56 @@
+"""
+The bundled offline gazetteer (``core/data/gazetteer.csv``).
+
+Only depends on the model classes passed in, so data migrations can load it
+with their historical models.
+"""
+import csv
+from pathlib import Path
+
+GAZETTEER_PATH = Path(__file__).resolve().parent / 'data' / 'gazetteer.csv'
+
+
+def normalize(value):
+    """Case-folded, whitespace-collapsed form used for place lookups."""
+    return ' '.join((value or '').casefold().split())
+
+
+def candidate_keys(location):
+    """
+    Keys to try for a free-text location, most specific first: the whole
+    string, then each comma-separated part from the last one ("Andheri,
+    Mumbai" -> "andheri, mumbai", "mumbai", "andheri").
+    """
+    keys = [normalize(location)]
+    keys.extend(normalize(part) for part in reversed((location or '').split(',')))
+    return [key for i, key in enumerate(keys) if key and key not in keys[:i]]
+
+
+def read_gazetteer(path=GAZETTEER_PATH):
+    """Yield ``(name, latitude, longitude, aliases)`` rows."""
+    with open(path, newline='', encoding='utf-8') as handle:
+        for row in csv.DictReader(handle):
+            aliases = [alias for alias in (row['aliases'] or '').split('|') if alias]
+            yield row['name'], float(row['latitude']), float(row['longitude']), aliases
+
+
+def load_gazetteer(Place, PlaceName, path=GAZETTEER_PATH):
+    """Create or update every gazetteer place and its lookup keys."""
+    loaded = 0
+    for name, latitude, longitude, aliases in read_gazetteer(path):
+        place, _ = Place.objects.update_or_create(
+            name=name, defaults={'latitude': latitude, 'longitude': longitude},
+        )
+        for spelling in [name] + aliases:
+            PlaceName.objects.update_or_create(key=normalize(spelling), defaults={'place': place})
+        loaded += 1
+    return loaded
+
+
+def resolve_place_id(PlaceName, location):
+    """Primary key of the place ``location`` refers to, or ``None``."""
+    for key in candidate_keys(location):
+        place_id = PlaceName.objects.filter(key=key).values_list('place_id', flat=True).first()
+        if place_id is not None:
+            return place_id
+    return None
@@ -0,0 +1,107 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from core.benchmarks import (
+    LOOKUPS_PER_RUN, STARTUP_SCENARIOS, USER_PREFIX, generate_dataset, login_operations, matching_operations, measure,
+    parse_size, profile_startup, race_applications,
+)
+from jobs.models import Job
+import json
+import time
+
+class Command(BaseCommand):
+    help = 'Runs performance benchmarks against a throwaway test database and prints a JSON report'
+
+    def add_arguments(self, parser):
+        parser.add_argument('suite', choices=['matching', 'startup', 'apply', 'login'], help='Benchmark suite to run.')
+        parser.add_argument('--sizes', default='1k,10k',
+                            help='Comma-separated dataset sizes, e.g. 1k,10k,100k,1m.')
+        parser.add_argument('--repeat', type=int, default=10,
+                            help='Timed runs per operation (apply: jobs raced for).')
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent applicants (apply suite).')
+        parser.add_argument('--seed', type=int, default=0, help='Seed for the synthetic data.')
+        parser.add_argument('--output', help='Write the report to this file instead of stdout.')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [parse_size(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError(f"Invalid --sizes value: {options['sizes']!r}")
+
+        run = getattr(self, f"run_{options['suite']}")
+        if options['suite'] == 'startup':
+            # Only spawns fresh interpreters; no database needed.
+            results = run(sizes, options)
+        else:
+            setup_test_environment()
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            try:
+                results = run(sizes, options)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                teardown_test_environment()
+
+        report = json.dumps({
+            'suite': options['suite'],
+            'generated_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'seed': options['seed'],
+            'results': results,
+        }, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(report + '\n')
+            self.stderr.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(report)
+
+    def run_matching(self, sizes, options):
+        results = []
+        for size in sizes:
+            self.stderr.write(f'Generating {size} jobs and employees...')
+            started = time.perf_counter()
+            dataset = generate_dataset(size, seed=options['seed'])
+            setup_seconds = round(time.perf_counter() - started, 2)
+
+            operations = {}
+            for name, operation in matching_operations(dataset).items():
+                self.stderr.write(f'  {name}')
+                operations[name] = measure(operation, options['repeat'])
+            results.append({'size': size, 'setup_seconds': setup_seconds, 'operations': operations})
+        return results
+
+    def run_startup(self, sizes, options):
+        results = []
+        for name, modules in STARTUP_SCENARIOS.items():
+            self.stderr.write(f'  {name}')
+            results.append({'scenario': name, **profile_startup(modules, options['repeat'])})
+        return results
+
+    def run_apply(self, sizes, options):
+        if options['threads'] < 1:
+            raise CommandError('--threads must be positive.')
+        results = []
+        for size in sizes:
+            self.stderr.write(f'Generating {size} jobs and employees...')
+            generate_dataset(size, seed=options['seed'])
+            job_ids = list(Job.objects.filter(filled_by__isnull=True).order_by('pk').values_list('pk', flat=True)[:options['repeat']])
+            usernames = [f'{USER_PREFIX}employee-{i}' for i in range(min(options['threads'], size))]
+            self.stderr.write(f'  {len(usernames)} applicants racing for {len(job_ids)} jobs')
+            results.append({'size': size, **race_applications(job_ids, usernames)})
+        return results
+
+    def run_login(self, sizes, options):
+        results = []
+        for size in sizes:
+            self.stderr.write(f'Generating {size} jobs and employees...')
+            generate_dataset(size, seed=options['seed'])
+            operations = {}
+            for name, operation in login_operations(seed=options['seed']).items():
+                self.stderr.write(f'  {name}')
+                timing = measure(operation, options['repeat'])
+                ops_per_sec = timing['ops_per_sec']
+                timing['lookups_per_sec'] = round(ops_per_sec * LOOKUPS_PER_RUN, 2) if ops_per_sec else None
+                operations[name] = timing
+            results.append({'size': size, 'lookups_per_run': LOOKUPS_PER_RUN, 'operations': operations})
+        return results
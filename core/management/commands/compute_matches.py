@@ -0,0 +1,119 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from core.caching import bump_version
+from core.matching import SkillMatrix, replace_scores
+from core.scoring import count_chunk, init_worker, popcount, score_counts, widen
+from employees.models import EmployeeProfile
+from jobs.models import Job, MatchScore
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, time
+import numpy as np
+import os
+import time as clock
+
+def bounded_map(pool, fn, args, window):
+    """``pool.map(fn, args)`` with at most ``window`` tasks submitted at a time; results in order."""
+    pending = deque()
+    for arg in args:
+        pending.append(pool.submit(fn, arg))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def score_blocks(employee_ids, experience, counts, catalogue, required):
+    """:func:`~core.matching.cross_scores` blocks for a chunk's match counts, one employee at a time."""
+    for employee_id, years, matched in zip(employee_ids, experience, counts):
+        skill_match, exp_match, total = score_counts(matched, required, years, catalogue.experience)
+        yield np.full(len(matched), employee_id), catalogue.ids, skill_match, exp_match, total
+
+class Command(BaseCommand):
+    help = 'Scores every employee against every open job and stores the results'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Number of scoring processes (1 scores in this process).')
+        parser.add_argument('--chunk-size', type=int, default=100,
+                            help='Employees scored per task.')
+        parser.add_argument('--tile-size', type=int, default=1024,
+                            help='Jobs scored at once within a task.')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Scores inserted per statement.')
+        parser.add_argument('--since',
+                            help='Only score jobs posted on or after this date/datetime.')
+
+    def parse_since(self, value):
+        since = parse_datetime(value)
+        if since is None:
+            day = parse_date(value)
+            if day is None:
+                raise CommandError(f'Invalid --since value: {value!r}')
+            since = datetime.combine(day, time.min)
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        chunk_size = options['chunk_size']
+        if min(workers, chunk_size, options['tile_size'], options['batch_size']) < 1:
+            raise CommandError('--workers, --chunk-size, --tile-size and --batch-size must be positive.')
+
+        jobs = Job.objects.filter(filled_by__isnull=True)
+        if options['since']:
+            jobs = jobs.filter(created_at__gte=self.parse_since(options['since']))
+
+        self.stdout.write('Loading skills...')
+        catalogue = SkillMatrix.for_jobs(jobs)
+        employees = SkillMatrix.for_employees(EmployeeProfile.objects.all())
+        # Every chunk must share one bitset width with the catalogue.
+        n_words = max(catalogue.bits.shape[1], employees.bits.shape[1])
+        employee_bits = widen(employees.bits, n_words)
+        job_bits = widen(catalogue.bits, n_words)
+
+        starts = range(0, len(employees), chunk_size)
+        self.stdout.write(
+            f'Scoring {len(employees)} employees x {len(catalogue)} jobs '
+            f'in {len(starts)} chunks on {workers} worker(s)...'
+        )
+
+        started = clock.perf_counter()
+        stale_jobs = jobs.values('pk')
+        chunks = (employee_bits[start:start + chunk_size] for start in starts)
+        if workers == 1 or len(starts) <= 1:
+            init_worker(job_bits, options['tile_size'])
+            results = map(count_chunk, chunks)
+            written = self.store(results, starts, employees, catalogue, stale_jobs, options['batch_size'])
+        else:
+            # Forked workers must not share the parent's database sockets.
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=init_worker,
+                initargs=(job_bits, options['tile_size']),
+            ) as pool:
+                # Only a few chunks are queued ahead of the writer, so finished
+                # counts never pile up in memory.
+                results = bounded_map(pool, count_chunk, chunks, window=2 * workers)
+                written = self.store(results, starts, employees, catalogue, stale_jobs, options['batch_size'])
+        elapsed = clock.perf_counter() - started
+        # Scores were rewritten behind the signals' back.
+        bump_version('jobs')
+
+        rate = written / elapsed if elapsed else float(written)
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {written} match scores in {elapsed:.2f}s ({rate:,.0f} pairs/sec)'
+        ))
+
+    def store(self, results, starts, employees, catalogue, stale_jobs, batch_size):
+        written = 0
+        required = popcount(catalogue.bits)
+        for start, counts in zip(starts, results):
+            rows = slice(start, start + len(counts))
+            stale = MatchScore.objects.filter(employee_id__in=employees.ids[rows].tolist(), job__in=stale_jobs)
+            blocks = score_blocks(employees.ids[rows], employees.experience[rows], counts, catalogue, required)
+            written += replace_scores(blocks, stale, batch_size=batch_size)
+        return written
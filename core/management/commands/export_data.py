@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from core.exports import EXPORTS, FORMATS, stream_export
+
+class Command(BaseCommand):
+    help = 'Streams jobs, employees or placements as CSV or NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(EXPORTS))
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--output', help='File to write (default: standard output).')
+        parser.add_argument('--chunk-size', type=int, default=settings.EXPORT_CHUNK_SIZE,
+                            help='Rows read, and skills fetched, per query.')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive.')
+        pieces = stream_export(options['name'], options['format'], options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                output.writelines(pieces)
+        else:
+            for piece in pieces:
+                self.stdout.write(piece, ending='')
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from core.caching import bump_version
+from core.gazetteer import GAZETTEER_PATH, load_gazetteer
+from core.models import Place, PlaceName
+from core.places import place_index
+from employees.models import EmployeeProfile
+from jobs.models import Job
+
+class Command(BaseCommand):
+    help = 'Loads the offline gazetteer and re-resolves job and employee locations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=str(GAZETTEER_PATH), help='Gazetteer CSV to load.')
+
+    def handle(self, *args, **options):
+        loaded = load_gazetteer(Place, PlaceName, options['file'])
+        bump_version('places')
+        self.stdout.write(f'Loaded {loaded} places.')
+
+        index = place_index()
+        for model in (Job, EmployeeProfile):
+            changed = 0
+            for pk, location, place_id in model.objects.values_list('pk', 'location', 'place_id').iterator():
+                resolved = index.resolve(location)
+                if resolved != place_id:
+                    model.objects.filter(pk=pk).update(place_id=resolved)
+                    if model is EmployeeProfile:
+                        bump_version(f'employee:{pk}')
+                    changed += 1
+            self.stdout.write(f'Updated {changed} {model._meta.verbose_name_plural}.')
+        bump_version('jobs', 'facets')
+
+        self.stdout.write(self.style.SUCCESS('Successfully loaded places'))
@@ -0,0 +1,28 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from core.applications import process_batch
+import time
+
+class Command(BaseCommand):
+    help = 'Decides queued job applications in batches, filling each job with its first eligible applicant'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Applications decided per batch.')
+        parser.add_argument('--poll', type=float, default=1.0,
+                            help='Seconds to wait when the queue is empty.')
+        parser.add_argument('--stale-after', type=int, default=300,
+                            help='Seconds after which a claimed, undecided batch is requeued.')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+        stale_after = timedelta(seconds=options['stale_after'])
+        while True:
+            accepted, rejected = process_batch(options['batch_size'], stale_after)
+            if accepted or rejected:
+                self.stdout.write(f'Accepted {accepted}, rejected {rejected}')
+            elif options['once']:
+                return
+            else:
+                time.sleep(options['poll'])
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from core.models import StatCounter, TrendBucket
+from core.rollups import rebuild_rollups
+from core.stats import rebuild_counters
+from employees.models import EmployeeProfile
+from employers.models import EmployerProfile
+from jobs.models import Job
+
+class Command(BaseCommand):
+    help = 'Recomputes the dashboard counters and trend rollups from the job and profile tables'
+
+    def handle(self, *args, **options):
+        counters = rebuild_counters(StatCounter, Job, EmployeeProfile, EmployerProfile)
+        buckets = rebuild_rollups(TrendBucket, Job)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(counters)} counters and {buckets} trend buckets'))
@@ -0,0 +1,456 @@
+"""
+Vectorised skill matching.
+
+Every job's required skills and every employee's skills are packed into a
+fixed-width bitset (one bit per ``Skill`` id, 64 ids per ``uint64`` word), so a
+whole catalogue of jobs can be scored against an employee with a handful of
+NumPy operations instead of one ``required_skills.all()`` query per job.
+"""
+from functools import partial
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, Exists, ExpressionWrapper, F, IntegerField, OuterRef, Q, Value
+from django.db.models.functions import Least
+
+from core.caching import get_versions
+from core.places import place_index
+from core.scoring import SKILL_WEIGHT, EXPERIENCE_WEIGHT, score, top_k
+from employees.models import EmployeeProfile
+from jobs.models import Job, MatchScore
+
+
+class SkillMatrix:
+    """Skill bitsets and experience for a set of jobs or employees, one row each."""
+
+    def __init__(self, ids, bits, experience):
+        self.ids = ids
+        self.bits = bits
+        self.experience = experience
+
+    def __len__(self):
+        return len(self.ids)
+
+    def index_of(self, ids):
+        """Row positions of ``ids`` (which must all be present in the matrix)."""
+        order = np.argsort(self.ids)
+        return order[np.searchsorted(self.ids, ids, sorter=order)]
+
+    @classmethod
+    def build(cls, rows, links):
+        """
+        Build a matrix from ``(pk, experience)`` rows and ``(pk, skill_id)``
+        links. Links pointing at rows that are not present are ignored.
+        """
+        rows = list(rows)
+        ids = np.array([pk for pk, _ in rows], dtype=np.int64)
+        experience = np.array([exp for _, exp in rows], dtype=np.int64)
+        links = np.array(list(links), dtype=np.int64).reshape(-1, 2)
+        links = links[np.isin(links[:, 0], ids)]
+
+        owners, skills = links[:, 0], links[:, 1]
+        n_words = int(skills.max()) // 64 + 1 if len(skills) else 1
+        bits = np.zeros((len(ids), n_words), dtype=np.uint64)
+        if len(ids) and len(skills):
+            order = np.argsort(ids)
+            positions = order[np.searchsorted(ids, owners, sorter=order)]
+            masks = np.left_shift(np.uint64(1), (skills & 63).astype(np.uint64))
+            np.bitwise_or.at(bits, (positions, skills >> 6), masks)
+        return cls(ids, bits, experience)
+
+    @classmethod
+    def for_jobs(cls, jobs):
+        links = Job.required_skills.through.objects.filter(job__in=jobs)
+        return cls.build(
+            jobs.values_list('pk', 'experience_required'),
+            links.values_list('job_id', 'skill_id'),
+        )
+
+    @classmethod
+    def for_employees(cls, employees):
+        links = EmployeeProfile.skills.through.objects.filter(employeeprofile__in=employees)
+        return cls.build(
+            employees.values_list('pk', 'experience_years'),
+            links.values_list('employeeprofile_id', 'skill_id'),
+        )
+
+
+def cross_scores(employees, jobs):
+    """
+    Yield ``(employee_ids, job_ids, skill_match, exp_match, total)`` blocks
+    covering every employee/job pair, vectorised along the larger side.
+    """
+    if len(employees) <= len(jobs):
+        for i in range(len(employees)):
+            skill_match, exp_match, total = score(
+                employees.bits[i], employees.experience[i], jobs.bits, jobs.experience,
+            )
+            yield np.full(len(jobs), employees.ids[i]), jobs.ids, skill_match, exp_match, total
+    else:
+        for j in range(len(jobs)):
+            skill_match, exp_match, total = score(
+                employees.bits, employees.experience, jobs.bits[j], jobs.experience[j],
+            )
+            yield employees.ids, np.full(len(employees), jobs.ids[j]), skill_match, exp_match, total
+
+
+def replace_scores(blocks, stale, batch_size=1000):
+    """
+    Replace the ``stale`` MatchScore rows with the pairs in ``blocks`` (as
+    yielded by :func:`cross_scores`), in one transaction. Rows are built and
+    inserted ``batch_size`` at a time as the blocks are consumed. Returns the
+    number of rows written.
+    """
+    written = 0
+    rows = []
+    with transaction.atomic():
+        stale.delete()
+        for employee_ids, job_ids, skill_match, exp_match, total in blocks:
+            for start in range(0, len(job_ids), batch_size):
+                end = start + batch_size
+                rows.extend(
+                    MatchScore(employee_id=e, job_id=j, score=t, skill_match=s, exp_match=x)
+                    for e, j, s, x, t in zip(
+                        employee_ids[start:end].tolist(), job_ids[start:end].tolist(),
+                        skill_match[start:end].tolist(), exp_match[start:end].tolist(), total[start:end].tolist(),
+                    )
+                )
+                if len(rows) >= batch_size:
+                    MatchScore.objects.bulk_create(rows)
+                    written += len(rows)
+                    rows = []
+        MatchScore.objects.bulk_create(rows)
+        written += len(rows)
+    return written
+
+
+def refresh_job_scores(jobs):
+    """Recompute the stored scores of ``jobs`` against every employee."""
+    blocks = cross_scores(
+        SkillMatrix.for_employees(EmployeeProfile.objects.all()), SkillMatrix.for_jobs(jobs),
+    )
+    replace_scores(blocks, MatchScore.objects.filter(job__in=jobs))
+
+
+def refresh_employee_scores(employees):
+    """Recompute the stored scores of ``employees`` against every open job, as ``compute_matches`` does."""
+    jobs = Job.objects.filter(filled_by__isnull=True)
+    blocks = cross_scores(SkillMatrix.for_employees(employees), SkillMatrix.for_jobs(jobs))
+    replace_scores(blocks, MatchScore.objects.filter(employee__in=employees, job__in=jobs.values('pk')))
+
+
+def refresh_scores_on_commit(jobs=(), employees=()):
+    """
+    Refresh the stored scores of ``jobs`` and ``employees`` (primary keys)
+    once the current transaction commits, or right away outside one.
+    Everything queued up to the commit is refreshed together, so the several
+    signals a single form save sends cost one refresh per side.
+    """
+    connection = transaction.get_connection()
+    pending = connection.__dict__.setdefault('_pending_score_refresh', {'jobs': set(), 'employees': set()})
+    pending['jobs'].update(jobs)
+    pending['employees'].update(employees)
+    # One callback per call: those of a rolled-back savepoint are dropped, and
+    # whichever runs first takes everything pending, leaving the rest no-ops.
+    transaction.on_commit(partial(_refresh_pending, pending))
+
+
+def _refresh_pending(pending):
+    jobs, employees = set(pending['jobs']), set(pending['employees'])
+    pending['jobs'].clear()
+    pending['employees'].clear()
+    if jobs:
+        refresh_job_scores(Job.objects.filter(pk__in=jobs))
+    if employees:
+        refresh_employee_scores(EmployeeProfile.objects.filter(pk__in=employees))
+
+
+def _annotate_match(job, total, skill_match, exp_match, employee_skills):
+    job.match_score = round(float(total), 1)
+    job.skill_match_percent = round(float(skill_match), 1)
+    job.exp_match_percent = round(float(exp_match), 1)
+    job.skill_gap = [s for s in job.required_skills.all() if s.pk not in employee_skills]
+    return job
+
+
+class RankedJobs:
+    """
+    Best-first matches for one employee as a lazily evaluated sequence.
+
+    Paginators (and templates) only ever slice it, so only the jobs on the
+    requested page are loaded and annotated for the matching template.
+    Subclasses provide ``count()`` and ``rank(start, stop)``, which returns
+    ``(job_id, total, skill_match, exp_match)`` tuples for that slice.
+    ``places`` (``{place_id: distance_km}``) restricts the ranking to jobs
+    near the employee, and fills in each job's ``distance_km``.
+    """
+
+    def __init__(self, employee, places=None):
+        self.employee = employee
+        self.places = places
+        self._employee_skills = None
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        return iter(self[0:len(self)])
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, _ = key.indices(len(self))
+            return self.fetch(start, max(start, stop))
+        return self.fetch(key, key + 1)[0]
+
+    @property
+    def employee_skills(self):
+        if self._employee_skills is None:
+            self._employee_skills = set(self.employee.skills.values_list('pk', flat=True))
+        return self._employee_skills
+
+    def fetch(self, start, stop):
+        ranked = self.rank(start, stop) if stop > start else []
+        by_id = Job.objects.select_related('employer').prefetch_related('required_skills').in_bulk(
+            [job_id for job_id, _, _, _ in ranked]
+        )
+        jobs = [
+            _annotate_match(by_id[job_id], total, skill_match, exp_match, self.employee_skills)
+            for job_id, total, skill_match, exp_match in ranked
+            if job_id in by_id
+        ]
+        for job in jobs:
+            distance = (self.places or {}).get(job.place_id)
+            job.distance_km = None if distance is None else round(distance)
+        return jobs
+
+
+class StoredJobMatches(RankedJobs):
+    """Open-job matches read from the MatchScore table."""
+
+    def __init__(self, employee, places=None):
+        super().__init__(employee, places)
+        self.scores = (
+            MatchScore.objects.filter(employee=employee, job__filled_by__isnull=True)
+            .order_by('-score', 'job_id')
+        )
+        if places is not None:
+            self.scores = self.scores.filter(
+                Q(job__place__in=list(places)) | Q(job__place__isnull=True)
+            )
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = self.scores.count()
+        return self._count
+
+    def rank(self, start, stop):
+        return list(
+            self.scores[start:stop].values_list('job_id', 'score', 'skill_match', 'exp_match')
+        )
+
+
+class ScoredJobMatches(RankedJobs):
+    """Matches scored in memory with the bitset engine."""
+
+    def __init__(self, employee, jobs, places=None):
+        super().__init__(employee, places)
+        self.catalogue = SkillMatrix.for_jobs(jobs)
+        profile = SkillMatrix.for_employees(EmployeeProfile.objects.filter(pk=employee.pk))
+        if len(profile):
+            self.skill_match, self.exp_match, total = score(
+                profile.bits[0], profile.experience[0],
+                self.catalogue.bits, self.catalogue.experience,
+            )
+            self.total = np.round(total, 1)
+        else:
+            self.catalogue = SkillMatrix.build([], [])
+
+    def count(self):
+        return len(self.catalogue)
+
+    def rank(self, start, stop):
+        positions = top_k(self.total, stop, self.catalogue.ids)[start:]
+        return list(zip(
+            self.catalogue.ids[positions].tolist(),
+            self.total[positions].tolist(),
+            self.skill_match[positions].tolist(),
+            self.exp_match[positions].tolist(),
+        ))
+
+
+class CachedJobMatches(RankedJobs):
+    """
+    Caches the best ``size`` entries (and the total count) of the ranking
+    built by ``factory``. The key embeds the employee's profile version and
+    the job catalogue version, so any relevant save makes old entries
+    unreachable. Slices beyond the cached head fall through to a freshly
+    built ranking.
+    """
+
+    def __init__(self, employee, factory, size, radius_km=None, places=None):
+        super().__init__(employee, places)
+        self.factory = factory
+        self.ranked = None
+        cache = caches[settings.MATCH_CACHE_ALIAS]
+        key = match_cache_key(employee.pk, radius_km)
+        self.entry = cache.get(key)
+        if self.entry is None:
+            self.ranked = factory()
+            self.entry = {'count': self.ranked.count(), 'head': self.ranked.rank(0, size)}
+            cache.set(key, self.entry, timeout=settings.MATCH_CACHE_TIMEOUT)
+
+    def count(self):
+        return self.entry['count']
+
+    def rank(self, start, stop):
+        head = self.entry['head']
+        if stop <= len(head) or len(head) == self.count():
+            return head[start:stop]
+        if self.ranked is None:
+            self.ranked = self.factory()
+        return self.ranked.rank(start, stop)
+
+
+def match_cache_key(employee_id, radius_km=None):
+    profile_version, catalogue_version = get_versions(f'employee:{employee_id}', 'jobs')
+    return f'matches:{employee_id}:{radius_km}:{profile_version}:{catalogue_version}'
+
+
+def nearby_places(employee, radius_km):
+    """
+    ``{place_id: distance_km}`` for places within ``radius_km`` of the
+    employee, or ``None`` (no restriction) when there is no radius or the
+    employee's location is not a known place.
+    """
+    if radius_km is None or employee.place_id is None:
+        return None
+    return place_index().nearby(employee.place_id, radius_km)
+
+
+def stored_matches(employee, places=None):
+    """
+    ``employee``'s open jobs from the MatchScore table, best match first.
+    Falls back to scoring in memory when nothing has been stored for the
+    employee yet.
+    """
+    if MatchScore.objects.filter(employee=employee).exists():
+        return StoredJobMatches(employee, places)
+    return match_jobs(employee, places=places)
+
+
+def cached_matches(employee, radius_km=None):
+    """
+    :func:`stored_matches` within ``radius_km`` of the employee, behind the
+    per-employee match cache.
+    """
+    places = nearby_places(employee, radius_km)
+    return CachedJobMatches(
+        employee,
+        lambda: stored_matches(employee, places),
+        settings.MATCH_CACHE_RESULTS,
+        radius_km=radius_km if places is not None else None,
+        places=places,
+    )
+
+
+def match_jobs(employee, jobs=None, places=None):
+    """
+    Score ``jobs`` (every open job by default) for ``employee``, best match
+    first. With ``places``, jobs known to be elsewhere are dropped before
+    scoring.
+
+    Each job taken from the result carries ``match_score``,
+    ``skill_match_percent``, ``exp_match_percent`` and ``skill_gap`` for the
+    matching template.
+    """
+    if jobs is None:
+        jobs = Job.objects.filter(filled_by__isnull=True)
+    if places is not None:
+        jobs = jobs.filter(Q(place__in=list(places)) | Q(place__isnull=True))
+    return ScoredJobMatches(employee, jobs, places)
+
+
+def placement_scores():
+    """
+    Match scores of every filled job against the employee who took it, read
+    from the MatchScore table. Placements without a stored row are scored in
+    memory from bulk fetches of the link tables. The number of queries does
+    not depend on the number of placements.
+    """
+    stored = np.fromiter(
+        MatchScore.objects.filter(job__filled_by=F('employee')).values_list('score', flat=True),
+        dtype=np.float64,
+    )
+    unscored = MatchScore.objects.filter(job=OuterRef('pk'), employee=OuterRef('filled_by'))
+    missing = Job.objects.filter(filled_by__isnull=False).exclude(Exists(unscored))
+    taken_by = dict(missing.values_list('pk', 'filled_by_id'))
+    if not taken_by:
+        return stored
+
+    # Subqueries rather than id lists, so no query grows with the placements.
+    jobs = SkillMatrix.for_jobs(missing)
+    employees = SkillMatrix.for_employees(
+        EmployeeProfile.objects.filter(pk__in=missing.values('filled_by'))
+    )
+    taker_ids = np.array([taken_by[int(pk)] for pk in jobs.ids], dtype=np.int64)
+    rows = employees.index_of(taker_ids)
+    _, _, total = score(
+        employees.bits[rows], employees.experience[rows], jobs.bits, jobs.experience,
+    )
+    return np.concatenate([stored, total])
+
+
+def rank_candidates(job, limit=10):
+    """
+    The ``limit`` best-matching employees for ``job``, best match first, ties
+    broken by ascending id.
+
+    The database does the ranking. When the job requires skills, only
+    employees sharing at least one of them are considered: they are found
+    through the skill column of the employee/skill link table and their shared
+    skills counted per employee. When it requires none everybody has a full
+    skill match. Each returned profile carries ``match_score``,
+    ``skill_match_percent`` and ``exp_match_percent``.
+    """
+    required = list(job.required_skills.values_list('pk', flat=True))
+    experience_required = job.experience_required
+    employees = EmployeeProfile.objects.all()
+    if required:
+        employees = employees.filter(skills__in=required).annotate(matched=Count('skills'))
+    else:
+        employees = employees.annotate(matched=Value(1))
+    if experience_required > 0:
+        counted_experience = Least('experience_years', Value(experience_required))
+    else:
+        counted_experience = Value(1)
+    # The total score times len(required) * experience_required, in whole
+    # numbers so that equal scores tie exactly and fall back to the id.
+    rank = ExpressionWrapper(
+        round(SKILL_WEIGHT * 100) * max(experience_required, 1) * F('matched')
+        + round(EXPERIENCE_WEIGHT * 100) * max(len(required), 1) * counted_experience,
+        output_field=IntegerField(),
+    )
+    ranked = list(
+        employees.annotate(rank=rank).order_by('-rank', 'pk')
+        .values_list('pk', 'matched', 'experience_years')[:limit]
+    )
+
+    by_id = EmployeeProfile.objects.prefetch_related('skills').in_bulk([pk for pk, _, _ in ranked])
+    candidates = []
+    for pk, matched, experience_years in ranked:
+        skill_match = (matched / len(required)) * 100 if required else 100
+        if experience_years >= experience_required:
+            exp_match = 100
+        elif experience_required > 0:
+            exp_match = (experience_years / experience_required) * 100
+        else:
+            exp_match = 100
+        employee = by_id[pk]
+        employee.match_score = round((skill_match * SKILL_WEIGHT) + (exp_match * EXPERIENCE_WEIGHT), 1)
+        employee.skill_match_percent = round(float(skill_match), 1)
+        employee.exp_match_percent = round(float(exp_match), 1)
+        candidates.append(employee)
+    return candidates
@@ -0,0 +1,37 @@
+# Generated by Django 4.1.13 on 2026-10-18 08:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def load_places(apps, schema_editor):
+    from core.gazetteer import load_gazetteer
+    load_gazetteer(apps.get_model('core', 'Place'), apps.get_model('core', 'PlaceName'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Place',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PlaceName',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('place', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='names', to='core.place')),
+            ],
+        ),
+        migrations.RunPython(load_places, migrations.RunPython.noop),
+    ]
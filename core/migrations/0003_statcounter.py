@@ -0,0 +1,43 @@
+# Generated by Django 4.1.13 on 2026-10-18 08:24
+
+from django.db import migrations, models
+
+
+def build_counters(apps, schema_editor):
+    # A copy of core.stats.rebuild_counters as it stood when this was written.
+    StatCounter = apps.get_model('core', 'StatCounter')
+    Job = apps.get_model('jobs', 'Job')
+    counters = {
+        'employees': apps.get_model('employees', 'EmployeeProfile').objects.count(),
+        'employers': apps.get_model('employers', 'EmployerProfile').objects.count(),
+        'jobs': Job.objects.count(),
+        'jobs_taken': Job.objects.filter(filled_by__isnull=False).count(),
+    }
+    demand = (
+        Job.required_skills.through.objects.values('skill_id')
+        .annotate(jobs=models.Count('job_id')).order_by().values_list('skill_id', 'jobs')
+    )
+    counters.update((f'skill:{skill_id}', jobs) for skill_id, jobs in demand)
+    StatCounter.objects.bulk_create([StatCounter(key=key, value=value) for key, value in counters.items()])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_place_placename'),
+        ('employees', '0002_employeeprofile_place'),
+        ('employers', '0001_initial'),
+        ('jobs', '0004_job_place'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(build_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 4.1.13 on 2026-10-18 08:30
+
+from collections import Counter, defaultdict
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db import migrations, models
+
+
+def truncate(day, granularity):
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def build_rollups(apps, schema_editor):
+    # A copy of core.rollups.rebuild_rollups as it stood when this was written.
+    TrendBucket = apps.get_model('core', 'TrendBucket')
+    Job = apps.get_model('jobs', 'Job')
+    skills = defaultdict(list)
+    for job_id, skill_id in Job.required_skills.through.objects.values_list('job_id', 'skill_id').iterator():
+        skills[job_id].append(skill_id)
+
+    counts = Counter()
+    jobs = Job.objects.values_list('pk', 'created_at', 'filled_at', 'filled_by_id', 'place_id')
+    for pk, created_at, filled_at, filled_by_id, place_id in jobs.iterator():
+        dimensions = [('', 0)]
+        if place_id is not None:
+            dimensions.append(('place', place_id))
+        dimensions.extend(('skill', skill_id) for skill_id in skills[pk])
+        for metric, moment in (('posted', created_at), ('filled', filled_at if filled_by_id else None)):
+            if moment is None:
+                continue
+            day = moment.astimezone(dt_timezone.utc).date()
+            for granularity in ('day', 'week', 'month'):
+                period = truncate(day, granularity)
+                counts.update((metric, granularity, dimension, key, period) for dimension, key in dimensions)
+
+    TrendBucket.objects.bulk_create(
+        [
+            TrendBucket(metric=metric, granularity=granularity, dimension=dimension, key=key, period=period, count=count)
+            for (metric, granularity, dimension, key, period), count in counts.items()
+        ],
+        batch_size=1000,
+    )
+    # Monthly filled counts now live in the rollups.
+    apps.get_model('core', 'StatCounter').objects.filter(key__startswith='filled:').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_statcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=10)),
+                ('granularity', models.CharField(max_length=10)),
+                ('dimension', models.CharField(blank=True, max_length=10)),
+                ('key', models.BigIntegerField(default=0)),
+                ('period', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('metric', 'granularity', 'dimension', 'key', 'period')},
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
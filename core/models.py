@@ -5,3 +5,44 @@ class Skill(models.Model):
 
     def __str__(self):
         return self.name
+
+class Place(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+
+    def __str__(self):
+        return self.name
+
+class PlaceName(models.Model):
+    # Normalised spelling (canonical name or alias) -> canonical place.
+    key = models.CharField(max_length=100, unique=True)
+    place = models.ForeignKey(Place, on_delete=models.CASCADE, related_name='names')
+
+    def __str__(self):
+        return self.key
+
+class StatCounter(models.Model):
+    # Running dashboard total, kept current by signals (see core.stats).
+    key = models.CharField(max_length=100, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.key} = {self.value}'
+
+class TrendBucket(models.Model):
+    # Jobs posted/filled in one day, week or month; overall (dimension '')
+    # or for one skill or place (see core.rollups).
+    metric = models.CharField(max_length=10)
+    granularity = models.CharField(max_length=10)
+    dimension = models.CharField(max_length=10, blank=True)
+    key = models.BigIntegerField(default=0)
+    period = models.DateField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        # Field order matches the range scans: one series, ordered by period.
+        unique_together = ('metric', 'granularity', 'dimension', 'key', 'period')
+
+    def __str__(self):
+        return f'{self.metric}/{self.granularity}/{self.dimension}:{self.key} {self.period} = {self.count}'
@@ -0,0 +1,144 @@
+"""
+Keyset (cursor) pagination for list views.
+
+Offset pagination gets slower the deeper the page, since the database still
+walks every skipped row, and needs a COUNT over the whole result. Here a page
+is fetched as "the next N rows after this sort key", so with an index on the
+keyset fields every page costs the same. Cursors are opaque, URL-safe
+encodings of the sort key of a page's first or last row.
+"""
+import base64
+import binascii
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+def encode_cursor(values):
+    payload = json.dumps([str(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, fields):
+    """The keyset values in ``cursor`` as Python values of ``fields``, or None if invalid."""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(payload)
+        if not isinstance(values, list) or len(values) != len(fields):
+            return None
+        return [field.to_python(value) for field, value in zip(fields, values)]
+    except (binascii.Error, ValueError, ValidationError):
+        return None
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def keyset_filter(keyset, values, forward=True):
+    """
+    ``Q`` selecting the rows after (or, with ``forward=False``, before) the
+    row whose ``keyset`` values are ``values``.
+    """
+    clauses = []
+    for i, (ordering, value) in enumerate(zip(keyset, values)):
+        name = ordering.lstrip('-')
+        descending = ordering.startswith('-')
+        lookup = 'lt' if descending == forward else 'gt'
+        equal = {other.lstrip('-'): other_value for other, other_value in zip(keyset[:i], values[:i])}
+        clauses.append(Q(**equal, **{f'{name}__{lookup}': value}))
+    return reduce(or_, clauses)
+
+
+def paginate_keyset(queryset, keyset, size, after=None, before=None):
+    """
+    One page of ``queryset`` ordered by ``keyset``, whose last field must be
+    unique. ``after``/``before`` are cursors from a previous page; invalid
+    cursors give the first page.
+    """
+    opts = queryset.model._meta
+    names = [ordering.lstrip('-') for ordering in keyset]
+    fields = [opts.pk if name == 'pk' else opts.get_field(name) for name in names]
+
+    def cursor(obj):
+        return encode_cursor([getattr(obj, name) for name in names])
+
+    values = decode_cursor(before, fields) if before else None
+    if values is not None:
+        # Walk backwards from the cursor, then restore the page's order.
+        reverse = [name if ordering.startswith('-') else f'-{name}' for ordering, name in zip(keyset, names)]
+        rows = list(queryset.filter(keyset_filter(keyset, values, forward=False)).order_by(*reverse)[:size + 1])
+        more = len(rows) > size
+        rows = rows[:size][::-1]
+        return KeysetPage(
+            rows,
+            next_cursor=cursor(rows[-1]) if rows else None,
+            previous_cursor=cursor(rows[0]) if more else None,
+        )
+
+    values = decode_cursor(after, fields) if after else None
+    if values is not None:
+        queryset = queryset.filter(keyset_filter(keyset, values))
+    rows = list(queryset.order_by(*keyset)[:size + 1])
+    more = len(rows) > size
+    rows = rows[:size]
+    return KeysetPage(
+        rows,
+        next_cursor=cursor(rows[-1]) if more else None,
+        previous_cursor=cursor(rows[0]) if values is not None and rows else None,
+    )
+
+
+class KeysetPaginationMixin:
+    """
+    ListView mixin paging ``get_queryset()`` by ``keyset`` with ``?after=`` and
+    ``?before=`` cursors and an optional ``?limit=``. The page goes into the
+    context as ``keyset_page``, with ``filter_query`` for building its links.
+    """
+    keyset = ('-pk',)
+    page_size = 20
+    max_page_size = 100
+
+    def get_keyset(self):
+        return self.keyset
+
+    def get_page_size(self):
+        try:
+            limit = int(self.request.GET.get('limit', self.page_size))
+        except ValueError:
+            limit = self.page_size
+        return max(1, min(limit, self.max_page_size))
+
+    def get_context_data(self, **kwargs):
+        page = paginate_keyset(
+            self.object_list, self.get_keyset(), self.get_page_size(),
+            after=self.request.GET.get('after'), before=self.request.GET.get('before'),
+        )
+        kwargs['object_list'] = page.object_list
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.copy()
+        query.pop('after', None)
+        query.pop('before', None)
+        context['keyset_page'] = page
+        context['filter_query'] = query.urlencode()
+        return context
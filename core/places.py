@@ -0,0 +1,99 @@
+"""
+Place resolution and radius queries over the gazetteer.
+
+Places are few and rarely change, so each process keeps them in memory: a
+dictionary of lookup keys for resolving free-text locations, and a uniform
+latitude/longitude grid so a radius query only measures the places in cells
+overlapping the search circle.
+"""
+import math
+from collections import defaultdict
+
+from core.caching import VersionedIndex
+from core.gazetteer import candidate_keys
+from core.models import Place, PlaceName
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points, in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex:
+    """Points bucketed into ``cell_degrees``-sized latitude/longitude cells."""
+
+    def __init__(self, points, cell_degrees=1.0):
+        self.cell_degrees = cell_degrees
+        self.points = {}
+        self.cells = defaultdict(list)
+        for pk, latitude, longitude in points:
+            self.points[pk] = (latitude, longitude)
+            self.cells[self._cell(latitude, longitude)].append(pk)
+
+    def _cell(self, latitude, longitude):
+        return math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees)
+
+    def within(self, latitude, longitude, radius_km):
+        """``{pk: distance_km}`` for every point within ``radius_km``."""
+        d_lat = radius_km / KM_PER_DEGREE
+        d_lon = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+        row0, col0 = self._cell(latitude - d_lat, longitude - d_lon)
+        row1, col1 = self._cell(latitude + d_lat, longitude + d_lon)
+        # A circle crossing the antimeridian continues on the other side.
+        spans = [(col0, col1)]
+        if longitude - d_lon < -180:
+            spans.append((self._cell(0, longitude - d_lon + 360)[1], self._cell(0, 180)[1]))
+        if longitude + d_lon >= 180:
+            spans.append((self._cell(0, -180)[1], self._cell(0, longitude + d_lon - 360)[1]))
+        columns = sum(hi - lo + 1 for lo, hi in spans)
+        if d_lon >= 180 or (row1 - row0 + 1) * columns > len(self.cells):
+            cells = self.cells.values()
+        else:
+            cells = [
+                self.cells.get((row, col), ())
+                for row in range(row0, row1 + 1)
+                for lo, hi in spans
+                for col in range(lo, hi + 1)
+            ]
+
+        found = {}
+        for bucket in cells:
+            for pk in bucket:
+                distance = haversine_km(latitude, longitude, *self.points[pk])
+                if distance <= radius_km:
+                    found[pk] = distance
+        return found
+
+
+class PlaceIndex:
+    def __init__(self):
+        self.keys = dict(PlaceName.objects.values_list('key', 'place_id'))
+        self.grid = GridIndex(Place.objects.values_list('pk', 'latitude', 'longitude'))
+
+    def resolve(self, location):
+        """Primary key of the place ``location`` refers to, or ``None``."""
+        for key in candidate_keys(location):
+            if key in self.keys:
+                return self.keys[key]
+        return None
+
+    def nearby(self, place_id, radius_km):
+        """``{place_id: distance_km}`` for places within ``radius_km`` of ``place_id``."""
+        if place_id not in self.grid.points:
+            return {}
+        return self.grid.within(*self.grid.points[place_id], radius_km)
+
+
+_index = VersionedIndex('places', PlaceIndex)
+
+
+def place_index():
+    """The process-wide :class:`PlaceIndex`, rebuilt when the places change."""
+    return _index.get()
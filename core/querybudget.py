@@ -0,0 +1,127 @@
+"""
+Per-request query accounting.
+
+``QueryRecorder`` wraps the database connections to count queries, time them
+and group identical SQL, so a template loop issuing the same query per row
+shows up as one statement repeated N times. ``QueryBudgetMiddleware``
+reports this on every response (``Server-Timing`` header and a log record on
+the ``core.queries`` logger) and checks it against ``QUERY_BUDGETS``, keyed
+by URL name. With ``QUERY_BUDGET_STRICT`` (set by the test runner) a request over
+budget raises ``QueryBudgetExceeded`` instead of just logging a warning.
+"""
+import logging
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('core.queries')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.queries = []  # (sql, seconds)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+
+    @contextmanager
+    def recording(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def db_ms(self):
+        return sum(seconds for _, seconds in self.queries) * 1000
+
+    def repeated(self, limit=5):
+        """The most repeated statements, as ``(sql, count, total_ms)``."""
+        groups = defaultdict(list)
+        for sql, seconds in self.queries:
+            groups[sql].append(seconds)
+        repeated = [(sql, len(times), sum(times) * 1000) for sql, times in groups.items() if len(times) > 1]
+        repeated.sort(key=lambda row: (-row[1], -row[2]))
+        return repeated[:limit]
+
+    @property
+    def duplicates(self):
+        """Queries that repeat an earlier statement (same SQL, any parameters)."""
+        return self.count - len({sql for sql, _ in self.queries})
+
+    def report(self):
+        return {
+            'queries': self.count,
+            'db_ms': round(self.db_ms, 2),
+            'duplicates': self.duplicates,
+            'repeated': [
+                {'sql': sql, 'count': count, 'ms': round(ms, 2)} for sql, count, ms in self.repeated()
+            ],
+        }
+
+
+def budget_violations(url_name, recorder, budget=None):
+    """Ways ``recorder`` exceeds the budget of ``url_name`` (or ``budget``), if any."""
+    budget = budget if budget is not None else settings.QUERY_BUDGETS.get(url_name)
+    if not budget:
+        return []
+    violations = []
+    if 'queries' in budget and recorder.count > budget['queries']:
+        violations.append(f"{recorder.count} queries (budget {budget['queries']})")
+    if 'db_ms' in budget and recorder.db_ms > budget['db_ms']:
+        violations.append(f"{recorder.db_ms:.1f} ms in the database (budget {budget['db_ms']} ms)")
+    return violations
+
+
+def describe(url_name, recorder, violations):
+    lines = [f"{url_name or 'request'} over query budget: {'; '.join(violations)}."]
+    for sql, count, ms in recorder.repeated():
+        lines.append(f'  {count}x ({ms:.1f} ms) {sql}')
+    return '\n'.join(lines)
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # Streaming bodies are produced after this returns; their queries are not counted.
+        started = time.perf_counter()
+        with QueryRecorder().recording() as recorder:
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - started) * 1000
+
+        match = request.resolver_match
+        url_name = match.url_name if match else None
+        violations = budget_violations(url_name, recorder)
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={recorder.db_ms:.2f};desc="{recorder.count} queries, {recorder.duplicates} duplicated"',
+            f'total;dur={total_ms:.2f}',
+        ])
+        report = recorder.report()
+        if violations:
+            logger.warning(describe(url_name, recorder, violations),
+                           extra={'view': url_name, 'path': request.path, **report, 'violations': violations})
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(describe(url_name, recorder, violations))
+        else:
+            logger.info('%s: %d queries, %.1f ms in the database', url_name or request.path,
+                        recorder.count, recorder.db_ms,
+                        extra={'view': url_name, 'path': request.path, **report})
+        return response
@@ -0,0 +1,99 @@
+"""
+Cached search results for the job and employee lists.
+
+The ids matching a filter set are cached under a normalized form of its
+parameters: values are case-folded with surrounding and repeated whitespace
+removed (the searches are case-insensitive), and parameter order does not
+matter. Keys embed the versions of the rows being searched and of the search
+vocabularies, so any change to them invalidates the cached lists.
+
+Results with more than ``RESULT_CACHE_MAX_IDS`` ids are not cached; only
+the fact that they are too large is, and the view filters with the search
+as a subquery instead.
+
+Lookups are counted per scope in the cache, for the ``metrics`` endpoint.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core.caching import get_versions
+
+# Versions each scope's results depend on.
+SCOPES = {
+    'jobs': ('jobs', 'search:skill', 'search:title', 'search:location'),
+    'employees': ('employees', 'search:skill', 'search:name', 'search:location'),
+}
+OUTCOMES = ('hit', 'miss', 'oversize')
+# Cached in place of the ids of a result that is too large to cache.
+OVERSIZE = 'oversize'
+
+
+def normalize_value(value):
+    return ' '.join(value.split()).casefold()
+
+
+def normalize_params(params, fields):
+    """``((field, value), ...)`` for the non-empty ``fields`` of ``params``, in a fixed order."""
+    normalized = ((field, normalize_value(params.get(field, ''))) for field in sorted(fields))
+    return tuple((field, value) for field, value in normalized if value)
+
+
+def result_key(scope, normalized):
+    versions = ':'.join(str(version) for version in get_versions(*SCOPES[scope]))
+    digest = hashlib.sha1(repr(normalized).encode('utf-8')).hexdigest()
+    return f'results:{scope}:{versions}:{digest}'
+
+
+def _counter_key(scope, outcome):
+    return f'results:{outcome}:{scope}'
+
+
+def _count(scope, outcome):
+    cache = caches[settings.RESULT_CACHE_ALIAS]
+    key = _counter_key(scope, outcome)
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, timeout=None)
+
+
+def counters():
+    """``{(scope, outcome): count}`` for every scope and outcome."""
+    cache = caches[settings.RESULT_CACHE_ALIAS]
+    keys = {_counter_key(scope, outcome): (scope, outcome) for scope in SCOPES for outcome in OUTCOMES}
+    found = cache.get_many(keys)
+    return {label: found.get(key, 0) for key, label in keys.items()}
+
+
+def result_ids(scope, params, fields, filter_queryset):
+    """
+    Primary keys matching the ``fields`` of ``params``, or None when none of
+    them are set. ``filter_queryset(normalized_params)`` returns the filtered
+    queryset and is only evaluated on a miss. Results over
+    ``RESULT_CACHE_MAX_IDS`` are returned as the lazy ``values('pk')`` of
+    that queryset, to be used as a subquery, and counted as ``oversize``.
+    """
+    normalized = normalize_params(params, fields)
+    if not normalized:
+        return None
+    cache = caches[settings.RESULT_CACHE_ALIAS]
+    key = result_key(scope, normalized)
+    ids = cache.get(key)
+    if ids == OVERSIZE:
+        _count(scope, 'oversize')
+        return filter_queryset(dict(normalized)).values('pk')
+    if ids is not None:
+        _count(scope, 'hit')
+        return ids
+    _count(scope, 'miss')
+    queryset = filter_queryset(dict(normalized))
+    ids = list(queryset.values_list('pk', flat=True)[:settings.RESULT_CACHE_MAX_IDS + 1])
+    if len(ids) > settings.RESULT_CACHE_MAX_IDS:
+        cache.set(key, OVERSIZE, timeout=settings.RESULT_CACHE_TIMEOUT)
+        _count(scope, 'oversize')
+        return queryset.values('pk')
+    cache.set(key, ids, timeout=settings.RESULT_CACHE_TIMEOUT)
+    return ids
@@ -0,0 +1,203 @@
+"""
+Pre-aggregated hiring trends.
+
+Jobs posted (by ``created_at``) and filled (by ``filled_at``) are counted in
+day, week (starting Monday) and month buckets, in UTC, both overall and per
+skill and per place. Signal handlers in ``core.signals`` keep the buckets
+current, so a trend over any range reads one row per bucket however many
+jobs it covers. ``rebuild_rollups`` recomputes them from the jobs table.
+"""
+from collections import Counter, defaultdict, namedtuple
+from datetime import date, timedelta, timezone as dt_timezone
+from functools import reduce
+from operator import or_
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from core.models import TrendBucket
+
+POSTED = 'posted'
+FILLED = 'filled'
+DAY = 'day'
+WEEK = 'week'
+MONTH = 'month'
+GRANULARITIES = (DAY, WEEK, MONTH)
+SKILL = 'skill'
+PLACE = 'place'
+
+# Longer ranges are drawn at a coarser granularity.
+MAX_BUCKETS = 400
+DEFAULT_DAYS = 180
+
+BucketKey = namedtuple('BucketKey', 'metric granularity dimension key period')
+TrendRange = namedtuple('TrendRange', 'start end granularity')
+
+
+def truncate(day, granularity):
+    if granularity == WEEK:
+        return day - timedelta(days=day.weekday())
+    if granularity == MONTH:
+        return day.replace(day=1)
+    return day
+
+
+def next_period(period, granularity):
+    if granularity == DAY:
+        return period + timedelta(days=1)
+    if granularity == WEEK:
+        return period + timedelta(days=7)
+    return (period.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def periods(start, end, granularity):
+    """Every bucket start from the one holding ``start`` to the one holding ``end``."""
+    period, last = truncate(start, granularity), truncate(end, granularity)
+    result = []
+    while period <= last:
+        result.append(period)
+        period = next_period(period, granularity)
+    return result
+
+
+def bucket_count(start, end, granularity):
+    if granularity == DAY:
+        return (end - start).days + 1
+    if granularity == WEEK:
+        return (truncate(end, WEEK) - truncate(start, WEEK)).days // 7 + 1
+    return (end.year - start.year) * 12 + end.month - start.month + 1
+
+
+def utc_date(moment):
+    return moment.astimezone(dt_timezone.utc).date()
+
+
+def bucket_keys(metric, moment, dimensions):
+    """Buckets of every granularity that ``(dimension, key)`` pairs count towards at ``moment``."""
+    if moment is None:
+        return []
+    day = utc_date(moment)
+    return [
+        BucketKey(metric, granularity, dimension, key, truncate(day, granularity))
+        for granularity in GRANULARITIES
+        for dimension, key in dimensions
+    ]
+
+
+def job_keys(created_at, filled_at, place_id, skill_ids=()):
+    """
+    Posted and (when ``filled_at`` is given) filled buckets of one job: the
+    overall total, its place and each of its skills.
+    """
+    dimensions = [('', 0)]
+    if place_id is not None:
+        dimensions.append((PLACE, place_id))
+    dimensions.extend((SKILL, skill_id) for skill_id in skill_ids)
+    return bucket_keys(POSTED, created_at, dimensions) + bucket_keys(FILLED, filled_at, dimensions)
+
+
+def apply_deltas(deltas):
+    """Add ``{BucketKey: delta}`` to the buckets, creating missing rows."""
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    try:
+        with transaction.atomic():
+            _apply_deltas(deltas)
+    except IntegrityError:
+        # A concurrent writer created one of the new buckets first.
+        _apply_deltas(deltas)
+
+
+def _apply_deltas(deltas):
+    match = reduce(or_, (Q(**key._asdict()) for key in deltas))
+    existing = {
+        BucketKey(*row[1:]): row[0]
+        for row in TrendBucket.objects.filter(match).values_list('pk', *BucketKey._fields)
+    }
+    TrendBucket.objects.bulk_create([
+        TrendBucket(count=delta, **key._asdict()) for key, delta in deltas.items() if key not in existing
+    ])
+    by_delta = defaultdict(list)
+    for key, pk in existing.items():
+        by_delta[deltas[key]].append(pk)
+    for delta, pks in by_delta.items():
+        TrendBucket.objects.filter(pk__in=pks).update(count=F('count') + delta)
+
+
+def series(metric, trend, dimension='', key=0):
+    """``(periods, counts)`` of one series over ``trend``, zero-filled."""
+    buckets = periods(trend.start, trend.end, trend.granularity)
+    counts = dict(
+        TrendBucket.objects.filter(
+            metric=metric, granularity=trend.granularity, dimension=dimension, key=key,
+            period__range=(buckets[0], buckets[-1]),
+        ).values_list('period', 'count')
+    )
+    return buckets, [counts.get(period, 0) for period in buckets]
+
+
+def breakdown(metric, trend, dimension, limit=10):
+    """``[(key, total), ...]`` of the top skills or places over ``trend``."""
+    buckets = periods(trend.start, trend.end, trend.granularity)
+    return list(
+        TrendBucket.objects.filter(
+            metric=metric, granularity=trend.granularity, dimension=dimension,
+            period__range=(buckets[0], buckets[-1]),
+        ).values('key').annotate(total=Sum('count')).filter(total__gt=0)
+        .order_by('-total', 'key').values_list('key', 'total')[:limit]
+    )
+
+
+def parse_trend_range(params, today=None):
+    """
+    ``TrendRange`` from ``from``/``to`` ISO dates and ``granularity`` in
+    ``params``. Missing or invalid values fall back to the last
+    ``DEFAULT_DAYS`` days by month, and a granularity that would give more
+    than ``MAX_BUCKETS`` buckets is coarsened.
+    """
+    today = today or utc_date(timezone.now())
+
+    def parse(name, default):
+        try:
+            return date.fromisoformat(params.get(name, ''))
+        except ValueError:
+            return default
+
+    end = parse('to', today)
+    start = parse('from', end - timedelta(days=DEFAULT_DAYS))
+    if start > end:
+        start, end = end - timedelta(days=DEFAULT_DAYS), end
+    granularity = params.get('granularity')
+    if granularity not in GRANULARITIES:
+        granularity = MONTH
+    for coarser in GRANULARITIES[GRANULARITIES.index(granularity):]:
+        granularity = coarser
+        if bucket_count(start, end, granularity) <= MAX_BUCKETS:
+            break
+    else:
+        # Even by month the range is too long: keep its most recent months.
+        month = end.year * 12 + end.month - MAX_BUCKETS
+        start = date(month // 12, month % 12 + 1, 1)
+    return TrendRange(start, end, granularity)
+
+
+def rebuild_rollups(TrendBucket, Job):
+    """Recompute every bucket from the jobs table."""
+    skills = defaultdict(list)
+    for job_id, skill_id in Job.required_skills.through.objects.values_list('job_id', 'skill_id').iterator():
+        skills[job_id].append(skill_id)
+
+    counts = Counter()
+    jobs = Job.objects.values_list('pk', 'created_at', 'filled_at', 'filled_by_id', 'place_id')
+    for pk, created_at, filled_at, filled_by_id, place_id in jobs.iterator():
+        counts.update(job_keys(created_at, filled_at if filled_by_id else None, place_id, skills[pk]))
+
+    with transaction.atomic():
+        TrendBucket.objects.all().delete()
+        TrendBucket.objects.bulk_create(
+            [TrendBucket(count=count, **key._asdict()) for key, count in counts.items()],
+            batch_size=1000,
+        )
+    return len(counts)
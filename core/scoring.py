@@ -0,0 +1,111 @@
+"""
+NumPy scoring kernels for skill bitsets.
+
+Kept free of Django imports so worker processes (see the ``compute_matches``
+command) can import them without setting up the project.
+"""
+import numpy as np
+
+SKILL_WEIGHT = 0.7
+EXPERIENCE_WEIGHT = 0.3
+
+if hasattr(np, 'bitwise_count'):
+    def popcount(words):
+        """Number of set bits in each bitset (summed over the last axis)."""
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+else:
+    _BYTE_BITS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def popcount(words):
+        """Number of set bits in each bitset (summed over the last axis)."""
+        as_bytes = np.ascontiguousarray(words).view(np.uint8)
+        return _BYTE_BITS[as_bytes].sum(axis=-1, dtype=np.int64)
+
+
+def widen(bits, n_words):
+    if bits.shape[-1] >= n_words:
+        return bits
+    padding = [(0, 0)] * (bits.ndim - 1) + [(0, n_words - bits.shape[-1])]
+    return np.pad(bits, padding)
+
+
+def score(skill_bits, experience, job_bits, experience_required):
+    """
+    Score employees against jobs, broadcasting over rows.
+
+    Returns ``(skill_match, exp_match, total)`` percentage arrays using the
+    0.7 skill / 0.3 experience weighting.
+    """
+    n_words = max(skill_bits.shape[-1], job_bits.shape[-1])
+    skill_bits = widen(skill_bits, n_words)
+    job_bits = widen(job_bits, n_words)
+    return score_counts(popcount(job_bits & skill_bits), popcount(job_bits), experience, experience_required)
+
+
+def score_counts(matched, required, experience, experience_required):
+    """
+    :func:`score` from how many of each job's ``required`` skills each
+    employee has (``matched``), rather than from the bitsets.
+    """
+    skill_match = np.where(required > 0, (matched / np.maximum(required, 1)) * 100, 100.0)
+
+    experience = np.asarray(experience, dtype=np.float64)
+    experience_required = np.asarray(experience_required, dtype=np.float64)
+    ratio = (experience / np.where(experience_required > 0, experience_required, 1)) * 100
+    exp_match = np.where(
+        experience >= experience_required,
+        100.0,
+        np.where(experience_required > 0, ratio, 100.0),
+    )
+
+    total = (skill_match * SKILL_WEIGHT) + (exp_match * EXPERIENCE_WEIGHT)
+    return skill_match, exp_match, total
+
+
+def match_counts(skill_bits, job_bits, tile_size):
+    """
+    ``(employees, jobs)`` matrix of how many of each job's required skills
+    each employee has. Jobs are taken ``tile_size`` at a time, so the
+    broadcast intermediate stays at ``employees x tile_size`` bitsets.
+    """
+    counts = np.empty((len(skill_bits), len(job_bits)), dtype=np.uint16)
+    for start in range(0, len(job_bits), tile_size):
+        tile = job_bits[start:start + tile_size]
+        counts[:, start:start + tile_size] = popcount(skill_bits[:, None, :] & tile[None, :, :])
+    return counts
+
+
+def top_k(scores, k, ids):
+    """
+    Positions of the ``k`` highest ``scores``, best first, ties broken by
+    ascending ``ids``. Only the candidates above the k-th score are sorted.
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.array([], dtype=np.int64)
+    if k < len(scores):
+        threshold = np.partition(scores, len(scores) - k)[len(scores) - k]
+        candidates = np.flatnonzero(scores >= threshold)
+    else:
+        candidates = np.arange(len(scores))
+    order = np.lexsort((ids[candidates], -scores[candidates]))
+    return candidates[order][:k]
+
+
+_catalogue = None
+
+
+def init_worker(job_bits, tile_size):
+    """Process-pool initializer: keep the job bitsets resident in the worker."""
+    global _catalogue
+    _catalogue = (job_bits, tile_size)
+
+
+def count_chunk(employee_bits):
+    """
+    :func:`match_counts` of a chunk of employees against the worker's jobs.
+    The ``uint16`` counts are all that goes back to the parent, which holds
+    everything else needed to score them (see :func:`score_counts`).
+    """
+    job_bits, tile_size = _catalogue
+    return match_counts(employee_bits, job_bits, tile_size)
@@ -0,0 +1,190 @@
+"""
+Trigram index for the list-view filters.
+
+Filters like ``skill``, ``title``, ``name`` and ``location`` are
+case-insensitive substring searches (what ``icontains`` did). Rather than
+scanning the joined tables with ``LIKE``/regex, each searchable field keeps a
+process-wide trigram index, and a query is resolved in memory:
+
+- ``skill`` and ``location`` are small vocabularies shared by many rows; a
+  query resolves to the matching values, which the views filter on with an
+  indexed ``__in`` lookup.
+- ``title`` and ``name`` are close to one value per row, so matching values
+  would be nearly as many as matching rows; these index each row under its
+  primary key and a query resolves straight to ``pk``s. ``search_filter``
+  turns those into a ``pk__in`` filter, or back into ``icontains`` when
+  there are more than ``SEARCH_MAX_IDS`` of them: such a list costs more to
+  send than scanning does, as a page of dense matches is found early.
+
+Each index is built once per process from the tables and then kept current
+without rebuilding: a save that changes an indexed value publishes it under
+the ``search:<field>`` version (see ``core.signals``), and every process adds
+it to its own index on the next lookup (see ``core.caching.VersionedIndex``).
+"""
+import threading
+from collections import defaultdict
+from functools import partial
+
+from django.conf import settings
+from django.db.models import Q
+
+from core.caching import VersionedIndex
+from core.models import Skill
+from employees.models import EmployeeProfile
+from jobs.models import Job
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """
+    Substring search over ``(key, value)`` pairs: a search returns the keys
+    whose value contains the query, ignoring case. Each key has one value;
+    adding a key again replaces it.
+    """
+
+    def __init__(self, items=()):
+        self.terms = defaultdict(set)  # lower-cased value -> keys
+        self.postings = defaultdict(set)  # trigram -> terms
+        self.keys = {}  # key -> lower-cased value
+        # Items are added while other threads search.
+        self.lock = threading.Lock()
+        self.add(*items)
+
+    def add(self, *items):
+        with self.lock:
+            for key, value in items:
+                self._remove(key)
+                term = (value or '').lower()
+                if not term:
+                    continue
+                if term not in self.terms:
+                    for gram in trigrams(term):
+                        self.postings[gram].add(term)
+                self.terms[term].add(key)
+                self.keys[key] = term
+
+    def remove(self, *keys):
+        with self.lock:
+            for key in keys:
+                self._remove(key)
+
+    def _remove(self, key):
+        term = self.keys.pop(key, None)
+        if term is None:
+            return
+        keys = self.terms[term]
+        keys.discard(key)
+        if not keys:
+            del self.terms[term]
+            for gram in trigrams(term):
+                self.postings[gram].discard(term)
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def search(self, query):
+        """The keys of every value containing ``query``, ignoring case."""
+        with self.lock:
+            return self._search(query.lower())
+
+    def _search(self, query):
+        grams = trigrams(query)
+        if grams:
+            # Intersect from the rarest trigram up; stop early once empty.
+            candidates = None
+            for gram in sorted(grams, key=lambda gram: len(self.postings.get(gram, ()))):
+                found = self.postings.get(gram, set())
+                candidates = found if candidates is None else candidates & found
+                if not candidates:
+                    return []
+        else:
+            # Too short for a trigram: check every term.
+            candidates = self.terms
+        return [key for term in candidates if query in term for key in self.terms[term]]
+
+
+def _skill_names():
+    return Skill.objects.values_list('name', flat=True)
+
+
+def _locations():
+    return (
+        set(Job.objects.values_list('location', flat=True).distinct())
+        | set(EmployeeProfile.objects.values_list('location', flat=True).distinct())
+    )
+
+
+# Fields searched by value: field -> distinct values.
+VOCABULARIES = {
+    'skill': _skill_names,
+    'location': _locations,
+}
+
+# Fields searched by row: field -> (model, attribute).
+RECORDS = {
+    'title': (Job, 'title'),
+    'name': (EmployeeProfile, 'name'),
+}
+
+
+def build_index(field):
+    if field in RECORDS:
+        model, attribute = RECORDS[field]
+        return TrigramIndex(model.objects.values_list('pk', attribute).iterator(chunk_size=5000))
+    return TrigramIndex((value, value) for value in VOCABULARIES[field]())
+
+
+def apply_changes(index, changes):
+    # A change is a list of (key, value) pairs; a value of None removes the key.
+    for change in changes:
+        for key, value in change:
+            if value is None:
+                index.remove(key)
+            else:
+                index.add((key, value))
+
+
+_indexes = {
+    field: VersionedIndex(f'search:{field}', partial(build_index, field), apply_changes)
+    for field in (*VOCABULARIES, *RECORDS)
+}
+
+
+def search_index(field):
+    """The process-wide :class:`TrigramIndex` of ``field``."""
+    return _indexes[field].get()
+
+
+def search(field, query):
+    """
+    What ``field`` matches for ``query`` (case-insensitive): the distinct
+    values of a ``VOCABULARIES`` field, the primary keys of a ``RECORDS`` one.
+    """
+    return search_index(field).search(query)
+
+
+def search_filter(field, query):
+    """A ``Q`` for the rows of ``RECORDS`` field ``field`` containing ``query`` (case-insensitive)."""
+    ids = search(field, query)
+    if len(ids) > settings.SEARCH_MAX_IDS:
+        model, attribute = RECORDS[field]
+        return Q(**{f'{attribute}__icontains': query})
+    return Q(pk__in=ids)
+
+
+def note_value(field, pk, value):
+    """
+    Call after saving ``value`` of ``field`` on row ``pk``, or with ``None``
+    after deleting the row. Never builds the index. Vocabulary values are
+    only published when this process has not indexed them yet; ones that
+    disappear are left in, they just match nothing in the table.
+    """
+    if field in RECORDS:
+        _indexes[field].publish([(pk, value)])
+        return
+    index = _indexes[field].peek()
+    if value and (index is None or value not in index):
+        _indexes[field].publish([(value, value)])
@@ -0,0 +1,230 @@
+from collections import Counter, defaultdict
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from employees.models import EmployeeProfile
+from employers.models import EmployerProfile
+from jobs.models import Job, jobs_filled
+from core import facets, rollups, search, stats
+from core.caching import bump_version
+from core.facets import parse_salary
+from core.models import Skill, StatCounter, TrendBucket
+from core.places import place_index
+
+@receiver(pre_save, sender=Job)
+@receiver(pre_save, sender=EmployeeProfile)
+def resolve_place(sender, instance, **kwargs):
+    instance.place_id = place_index().resolve(instance.location)
+
+@receiver(pre_save, sender=Job)
+def resolve_salary(sender, instance, **kwargs):
+    instance.salary_amount = parse_salary(instance.salary)
+
+# --- Search vocabularies (see core.search) ---
+
+# Searchable field -> model attribute, per model.
+SEARCH_FIELDS = {
+    Job: {'title': 'title', 'location': 'location'},
+    EmployeeProfile: {'name': 'name', 'location': 'location'},
+    Skill: {'skill': 'name'},
+}
+
+def _search_values(instance):
+    return {field: instance.__dict__.get(attr) for field, attr in SEARCH_FIELDS[type(instance)].items()}
+
+@receiver(post_init, sender=Job)
+@receiver(post_init, sender=EmployeeProfile)
+@receiver(post_init, sender=Skill)
+def remember_search_values(sender, instance, **kwargs):
+    instance._search_values = _search_values(instance)
+
+@receiver(post_save, sender=Job)
+@receiver(post_save, sender=EmployeeProfile)
+@receiver(post_save, sender=Skill)
+def index_values(sender, instance, created, **kwargs):
+    # Only values this save changed need indexing.
+    values = _search_values(instance)
+    for field, value in values.items():
+        if created or value != instance._search_values[field]:
+            search.note_value(field, instance.pk, value)
+    instance._search_values = values
+
+@receiver(post_delete, sender=Job)
+@receiver(post_delete, sender=EmployeeProfile)
+def unindex_record(sender, instance, **kwargs):
+    for field in SEARCH_FIELDS[sender].keys() & search.RECORDS.keys():
+        search.note_value(field, instance.pk, None)
+
+# --- Facet index (see core.facets) ---
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def note_job(sender, instance, **kwargs):
+    facets.note_jobs(instance.pk)
+
+@receiver(jobs_filled)
+def note_filled_jobs(sender, fills, **kwargs):
+    facets.note_jobs(*fills)
+
+@receiver(m2m_changed, sender=Job.required_skills.through)
+def note_job_skills(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse and action == 'post_clear':
+        # Which jobs lost the skill is not passed along.
+        bump_version('facets')
+    else:
+        facets.note_jobs(*(pk_set if reverse else [instance.pk]))
+
+@receiver(post_delete, sender=EmployeeProfile)
+def note_reopened_jobs(sender, instance, **kwargs):
+    # Remembered by uncount_placements before SET_NULL reopened them.
+    facets.note_jobs(*instance.__dict__.get('_reopened_job_ids', ()))
+
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+def rebuild_facets(sender, created=False, **kwargs):
+    # Renamed skills relabel the facet; deleted ones drop their links without m2m signals.
+    if not created:
+        bump_version('facets')
+
+# --- Dashboard counters and trend rollups (see core.stats, core.rollups) ---
+
+PROFILE_COUNTERS = {EmployeeProfile: stats.EMPLOYEES, EmployerProfile: stats.EMPLOYERS}
+
+def _filled_counters(job):
+    """Counters a job contributes to as filled, or None if those fields are deferred."""
+    if 'filled_by_id' not in job.__dict__:
+        return None
+    return () if job.filled_by_id is None else (stats.JOBS_TAKEN,)
+
+def _rollup_state(job):
+    """``core.rollups.job_keys`` arguments of a job, or None if those fields are deferred."""
+    if not {'created_at', 'filled_at', 'filled_by_id', 'place_id'} <= job.__dict__.keys():
+        return None
+    return (job.created_at, job.filled_at if job.filled_by_id else None, job.place_id)
+
+@receiver(post_init, sender=Job)
+def remember_job_state(sender, instance, **kwargs):
+    instance._filled_counters = _filled_counters(instance)
+    instance._rollup_state = _rollup_state(instance)
+
+@receiver(post_save, sender=Job)
+def count_job(sender, instance, created, **kwargs):
+    deltas = Counter()
+    if created:
+        deltas[stats.JOBS] += 1
+    before = () if created else instance._filled_counters
+    after = _filled_counters(instance)
+    if before is not None and after is not None and before != after:
+        deltas.subtract(before)
+        deltas.update(after)
+    stats.apply_deltas(deltas)
+    instance._filled_counters = after
+
+    before = (None, None, None) if created else instance._rollup_state
+    after = _rollup_state(instance)
+    if before is not None and after is not None and before != after:
+        # A new job has no skills yet; they arrive through m2m_changed.
+        skill_ids = [] if created else list(instance.required_skills.values_list('pk', flat=True))
+        trend = Counter(rollups.job_keys(*after, skill_ids))
+        trend.subtract(rollups.job_keys(*before, skill_ids))
+        rollups.apply_deltas(trend)
+    instance._rollup_state = after
+
+@receiver(jobs_filled)
+def count_fills(sender, fills, filled_at, **kwargs):
+    # fill_jobs() only ever fills open jobs.
+    stats.apply_deltas({stats.JOBS_TAKEN: len(fills)})
+    places = dict(Job.objects.filter(pk__in=fills).values_list('pk', 'place_id'))
+    skills = defaultdict(list)
+    for job_id, skill_id in Job.required_skills.through.objects.filter(job_id__in=fills).values_list('job_id', 'skill_id'):
+        skills[job_id].append(skill_id)
+    trend = Counter()
+    for job_id in fills:
+        trend.update(rollups.job_keys(None, filled_at, places.get(job_id), skills[job_id]))
+    rollups.apply_deltas(trend)
+
+@receiver(pre_delete, sender=Job)
+def remember_job_skills(sender, instance, **kwargs):
+    # The link rows are gone (without m2m signals) by post_delete, and
+    # fill_job() may have filled the row behind this instance's back.
+    instance._deleted_skill_ids = list(instance.required_skills.values_list('pk', flat=True))
+    instance.refresh_from_db(fields=['created_at', 'filled_by', 'filled_at', 'place'])
+
+@receiver(post_delete, sender=Job)
+def uncount_job(sender, instance, **kwargs):
+    deltas = Counter({stats.JOBS: -1})
+    deltas.subtract(_filled_counters(instance) or ())
+    deltas.subtract(stats.skill_key(pk) for pk in instance._deleted_skill_ids)
+    stats.apply_deltas(deltas)
+    state = _rollup_state(instance)
+    if state is not None:
+        rollups.apply_deltas({key: -1 for key in rollups.job_keys(*state, instance._deleted_skill_ids)})
+
+@receiver(pre_delete, sender=EmployeeProfile)
+def uncount_placements(sender, instance, **kwargs):
+    # Deleting a profile un-fills its jobs through SET_NULL, which sends no signals.
+    jobs = Job.objects.filter(filled_by=instance).values_list('pk', 'filled_at', 'place_id')
+    taken = {pk: (filled_at, place_id) for pk, filled_at, place_id in jobs}
+    instance._reopened_job_ids = list(taken)
+    if not taken:
+        return
+    skills = defaultdict(list)
+    links = Job.required_skills.through.objects.filter(job_id__in=list(taken))
+    for job_id, skill_id in links.values_list('job_id', 'skill_id'):
+        skills[job_id].append(skill_id)
+    trend = Counter()
+    for pk, (filled_at, place_id) in taken.items():
+        trend.subtract(rollups.job_keys(None, filled_at, place_id, skills[pk]))
+    stats.apply_deltas({stats.JOBS_TAKEN: -len(taken)})
+    rollups.apply_deltas(trend)
+
+@receiver(post_save, sender=EmployeeProfile)
+@receiver(post_save, sender=EmployerProfile)
+def count_profile(sender, instance, created, **kwargs):
+    if created:
+        stats.apply_deltas({PROFILE_COUNTERS[sender]: 1})
+
+@receiver(post_delete, sender=EmployeeProfile)
+@receiver(post_delete, sender=EmployerProfile)
+def uncount_profile(sender, instance, **kwargs):
+    stats.apply_deltas({PROFILE_COUNTERS[sender]: -1})
+
+@receiver(post_delete, sender=Skill)
+def drop_skill_counters(sender, instance, **kwargs):
+    StatCounter.objects.filter(key=stats.skill_key(instance.pk)).delete()
+    TrendBucket.objects.filter(dimension=rollups.SKILL, key=instance.pk).delete()
+
+@receiver(m2m_changed, sender=Job.required_skills.through)
+def count_skill_links(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('pre_remove', 'pre_clear'):
+        # pk_set may name links that do not exist, so count the rows actually removed.
+        links = sender.objects.filter(**{'skill_id' if reverse else 'job_id': instance.pk})
+        if action == 'pre_remove':
+            links = links.filter(**{'job_id__in' if reverse else 'skill_id__in': pk_set})
+        instance._removed_skill_links = list(links.values_list('job_id', 'skill_id'))
+    elif action == 'post_add':
+        links = [(pk, instance.pk) for pk in pk_set] if reverse else [(instance.pk, pk) for pk in pk_set]
+        _count_skill_links(links, 1)
+    elif action in ('post_remove', 'post_clear'):
+        _count_skill_links(instance.__dict__.pop('_removed_skill_links', []), -1)
+
+def _count_skill_links(links, sign):
+    """Apply added (``sign=1``) or removed (``-1``) ``(job_id, skill_id)`` links to the counters."""
+    if not links:
+        return
+    demand = Counter(skill_id for _, skill_id in links)
+    stats.apply_deltas({stats.skill_key(pk): sign * count for pk, count in demand.items()})
+
+    jobs = Job.objects.filter(pk__in={job_id for job_id, _ in links})
+    dates = {
+        pk: (created_at, filled_at if filled_by_id else None)
+        for pk, created_at, filled_at, filled_by_id in jobs.values_list('pk', 'created_at', 'filled_at', 'filled_by_id')
+    }
+    trend = Counter()
+    for job_id, skill_id in links:
+        created_at, filled_at = dates[job_id]
+        dimensions = [(rollups.SKILL, skill_id)]
+        trend.update(rollups.bucket_keys(rollups.POSTED, created_at, dimensions))
+        trend.update(rollups.bucket_keys(rollups.FILLED, filled_at, dimensions))
+    rollups.apply_deltas({key: sign * count for key, count in trend.items()})
@@ -0,0 +1,79 @@
+"""
+Incrementally maintained dashboard statistics.
+
+Totals live in ``StatCounter`` rows keyed by name: the overall counts and
+the number of jobs demanding each skill (``skill:<pk>``). Signal handlers in
+``core.signals`` apply deltas as records change; ``rebuild_counters``
+recomputes everything from scratch (``manage.py rebuild_stats``). Counts over
+time are kept in ``core.rollups``.
+"""
+from django.db import transaction
+from django.db.models import Count, F
+
+from core.models import Skill, StatCounter
+
+EMPLOYEES = 'employees'
+EMPLOYERS = 'employers'
+JOBS = 'jobs'
+JOBS_TAKEN = 'jobs_taken'
+SKILL_PREFIX = 'skill:'
+
+
+def skill_key(skill_id):
+    return f'{SKILL_PREFIX}{skill_id}'
+
+
+def apply_deltas(deltas):
+    """Add ``{key: delta}`` to the counters, creating missing rows."""
+    for key, delta in deltas.items():
+        if not delta:
+            continue
+        if not StatCounter.objects.filter(key=key).update(value=F('value') + delta):
+            counter, created = StatCounter.objects.get_or_create(key=key, defaults={'value': delta})
+            if not created:
+                StatCounter.objects.filter(pk=counter.pk).update(value=F('value') + delta)
+
+
+def get_values(*keys):
+    """``{key: value}`` for ``keys`` in one query; missing counters read 0."""
+    values = dict.fromkeys(keys, 0)
+    values.update(StatCounter.objects.filter(key__in=keys).values_list('key', 'value'))
+    return values
+
+
+def top_skills(limit):
+    """The ``limit`` most demanded skills, each annotated with ``job_count``."""
+    counters = list(
+        StatCounter.objects.filter(key__startswith=SKILL_PREFIX, value__gt=0)
+        .order_by('-value', 'key')
+        .values_list('key', 'value')[:limit]
+    )
+    counts = {int(key[len(SKILL_PREFIX):]): value for key, value in counters}
+    skills = Skill.objects.in_bulk(counts)
+    ranked = []
+    for skill_id, value in counts.items():
+        if skill_id in skills:
+            skill = skills[skill_id]
+            skill.job_count = value
+            ranked.append(skill)
+    return ranked
+
+
+def rebuild_counters(StatCounter, Job, EmployeeProfile, EmployerProfile):
+    """Recompute every counter from the source tables."""
+    counters = {
+        EMPLOYEES: EmployeeProfile.objects.count(),
+        EMPLOYERS: EmployerProfile.objects.count(),
+        JOBS: Job.objects.count(),
+        JOBS_TAKEN: Job.objects.filter(filled_by__isnull=False).count(),
+    }
+    demand = (
+        Job.required_skills.through.objects.values('skill_id')
+        .annotate(jobs=Count('job_id')).order_by().values_list('skill_id', 'jobs')
+    )
+    counters.update((skill_key(skill_id), jobs) for skill_id, jobs in demand)
+
+    with transaction.atomic():
+        StatCounter.objects.all().delete()
+        StatCounter.objects.bulk_create([StatCounter(key=key, value=value) for key, value in counters.items()])
+    return counters
@@ -0,0 +1,50 @@
+"""Test helpers."""
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+from accounts.models import CustomUser
+from core.querybudget import QueryRecorder, budget_violations, describe
+
+PASSWORD = 'password'
+
+
+def create_user(username, role):
+    """A user ``username`` with email ``<username>@example.com`` and password ``PASSWORD``."""
+    return CustomUser.objects.create_user(username, f'{username}@example.com', PASSWORD, role=role)
+
+
+def create_employer(username='employer'):
+    return create_user(username, CustomUser.EMPLOYER).employer_profile
+
+
+def create_employee(username='employee'):
+    return create_user(username, CustomUser.EMPLOYEE).employee_profile
+
+
+class QueryBudgetTestMixin:
+    """
+    ``TestCase`` mixin to hold a block of code to a query budget: the one
+    declared for ``url_name`` in ``QUERY_BUDGETS``, or explicit limits.
+    Failures list the most repeated statements.
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, url_name=None, queries=None, db_ms=None):
+        budget = None
+        if queries is not None or db_ms is not None:
+            budget = {key: value for key, value in (('queries', queries), ('db_ms', db_ms)) if value is not None}
+        with QueryRecorder().recording() as recorder:
+            yield recorder
+        violations = budget_violations(url_name, recorder, budget)
+        if violations:
+            self.fail(describe(url_name, recorder, violations))
+
+
+class StrictQueryBudgetRunner(DiscoverRunner):
+    """Test runner under which any request over its query budget fails the test."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.QUERY_BUDGET_STRICT = True
@@ -1,3 +1,790 @@
-from django.test import TestCase
+import random
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from core import charts, exports, facets, resultcache, rollups, search, stats
+from core.caching import VERSION_CACHE_ALIAS, VersionedIndex, bump_version
+from core.facets import FacetIndex, facet_index, filter_bitmaps
+from core.matching import cached_matches
+from core.models import Place, Skill, StatCounter, TrendBucket
+from core.pagination import paginate_keyset
+from core.places import GridIndex, haversine_km, place_index
+from core.querybudget import QueryBudgetExceeded
+from core.testing import QueryBudgetTestMixin, create_employee, create_employer, create_user
+from employees.models import EmployeeProfile
+from employers.models import EmployerProfile
+from jobs.models import Job, MatchScore, fill_job
+
+
+@override_settings(CHART_RENDER_WORKERS=0)
+class DashboardQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.skills = [Skill.objects.create(name=name) for name in ('Plumbing', 'Cooking', 'Driving')]
+        cls.employer = create_employer()
+        create_user('admin', CustomUser.ADMIN)
+
+    def setUp(self):
+        self.client.login(username='admin', password='password')
+        self.filled = 0
+
+    def fill_jobs(self, count):
+        start = self.filled
+        self.filled += count
+        for i in range(start, self.filled):
+            employee = create_employee(f'employee{i}')
+            employee.skills.set(self.skills[:i % 3 + 1])
+            job = Job.objects.create(
+                employer=self.employer, title=f'Job {i}', experience_required=i % 4,
+                salary='10000', location='Mumbai',
+            )
+            job.required_skills.set(self.skills[i % 2:])
+            job.filled_by = employee
+            job.filled_at = timezone.now() - timedelta(days=i)
+            job.save()
+            if i % 2:
+                # Exercise the in-memory path for placements without a stored score.
+                MatchScore.objects.filter(job=job, employee=employee).delete()
+
+    def dashboard_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_filled_jobs(self):
+        self.fill_jobs(2)
+        baseline = self.dashboard_queries()
+        self.fill_jobs(20)
+        self.assertEqual(self.dashboard_queries(), baseline)
+
+    def test_match_quality_counts_every_placement(self):
+        self.fill_jobs(6)
+        self.assertEqual(sum(charts.match_quality_data()['sizes']), 6)
+
+
+class StalledPool:
+    """A chart render pool whose charts only finish when a test says so."""
+
+    def __init__(self):
+        self.submitted = []
+        self.shutdowns = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        self.submitted.append((args[0], future))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shutdowns.append({'wait': wait, 'cancel_futures': cancel_futures})
+
+
+class BrokenPool(StalledPool):
+    def submit(self, fn, *args):
+        raise BrokenProcessPool('A chart worker died.')
+
+
+@override_settings(CHART_RENDER_WORKERS=1, CHART_RENDER_TIMEOUT=0.01, DASHBOARD_CHART_MODE='server')
+class ChartRenderPoolTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_user('admin', CustomUser.ADMIN)
+
+    def setUp(self):
+        caches[settings.CHART_CACHE_ALIAS].clear()
+        self.client.login(username='admin', password='password')
+
+    def test_slow_charts_get_a_placeholder_and_are_cached_when_done(self):
+        pool = StalledPool()
+        chart_url = reverse('dashboard_chart', args=['overview'])
+        with mock.patch.object(charts, '_pool', pool):
+            response = self.client.get(reverse('dashboard'))
+            self.assertContains(response, 'still being drawn')
+            self.assertIn('overview', response.context['charts_pending'])
+            self.assertIsNone(response.context['chart_overview'])
+
+            response = self.client.get(chart_url)
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response['Retry-After'], '1')
+
+            for name, future in pool.submitted:
+                future.set_result(f'png:{name}'.encode())
+            response = self.client.get(chart_url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, b'png:overview')
+            self.assertFalse(self.client.get(reverse('dashboard')).context['charts_pending'])
+
+    def test_broken_pool_is_shut_down_and_charts_drawn_in_process(self):
+        pool = BrokenPool()
+        with mock.patch.object(charts, '_pool', pool):
+            response = self.client.get(reverse('dashboard'))
+            self.assertIsNone(charts._pool)
+        self.assertEqual(pool.shutdowns, [{'wait': False, 'cancel_futures': True}])
+        self.assertFalse(response.context['charts_pending'])
+        self.assertTrue(response.context['chart_overview'])
+
+    def test_pool_is_handed_work_without_importing_matplotlib(self):
+        # Whatever the pool pickles is imported by this process first.
+        with mock.patch.object(charts, '_pool', None), \
+                mock.patch.object(charts, 'ProcessPoolExecutor') as pool_class:
+            charts.render_pool()
+        pool = StalledPool()
+        with mock.patch.object(charts, '_pool', pool), mock.patch.object(pool, 'submit', wraps=pool.submit) as submit:
+            charts.render_charts({'overview': charts.overview_data()})
+        handed_over = [pool_class.call_args.kwargs['initializer'], submit.call_args.args[0]]
+        self.assertEqual({fn.__module__ for fn in handed_over}, {'core.chart_worker'})
+
+
+@override_settings(CHART_RENDER_WORKERS=0, DASHBOARD_CHART_MODE='server')
+class DashboardChartViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_user('admin', CustomUser.ADMIN)
+
+    def setUp(self):
+        self.client.login(username='admin', password='password')
+        self.url = reverse('dashboard_chart', args=['overview'])
+
+    def test_unchanged_chart_is_not_sent_again(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertIn('no-cache', response['Cache-Control'])
+        etag = response['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+        # New numbers, new fingerprint.
+        create_employer()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_versioned_url_is_immutable(self):
+        version = self.client.get(reverse('dashboard')).context['chart_overview']
+        response = self.client.get(self.url, {'v': version})
+        self.assertEqual(response['ETag'], f'"{version}"')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn(f'max-age={365 * 24 * 60 * 60}', response['Cache-Control'])
+        # A stale version gets the current chart, revalidated on every use.
+        response = self.client.get(self.url, {'v': 'stale'})
+        self.assertNotIn('immutable', response['Cache-Control'])
+        self.assertIn('no-cache', response['Cache-Control'])
+
+
+class DashboardChartDataViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_user('admin', CustomUser.ADMIN)
+        create_employer()
+
+    def setUp(self):
+        self.client.login(username='admin', password='password')
+        self.url = reverse('dashboard_chart_data')
+
+    def test_series_for_every_chart(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data.keys(), charts.CHARTS.keys())
+        self.assertEqual(data['overview'], charts.overview_data())
+        # No skills or placements yet.
+        self.assertIsNone(data['skills'])
+        self.assertIsNone(data['match_quality'])
+
+    @override_settings(CHART_DATA_MAX_AGE=42)
+    def test_revalidated_with_its_etag(self):
+        response = self.client.get(self.url)
+        self.assertIn('max-age=42', response['Cache-Control'])
+        self.assertIn('private', response['Cache-Control'])
+        etag = response['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertIn('max-age=42', response['Cache-Control'])
+        create_employer('another')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['overview']['counts'][1], 2)
+
+    @override_settings(DASHBOARD_CHART_MODE='client', CHART_DATA_MAX_AGE=42)
+    def test_client_mode_dashboard_renders_nothing(self):
+        with mock.patch.object(charts, 'render_missing') as render_missing:
+            response = self.client.get(reverse('dashboard'), {'granularity': 'week'})
+        render_missing.assert_not_called()
+        self.assertEqual(response.context['chart_mode'], 'client')
+        self.assertContains(response, f'data-chart-url="{self.url}?granularity=week"')
+        self.assertContains(response, 'data-chart-poll="42"')
+        self.assertContains(response, 'data-chart="overview"')
+        self.assertNotContains(response, reverse('dashboard_chart', args=['overview']))
+
+
+class DashboardTrendViewTests(TestCase):
+    def setUp(self):
+        create_user('admin', CustomUser.ADMIN)
+        self.client.login(username='admin', password='password')
+        self.url = reverse('dashboard_trends')
+
+    def test_posted_and_filled_with_breakdowns(self):
+        employer = create_employer()
+        skill = Skill.objects.create(name='Plumbing')
+        monday = datetime(2026, 1, 5, 12, tzinfo=dt_timezone.utc)
+        for days in (0, 8, 40):
+            job = Job.objects.create(employer=employer, title='Plumber', salary='10000', location='Mumbai')
+            job.required_skills.add(skill)
+            job.created_at = monday + timedelta(days=days)
+            job.save()
+        job.filled_by = create_employee()
+        job.filled_at = monday + timedelta(days=41)
+        job.save()
+
+        response = self.client.get(self.url, {'from': '2026-01-01', 'to': '2026-02-28', 'granularity': 'month'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+        data = response.json()
+        self.assertEqual((data['from'], data['to'], data['granularity']), ('2026-01-01', '2026-02-28', 'month'))
+        self.assertEqual(data['periods'], ['2026-01-01', '2026-02-01'])
+        self.assertEqual(data['posted']['counts'], [2, 1])
+        self.assertEqual(data['posted']['skills'], [{'name': 'Plumbing', 'count': 3}])
+        self.assertEqual(data['posted']['places'], [{'name': 'Mumbai', 'count': 3}])
+        self.assertEqual(data['filled']['counts'], [0, 1])
+        self.assertEqual(data['filled']['skills'], [{'name': 'Plumbing', 'count': 1}])
+
+        weeks = self.client.get(self.url, {'from': '2026-01-01', 'to': '2026-01-31', 'granularity': 'week'}).json()
+        self.assertEqual(weeks['posted']['counts'], [0, 1, 1, 0, 0])
+        self.assertEqual(weeks['filled']['counts'], [0, 0, 0, 0, 0])
+        self.assertEqual(weeks['filled']['places'], [])
+
+    def test_dashboard_links_to_the_same_range(self):
+        response = self.client.get(reverse('dashboard'), {'granularity': 'week'})
+        self.assertContains(response, f'data-trends-url="{self.url}?granularity=week"')
+        self.assertContains(response, 'js/dashboard_trends.js')
+
+
+class ComputeMatchesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        skills = [Skill.objects.create(name=f'Skill {i}') for i in range(70)]
+        employer = create_employer()
+        # The signals store scores on commit.
+        with cls.captureOnCommitCallbacks(execute=True):
+            for i in range(5):
+                employee = create_employee(f'employee{i}')
+                employee.experience_years = i
+                employee.save()
+                # Skill ids on both sides of the first 64-bit word.
+                employee.skills.set(skills[i::5])
+            for i in range(7):
+                job = Job.objects.create(
+                    employer=employer, title=f'Job {i}', experience_required=i % 4, salary='10000', location='Pune',
+                )
+                job.required_skills.set(skills[i * 9:i * 9 + i])
+
+    def scores(self):
+        return sorted(MatchScore.objects.values_list('employee_id', 'job_id', 'score', 'skill_match', 'exp_match'))
+
+    def test_stores_the_scores_the_signals_store(self):
+        expected = self.scores()
+        MatchScore.objects.all().delete()
+        call_command(
+            'compute_matches', workers=1, chunk_size=2, tile_size=3, batch_size=4, stdout=StringIO(),
+        )
+        self.assertEqual(self.scores(), expected)
+
+
+class SignalCounterTests(TestCase):
+    """The signal-maintained counters and rollups agree with a rebuild after every kind of change."""
+
+    def changes(self):
+        skills = [Skill.objects.create(name=name) for name in ('Plumbing', 'Cooking', 'Driving')]
+        yield 'skills'
+        employer = create_employer()
+        employees = [create_employee(f'employee{i}') for i in range(3)]
+        yield 'profiles'
+        jobs = [
+            Job.objects.create(employer=employer, title=f'Job {i}', salary='10000', location='Mumbai')
+            for i in range(4)
+        ]
+        yield 'jobs'
+        jobs[0].required_skills.set(skills)
+        jobs[1].required_skills.add(skills[0], skills[1])
+        skills[2].job_set.add(jobs[2], jobs[3])
+        yield 'links added'
+        jobs[0].required_skills.remove(skills[1], skills[1])
+        skills[0].job_set.remove(jobs[1])
+        jobs[3].required_skills.clear()
+        yield 'links removed'
+        jobs[3].created_at -= timedelta(days=40)
+        jobs[3].save()
+        yield 'backdated'
+        fill_job(jobs[0].pk, employees[0])
+        fill_job(jobs[0].pk, employees[1])
+        yield 'filled'
+        jobs[1].filled_by = employees[1]
+        jobs[1].filled_at = timezone.now()
+        jobs[1].save()
+        yield 'filled by save'
+        jobs[1].refresh_from_db()
+        jobs[1].filled_by = None
+        jobs[1].save()
+        yield 'reopened'
+        jobs[2].filled_by = employees[2]
+        jobs[2].save()
+        employees[2].user.delete()
+        yield 'placed employee deleted'
+        jobs[0].delete()
+        yield 'filled job deleted'
+        skills[2].delete()
+        yield 'skill deleted'
+        employer.user.delete()
+        yield 'employer deleted'
+
+    def test_counters_match_a_rebuild(self):
+        for change in self.changes():
+            with self.subTest(change):
+                live = {key: value for key, value in StatCounter.objects.values_list('key', 'value') if value}
+                rebuilt = stats.rebuild_counters(StatCounter, Job, EmployeeProfile, EmployerProfile)
+                self.assertEqual(live, {key: value for key, value in rebuilt.items() if value})
+        self.assertEqual(stats.get_values(stats.JOBS, stats.EMPLOYEES, stats.EMPLOYERS), {
+            stats.JOBS: 0, stats.EMPLOYEES: 2, stats.EMPLOYERS: 0,
+        })
+
+    def test_rollups_match_a_rebuild(self):
+        fields = ['metric', 'granularity', 'dimension', 'key', 'period', 'count']
+
+        def buckets():
+            return {row[:-1]: row[-1] for row in TrendBucket.objects.values_list(*fields) if row[-1]}
+
+        for change in self.changes():
+            with self.subTest(change):
+                live = buckets()
+                rollups.rebuild_rollups(TrendBucket, Job)
+                self.assertEqual(live, buckets())
+
+    def test_trend_series(self):
+        employer = create_employer()
+        skill = Skill.objects.create(name='Plumbing')
+        monday = datetime(2026, 1, 5, 12, tzinfo=dt_timezone.utc)
+        for days in (0, 1, 8, 40):
+            job = Job.objects.create(employer=employer, title='Plumber', salary='10000', location='Mumbai')
+            job.required_skills.add(skill)
+            job.created_at = monday + timedelta(days=days)
+            job.save()
+        job.filled_by = create_employee()
+        job.filled_at = monday + timedelta(days=41)
+        job.save()
+
+        weeks = rollups.parse_trend_range({'from': '2026-01-01', 'to': '2026-02-28', 'granularity': 'week'})
+        periods, counts = rollups.series(rollups.POSTED, weeks)
+        self.assertEqual(periods[0], datetime(2025, 12, 29).date())
+        self.assertEqual(counts, [0, 2, 1, 0, 0, 0, 1, 0, 0])
+
+        months = weeks._replace(granularity=rollups.MONTH)
+        self.assertEqual(rollups.series(rollups.POSTED, months)[1], [3, 1])
+        self.assertEqual(rollups.series(rollups.FILLED, months)[1], [0, 1])
+        self.assertEqual(rollups.series(rollups.FILLED, months, rollups.SKILL, skill.pk)[1], [0, 1])
+        self.assertEqual(rollups.breakdown(rollups.POSTED, months, rollups.SKILL), [(skill.pk, 4)])
+
+    def test_long_ranges_are_coarsened(self):
+        trend = rollups.parse_trend_range({'from': '2020-01-01', 'to': '2026-01-01', 'granularity': 'day'})
+        self.assertEqual(trend.granularity, rollups.WEEK)
+        trend = rollups.parse_trend_range({'from': 'soon', 'to': '2026-01-01'})
+        self.assertEqual((trend.start, trend.granularity), (datetime(2025, 7, 5).date(), rollups.MONTH))
+
+
+class TrigramSearchTests(TestCase):
+    def setUp(self):
+        # The process-wide indexes outlive the rolled-back data of earlier tests.
+        bump_version(*(f'search:{field}' for field in (*search.VOCABULARIES, *search.RECORDS)))
+
+    def test_search_finds_what_icontains_finds(self):
+        rng = random.Random(0)
+        words = ['Plumber', 'plumbing', 'Cook', 'COOKING helper', 'Driver', 'Navi Mumbai', 'Mumbai', 'Pune', 'a', '']
+        words += [''.join(rng.choice('abcAB ') for _ in range(rng.randint(1, 8))) for _ in range(200)]
+        index = search.TrigramIndex((word, word) for word in words)
+        queries = ['', 'p', 'MB', 'umb', 'cooking h', 'mumbai', 'xyz', ' a']
+        queries += [word[start:start + length] for word in rng.sample(words, 50)
+                    for start, length in [(rng.randint(0, 3), rng.randint(1, 5))]]
+        for query in queries:
+            with self.subTest(query=query):
+                expected = {word for word in words if word and query.lower() in word.lower()}
+                self.assertEqual(set(index.search(query)), expected)
+
+    def test_new_values_are_added_without_a_rebuild(self):
+        employer = create_employer()
+        Job.objects.create(employer=employer, title='Cook', salary='10000', location='Mumbai')
+        self.assertEqual(search.search('location', 'mum'), ['Mumbai'])
+        with mock.patch.object(search._indexes['location'], 'build', side_effect=AssertionError('rebuilt')):
+            Job.objects.create(employer=employer, title='Cook', salary='10000', location='Navi Mumbai')
+            self.assertEqual(sorted(search.search('location', 'mum')), ['Mumbai', 'Navi Mumbai'])
+
+    def test_record_fields_resolve_to_current_ids(self):
+        employer = create_employer()
+        plumber = Job.objects.create(employer=employer, title='Plumber', salary='10000', location='Mumbai')
+        self.assertEqual(search.search('title', 'plumb'), [plumber.pk])
+        with mock.patch.object(search._indexes['title'], 'build', side_effect=AssertionError('rebuilt')):
+            master = Job.objects.create(employer=employer, title='Master Plumber', salary='10000', location='Mumbai')
+            self.assertEqual(sorted(search.search('title', 'PLUMB')), [plumber.pk, master.pk])
+            plumber.title = 'Electrician'
+            plumber.save()
+            self.assertEqual(search.search('title', 'plumb'), [master.pk])
+            self.assertEqual(search.search('title', 'electric'), [plumber.pk])
+            master.delete()
+            self.assertEqual(search.search('title', 'plumb'), [])
+        # Kept in step with the table.
+        self.assertEqual(search.search_index('title').keys, search.build_index('title').keys)
+
+    def test_filter_falls_back_to_icontains_past_max_ids(self):
+        employer = create_employer()
+        jobs = [Job.objects.create(employer=employer, title=title, salary='10000', location='Mumbai')
+                for title in ('Plumber', 'Master Plumber', 'Cook')]
+        for max_ids, lookup in ((2, '"id" IN'), (1, '"title" LIKE')):
+            with self.subTest(max_ids=max_ids), override_settings(SEARCH_MAX_IDS=max_ids):
+                matches = Job.objects.filter(search.search_filter('title', 'PLUMB'))
+                self.assertIn(lookup, str(matches.query))
+                self.assertEqual(set(matches), set(jobs[:2]))
+
+
+class VersionedIndexTests(TestCase):
+    def setUp(self):
+        self.source = ['a']
+        self.builds = 0
+        self.index = VersionedIndex('test-index', self.build, lambda index, changes: index.extend(sum(changes, [])), max_replay=3)
+
+    def build(self):
+        self.builds += 1
+        return list(self.source)
+
+    def test_published_changes_are_replayed(self):
+        self.assertEqual(self.index.get(), ['a'])
+        self.index.publish(['b'])
+        self.index.publish(['c'])
+        self.assertEqual(self.index.peek(), ['a'])
+        self.assertEqual(self.index.get(), ['a', 'b', 'c'])
+        self.assertEqual(self.builds, 1)
+
+    def test_rebuilds_when_changes_are_missing(self):
+        self.index.get()
+        self.source = ['z']
+        bump_version('test-index')
+        self.assertEqual(self.index.get(), ['z'])
+        for _ in range(4):
+            self.index.publish(['b'])
+        self.assertEqual(self.index.get(), ['z'])
+        self.index.publish(['b'])
+        caches[VERSION_CACHE_ALIAS].clear()
+        self.assertEqual(self.index.get(), ['z'])
+        self.assertEqual(self.builds, 4)
+
+
+class KeysetPaginationTests(TestCase):
+    keyset = ('-created_at', '-pk')
+
+    @classmethod
+    def setUpTestData(cls):
+        employer = create_employer()
+        create_user('admin', CustomUser.ADMIN)
+        start = datetime(2026, 1, 5, 12, 0, 0, 123456, tzinfo=dt_timezone.utc)
+        for i in range(25):
+            job = Job.objects.create(employer=employer, title=f'Job {i}', salary='10000', location='Mumbai')
+            # Runs of jobs share a timestamp, so pages split ties on the pk.
+            job.created_at = start + timedelta(microseconds=i // 3)
+            job.save()
+        cls.expected = list(Job.objects.order_by(*cls.keyset).values_list('pk', flat=True))
+
+    def page(self, **cursors):
+        page = paginate_keyset(Job.objects.all(), self.keyset, 4, **cursors)
+        return page, [job.pk for job in page]
+
+    def test_forward_and_back_visit_every_row_once(self):
+        pages = []
+        page, ids = self.page()
+        self.assertFalse(page.has_previous)
+        pages.append(ids)
+        while page.has_next:
+            page, ids = self.page(after=page.next_cursor)
+            pages.append(ids)
+        self.assertEqual(sum(pages, []), self.expected)
+        self.assertEqual([len(ids) for ids in pages], [4] * 6 + [1])
+
+        walked_back = [pages[-1]]
+        while page.has_previous:
+            page, ids = self.page(before=page.previous_cursor)
+            walked_back.append(ids)
+        self.assertEqual(walked_back[::-1], pages)
+
+    def test_invalid_cursors_give_the_first_page(self):
+        first = self.page()[1]
+        for cursor in ('garbage', 'W10', 'WyJub3QgYSBkYXRlIiwiMSJd'):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.page(after=cursor)[1], first)
+                self.assertEqual(self.page(before=cursor)[1], first)
+
+    def test_job_list_pages(self):
+        self.client.login(username='admin', password='password')
+        ids, query = [], '?limit=10'
+        while query is not None:
+            response = self.client.get(reverse('job_list') + query)
+            page = response.context['keyset_page']
+            ids.extend(job.pk for job in page)
+            query = f'?limit=10&after={page.next_cursor}' if page.has_next else None
+        self.assertEqual(ids, self.expected)
+        self.assertEqual(len(self.client.get(reverse('job_list') + '?limit=1000').context['keyset_page']), 25)
+        self.assertEqual(len(self.client.get(reverse('job_list') + '?limit=x').context['keyset_page']), 20)
+
+
+class FacetIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = create_employer()
+        cls.employee = create_employee()
+        cls.skills = [Skill.objects.create(name=name) for name in ('Plumbing', 'Cooking', 'Driving')]
+        cls.filled = cls.post('Filled', 'Pune', 1, '15000', cls.skills[1:])
+        fill_job(cls.filled.pk, cls.employee)
+        for i, location in enumerate(['Mumbai', 'Pune', 'Atlantis', 'Thane', 'Mumbai']):
+            cls.post(f'Job {i}', location, i * 2, f'{i * 8}k', cls.skills[:i % 3 + 1])
+
+    @classmethod
+    def post(cls, title, location, experience, salary, skills):
+        job = Job.objects.create(
+            employer=cls.employer, title=title, location=location,
+            experience_required=experience, salary=salary,
+        )
+        job.required_skills.set(skills)
+        return job
+
+    def setUp(self):
+        # The process-wide index outlives the rolled-back data of earlier tests.
+        bump_version('facets')
+
+    def assertMatchesAFreshIndex(self):
+        index, fresh = facet_index(), FacetIndex()
+        mumbai = Place.objects.get(name='Mumbai').pk
+        for params in ({}, {'skill': 'cook'}, {'experience': '1-2'}, {'place': str(mumbai)}, {'location': 'pune'},
+                       {'salary': '10k-20k', 'skill_id': str(self.skills[0].pk)}, {'title': 'Job'}):
+            with self.subTest(params=params):
+                self.assertEqual(index.counts(filter_bitmaps(index, params)), fresh.counts(filter_bitmaps(fresh, params)))
+        # Labels of values no open job has any more may linger; they are never shown.
+        for facet, names in fresh.names.items():
+            self.assertEqual({key: index.names[facet].get(key) for key in names}, names)
+
+    def test_changes_are_applied_without_a_rebuild(self):
+        facet_index()
+        with mock.patch.object(facets._index, 'build', side_effect=AssertionError('rebuilt')):
+            job = self.post('New', 'Navi Mumbai', 12, '45000', self.skills)
+            self.assertMatchesAFreshIndex()
+            for i in range(70):
+                self.post(f'Bulk {i}', 'Delhi', 3, '9000', [])
+            self.assertMatchesAFreshIndex()
+            job.salary = '5000'
+            job.location = 'Pune'
+            job.save()
+            job.required_skills.remove(self.skills[0])
+            self.skills[2].job_set.add(job)
+            self.assertMatchesAFreshIndex()
+            fill_job(job.pk, self.employee)
+            Job.objects.get(title='Job 1').delete()
+            self.assertMatchesAFreshIndex()
+            # Reopened after being indexed: its position is still there.
+            Job.objects.filter(pk=job.pk).update(filled_by=None, filled_at=None)
+            facets.note_jobs(job.pk)
+            self.assertMatchesAFreshIndex()
+
+    def test_rebuilds_when_a_job_needs_a_position_in_the_middle(self):
+        index = facet_index()
+        self.filled.filled_by = None
+        self.filled.save()
+        self.assertIsNot(facet_index(), index)
+        self.assertMatchesAFreshIndex()
+        self.employee.user.delete()
+        self.assertMatchesAFreshIndex()
+
+
+class PlaceDistanceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        employer = create_employer()
+        cls.employee = create_employee()
+        cls.employee.location = 'Bombay'
+        cls.employee.save()
+        for location in ('Andheri, Mumbai', 'Thane', 'Poona', 'Delhi', 'Atlantis'):
+            Job.objects.create(employer=employer, title=location, salary='10000', location=location)
+
+    def test_haversine(self):
+        self.assertAlmostEqual(haversine_km(0, 0, 0, 1), 111.19, places=2)
+        self.assertAlmostEqual(haversine_km(19.0760, 72.8777, 18.5204, 73.8567), 120, delta=1)
+
+    def test_grid_finds_what_a_full_scan_finds(self):
+        rng = random.Random(0)
+        points = [(pk, rng.uniform(-70, 70), rng.uniform(-180, 180)) for pk in range(500)]
+        grid = GridIndex(points, cell_degrees=2.0)
+        queries = [(rng.uniform(-70, 70), rng.uniform(-180, 180), rng.choice((50, 300, 1000))) for _ in range(50)]
+        # Circles crossing the antimeridian.
+        queries += [(10, 179.5, 500), (-20, -179.9, 1000)]
+        for latitude, longitude, radius in queries:
+            expected = {
+                pk: haversine_km(latitude, longitude, point_latitude, point_longitude)
+                for pk, point_latitude, point_longitude in points
+            }
+            expected = {pk for pk, distance in expected.items() if distance <= radius}
+            with self.subTest(latitude=latitude, longitude=longitude, radius=radius):
+                self.assertEqual(set(grid.within(latitude, longitude, radius)), expected)
+
+    def test_locations_resolve_through_aliases_and_parts(self):
+        index = place_index()
+        mumbai = Place.objects.get(name='Mumbai').pk
+        self.assertEqual(index.resolve('Andheri, Mumbai'), mumbai)
+        self.assertEqual(index.resolve('  bombay '), mumbai)
+        self.assertEqual(index.resolve('Poona'), Place.objects.get(name='Pune').pk)
+        self.assertIsNone(index.resolve('Atlantis'))
+
+    def test_matches_within_a_radius(self):
+        def matches(radius_km):
+            return {job.title: job.distance_km for job in cached_matches(self.employee, radius_km)}
+        # Jobs at unknown places are never filtered out.
+        self.assertEqual(matches(50), {'Andheri, Mumbai': 0, 'Thane': 19, 'Atlantis': None})
+        self.assertEqual(set(matches(200)), {'Andheri, Mumbai', 'Thane', 'Poona', 'Atlantis'})
+        self.assertEqual(len(matches(None)), 5)
+
+
+@override_settings(CHART_RENDER_WORKERS=0)
+class QueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        skills = [Skill.objects.create(name=name) for name in ('Plumbing', 'Cooking', 'Driving')]
+        employer = create_employer()
+        employee = create_employee()
+        employee.location = 'Mumbai'
+        employee.save()
+        employee.skills.set(skills[:2])
+        for i in range(30):
+            job = Job.objects.create(
+                employer=employer, title=f'Job {i}', experience_required=i % 3,
+                salary='10000', location='Mumbai',
+            )
+            job.required_skills.set(skills[i % 3:])
+
+    def test_views_stay_within_budget(self):
+        # The test runner sets QUERY_BUDGET_STRICT, so the middleware raises on any view over budget.
+        for username, url_names in (('employer', ['dashboard', 'job_list', 'employer_list']),
+                                    ('employee', ['dashboard', 'matching_jobs', 'employee_list', 'employee_directory'])):
+            self.client.login(username=username, password='password')
+            for url_name in url_names:
+                with self.subTest(url_name=url_name, user=username):
+                    response = self.client.get(reverse(url_name))
+                    self.assertEqual(response.status_code, 200)
+                    self.assertIn('db;dur=', response['Server-Timing'])
+
+    def test_over_budget_raises_in_strict_mode(self):
+        self.client.login(username='employer', password='password')
+        with override_settings(QUERY_BUDGETS={'job_list': {'queries': 1}}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(reverse('job_list'))
+
+    def test_helper_reports_repeated_queries(self):
+        with self.assertRaises(AssertionError) as failure:
+            with self.assertQueryBudget(queries=5):
+                for job in Job.objects.all():
+                    list(job.required_skills.all())
+        self.assertIn('30x', str(failure.exception))
+
+
+class ResultCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.skill = Skill.objects.create(name='Cooking')
+        cls.employer = create_employer()
+        for location in ('Mumbai', 'Pune'):
+            job = Job.objects.create(
+                employer=cls.employer, title='Cook', salary='10000', location=location,
+            )
+            job.required_skills.add(cls.skill)
+
+    def setUp(self):
+        self.client.login(username='employer', password='password')
+
+    def search(self, query):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('job_list') + query)
+        filtered = [query for query in queries if query['sql'].startswith('SELECT "jobs_job"."id" FROM')]
+        return [job.location for job in response.context['jobs']], len(filtered)
+
+    def test_normalized_repeat_search_skips_the_filter(self):
+        before = resultcache.counters()
+        self.assertEqual(self.search('?skill=cook&location=mumbai'), (['Mumbai'], 1))
+        # Same search, other case, spacing and parameter order.
+        self.assertEqual(self.search('?location=%20MUMBAI&skill=Cook%20')[1], 0)
+        after = resultcache.counters()
+        self.assertEqual(after['jobs', 'miss'] - before['jobs', 'miss'], 1)
+        self.assertEqual(after['jobs', 'hit'] - before['jobs', 'hit'], 1)
+
+    def test_job_changes_invalidate_results(self):
+        self.search('?skill=cook')
+        job = Job.objects.create(employer=self.employer, title='Cook', salary='10000', location='Delhi')
+        job.required_skills.add(self.skill)
+        locations, _ = self.search('?skill=cook')
+        self.assertIn('Delhi', locations)
+
+    def test_metrics_endpoint(self):
+        self.search('?skill=cook')
+        response = self.client.get(reverse('metrics'))
+        self.assertContains(response, 'result_cache_lookups_total{scope="jobs",outcome="miss"}')
+
+    @override_settings(RESULT_CACHE_MAX_IDS=1)
+    def test_oversize_results_are_filtered_by_subquery(self):
+        # Earlier tests cached this search under the same versions.
+        caches[settings.RESULT_CACHE_ALIAS].clear()
+        before = resultcache.counters()
+        for _ in range(2):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('job_list') + '?skill=cook')
+            self.assertEqual(sorted(job.location for job in response.context['jobs']), ['Mumbai', 'Pune'])
+            # The search runs inside the page query rather than as a separate id fetch.
+            self.assertTrue(any('IN (SELECT' in query['sql'] for query in queries))
+        after = resultcache.counters()
+        self.assertEqual(after['jobs', 'miss'] - before['jobs', 'miss'], 1)
+        self.assertEqual(after['jobs', 'oversize'] - before['jobs', 'oversize'], 2)
+
+
+@override_settings(EXPORT_CHUNK_SIZE=2)
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        skills = [Skill.objects.create(name=name) for name in ('Cooking', 'Driving')]
+        employer = create_employer()
+        for i in range(5):
+            job = Job.objects.create(employer=employer, title=f'Job {i}', salary='10000', location='Pune')
+            job.required_skills.set(skills[:i % 3])
+        create_user('admin', CustomUser.ADMIN)
+
+    def test_streams_csv_with_skills(self):
+        self.client.login(username='admin', password='password')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('export', args=['jobs', 'csv']))
+            rows = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(rows[0].split(',')[:2], ['id', 'title'])
+        self.assertEqual([row.rsplit(',', 1)[1] for row in rows[1:]], ['', 'Cooking', 'Cooking;Driving', '', 'Cooking'])
+        # Three chunks of rows, each with one skills query.
+        self.assertLessEqual(len([query for query in queries if 'core_skill' in query['sql']]), 3)
+
+    def test_admin_only(self):
+        self.client.login(username='employer', password='password')
+        self.assertEqual(self.client.get(reverse('export', args=['jobs', 'ndjson'])).status_code, 403)
+
+    def test_exports_must_set_a_queryset(self):
+        with self.assertRaises(TypeError):
+            type('NoQuerysetExport', (exports.Export,), {'columns': (('id', 'pk'),)})
 
-# Create your tests here.
@@ -1,7 +1,12 @@
 from django.urls import path
-from .views import HomeView, DashboardView
+from .views import HomeView, DashboardView, DashboardChartView, DashboardChartDataView, DashboardTrendView, ExportView, MetricsView
 
 urlpatterns = [
     path('', HomeView.as_view(), name='home'),
     path('dashboard/', DashboardView.as_view(), name='dashboard'),
+    path('dashboard/charts/<slug:name>.png', DashboardChartView.as_view(), name='dashboard_chart'),
+    path('dashboard/charts.json', DashboardChartDataView.as_view(), name='dashboard_chart_data'),
+    path('dashboard/trends.json', DashboardTrendView.as_view(), name='dashboard_trends'),
+    path('metrics', MetricsView.as_view(), name='metrics'),
+    path('exports/<slug:name>.<slug:format>', ExportView.as_view(), name='export'),
 ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.13 on 2026-10-18 08:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0002_employeeprofile_place'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='employeeprofile',
+            name='location',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+    ]
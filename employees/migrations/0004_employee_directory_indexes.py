@@ -0,0 +1,21 @@
+# Generated by Django 4.1.13 on 2026-10-18 08:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0003_alter_employeeprofile_location'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employeeprofile',
+            index=models.Index(fields=['name', 'id'], name='employees_e_name_f35d16_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employeeprofile',
+            index=models.Index(fields=['-experience_years', '-id'], name='employees_e_experie_7be65f_idx'),
+        ),
+    ]
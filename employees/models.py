@@ -9,7 +9,15 @@ class EmployeeProfile(models.Model):
     skills = models.ManyToManyField(Skill, blank=True)
     experience_years = models.IntegerField(default=0)
     phone = models.CharField(max_length=20)
-    location = models.CharField(max_length=100)
+    location = models.CharField(max_length=100, db_index=True)
+    place = models.ForeignKey('core.Place', on_delete=models.SET_NULL, null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Keyset orders of the employee directory.
+            models.Index(fields=['name', 'id']),
+            models.Index(fields=['-experience_years', '-id']),
+        ]
 
     def __str__(self):
         return self.name
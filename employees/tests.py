@@ -1,3 +1,117 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import CustomUser
+from core.models import Skill
+from core.testing import create_employee, create_employer
+from employees.views import MatchingJobsView
+from jobs.models import Job
+
+
+class EmployeeDirectoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        skill = Skill.objects.create(name='Driving')
+        for i in range(5):
+            employee = create_employee(f'employee{i}')
+            employee.name = f'Driver {4 - i}'
+            employee.age = 30
+            employee.location = 'Pune' if i % 2 else 'Delhi'
+            employee.save()
+            if i < 3:
+                employee.skills.add(skill)
+
+    def setUp(self):
+        self.client.login(username='employee0', password='password')
+
+    def test_pages_through_filtered_results_in_sort_order(self):
+        names, after = [], ''
+        while True:
+            response = self.client.get(reverse('employee_directory'), {
+                'q': 'delhi', 'sort': 'name', 'fields': 'name', 'limit': 2, 'after': after,
+            })
+            page = response.json()
+            names += [result['name'] for result in page['results']]
+            self.assertEqual({field for result in page['results'] for field in result}, {'name'})
+            if not page['next']:
+                break
+            after = page['next']
+        self.assertEqual(names, ['Driver 0', 'Driver 2', 'Driver 4'])
+
+    def test_unchanged_results_revalidate(self):
+        url = reverse('employee_directory') + '?q=driving'
+        response = self.client.get(url)
+        self.assertEqual(len(response.json()['results']), 3)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        CustomUser.objects.get(username='employee4').employee_profile.skills.add(Skill.objects.get())
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_login_keeps_the_etag_and_profile_changes_drop_it(self):
+        url = reverse('employee_directory') + '?q=driving&fields=name,phone'
+        etag = self.client.get(url)['ETag']
+        self.client.login(username='employee1', password='password')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        employee = CustomUser.objects.get(username='employee1').employee_profile
+        employee.phone = '555-0100'
+        employee.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+
+@override_settings(MATCH_DEFAULT_RADIUS_KM=50)
+class MatchingJobsViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        employer = create_employer()
+        employee = create_employee()
+        employee.location = 'Bombay'
+        employee.save()
+        for location in ('Andheri, Mumbai', 'Thane', 'Poona', 'Delhi'):
+            Job.objects.create(employer=employer, title=location, salary='10000', location=location)
+
+    def setUp(self):
+        self.client.login(username='employee', password='password')
+
+    def titles(self, **params):
+        response = self.client.get(reverse('matching_jobs'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.context['radius'], {job.title for job in response.context['jobs']}
+
+    def test_radius_limits_the_matches(self):
+        nearby = {'Andheri, Mumbai', 'Thane'}
+        self.assertEqual(self.titles(), (50, nearby))
+        self.assertEqual(self.titles(radius=200), (200, nearby | {'Poona'}))
+        self.assertEqual(self.titles(radius='any'), (None, nearby | {'Poona', 'Delhi'}))
+
+    def test_invalid_radius_keeps_the_default(self):
+        for radius in ('abc', '-5', '0', '', '2.5'):
+            with self.subTest(radius=radius):
+                self.assertEqual(self.titles(radius=radius), (50, {'Andheri, Mumbai', 'Thane'}))
+
+    def test_pages_and_clamped_limits(self):
+        employer = Job.objects.first().employer
+        for i in range(22):
+            Job.objects.create(employer=employer, title=f'Mumbai {i}', salary='10000', location='Mumbai')
+        # 24 nearby jobs, 20 to a page by default.
+        url = reverse('matching_jobs')
+
+        def page(**params):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            return response.context['page_obj'].number, len(response.context['jobs'])
+
+        self.assertEqual(page(), (1, 20))
+        self.assertEqual(page(page=2), (2, 4))
+        self.assertEqual(page(page='last'), (2, 4))
+        self.assertEqual(page(limit=5, page=5), (5, 4))
+        for limit, size in (('abc', 20), ('0', 1), ('-3', 1), ('24', 24)):
+            with self.subTest(limit=limit):
+                self.assertEqual(page(limit=limit), (1, size))
+        with mock.patch.object(MatchingJobsView, 'max_paginate_by', 10):
+            self.assertEqual(page(limit=1000, page=3), (3, 4))
+        for number in ('3', '0', 'abc'):
+            with self.subTest(page=number):
+                self.assertEqual(self.client.get(url, {'page': number}).status_code, 404)
+        self.assertEqual(self.client.get(url, {'page': 2, 'limit': 1000}).status_code, 404)
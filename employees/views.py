@@ -1,8 +1,19 @@
+import hashlib
 from django.views.generic import ListView, DetailView, CreateView, UpdateView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
 from .models import EmployeeProfile
 from jobs.models import Job
+from core.matching import cached_matches
+from core.caching import get_versions
+from core.pagination import KeysetPaginationMixin, paginate_keyset
+from core.resultcache import SCOPES, result_ids
+from core.search import search, search_filter
 
 class EmployeeProfileUpdateView(LoginRequiredMixin, UpdateView):
     model = EmployeeProfile
@@ -13,74 +24,163 @@ class EmployeeProfileUpdateView(LoginRequiredMixin, UpdateView):
     def get_object(self, queryset=None):
         return self.request.user.employee_profile
 
+    # The profile and its skills commit together, so their score refreshes run as one.
+    @transaction.atomic
+    def form_valid(self, form):
+        return super().form_valid(form)
+
 class EmployeeCreateView(LoginRequiredMixin, CreateView):
     model = EmployeeProfile
     fields = ['name', 'age', 'skills', 'experience_years', 'phone', 'location']
     template_name = 'employees/profile_form.html'
     success_url = reverse_lazy('dashboard')
 
+    @transaction.atomic
     def form_valid(self, form):
+        # See EmployeeProfileUpdateView.
         form.instance.user = self.request.user
         return super().form_valid(form)
 
-class EmployeeListView(LoginRequiredMixin, ListView):
+class EmployeeListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = EmployeeProfile
     template_name = 'employees/employee_list.html'
     context_object_name = 'employees'
-    
+    keyset = ('pk',)
+
+    filters = ('q', 'skill', 'location')
+
     def get_queryset(self):
-        # Implement search here
-        queryset = super().get_queryset()
-        skill_query = self.request.GET.get('skill')
-        location_query = self.request.GET.get('location')
-        
+        queryset = super().get_queryset().prefetch_related('skills')
+        # See JobListView: matching ids are cached per normalized filter set.
+        ids = result_ids('employees', self.request.GET, self.filters, self.filter_employees)
+        if ids is not None:
+            queryset = queryset.filter(pk__in=ids)
+        return queryset
+
+    def filter_employees(self, params):
+        queryset = EmployeeProfile.objects.all()
+        query = params.get('q')
+        skill_query = params.get('skill')
+        location_query = params.get('location')
+
+        # See JobListView: indexed lookups on values or ids resolved by core.search.
+        if query:
+            # Name, skill or location.
+            links = EmployeeProfile.skills.through.objects.filter(skill__name__in=search('skill', query))
+            queryset = queryset.filter(
+                search_filter('name', query)
+                | Q(location__in=search('location', query))
+                | Q(pk__in=links.values('employeeprofile_id'))
+            )
         if skill_query:
-            queryset = queryset.filter(skills__name__icontains=skill_query)
+            links = EmployeeProfile.skills.through.objects.filter(skill__name__in=search('skill', skill_query))
+            queryset = queryset.filter(pk__in=links.values('employeeprofile_id'))
         if location_query:
-            queryset = queryset.filter(location__icontains=location_query)
-            
-        return queryset.distinct()
+            queryset = queryset.filter(location__in=search('location', location_query))
+
+        return queryset
+
+class EmployeeDirectoryView(EmployeeListView):
+    """
+    The employee list as JSON, for loading results as the user types or
+    scrolls. Takes the list filters plus ``?sort=`` (one of ``sorts``),
+    ``?fields=`` (a comma-separated subset of ``directory_fields``) and the
+    list's ``?after=``/``?before=``/``?limit=``.
+    """
+    sorts = {
+        'id': ('pk',),
+        'name': ('name', 'pk'),
+        'experience': ('-experience_years', '-pk'),
+        'recent': ('-pk',),
+    }
+    default_sort = 'name'
+    directory_fields = ('id', 'name', 'age', 'experience_years', 'location', 'phone', 'skills')
+
+    def get_keyset(self):
+        return self.sorts.get(self.request.GET.get('sort'), self.sorts[self.default_sort])
+
+    def get_fields(self):
+        requested = self.request.GET.get('fields', '').split(',')
+        return [field for field in self.directory_fields if field in requested] or list(self.directory_fields)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_fields()
+        if 'skills' not in fields:
+            queryset = queryset.prefetch_related(None)
+        keyset_fields = [ordering.lstrip('-') for ordering in self.get_keyset()]
+        return queryset.only(*{field for field in fields + keyset_fields if field not in ('id', 'pk', 'skills')})
+
+    def get(self, request, *args, **kwargs):
+        # Everything in a response derives from the query string, the
+        # versions its results are cached under and the profiles shown.
+        versions = get_versions(*SCOPES['employees'], 'employee_profiles')
+        digest = hashlib.sha1(f'{versions}:{request.GET.urlencode()}'.encode('utf-8')).hexdigest()
+        etag = f'"{digest}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            page = paginate_keyset(
+                self.get_queryset(), self.get_keyset(), self.get_page_size(),
+                after=request.GET.get('after'), before=request.GET.get('before'),
+            )
+            fields = self.get_fields()
+            data = {
+                'results': [self.serialize(employee, fields) for employee in page.object_list],
+                'next': page.next_cursor,
+                'previous': page.previous_cursor,
+            }
+            response = JsonResponse(data, json_dumps_params={'separators': (',', ':')})
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, max_age=settings.EMPLOYEE_DIRECTORY_MAX_AGE)
+        return response
+
+    def serialize(self, employee, fields):
+        data = {}
+        for field in fields:
+            if field == 'skills':
+                data[field] = [skill.name for skill in employee.skills.all()]
+            else:
+                data[field] = getattr(employee, field)
+        return data
 
 class MatchingJobsView(LoginRequiredMixin, ListView):
     model = Job
     template_name = 'employees/matching_jobs.html'
     context_object_name = 'jobs'
+    paginate_by = 20
+    max_paginate_by = 100
+    radius_choices = (10, 25, 50, 100, 250)
+
+    def get_radius(self):
+        """Kilometres from ``?radius=``: None for ``any``, the default unless a positive whole number."""
+        radius = self.request.GET.get('radius')
+        if radius == 'any':
+            return None
+        try:
+            radius = int(radius)
+        except (TypeError, ValueError):
+            return settings.MATCH_DEFAULT_RADIUS_KM
+        return radius if radius > 0 else settings.MATCH_DEFAULT_RADIUS_KM
+
+    def get_paginate_by(self, queryset):
+        try:
+            limit = int(self.request.GET.get('limit', self.paginate_by))
+        except ValueError:
+            limit = self.paginate_by
+        return max(1, min(limit, self.max_paginate_by))
 
     def get_queryset(self):
         user = self.request.user
         if not hasattr(user, 'employee_profile'):
             return Job.objects.none()
-        
-        employee = user.employee_profile
-        employee_skills = set(employee.skills.all())
-        
-        jobs = Job.objects.all()
-        matched_jobs = []
-        
-        for job in jobs:
-            job_skills = set(job.required_skills.all())
-            if not job_skills:
-                skill_match = 100
-            else:
-                matching_skills = employee_skills.intersection(job_skills)
-                skill_match = (len(matching_skills) / len(job_skills)) * 100
-            
-            # Experience Match
-            if employee.experience_years >= job.experience_required:
-                exp_match = 100
-            else:
-                if job.experience_required > 0:
-                    exp_match = (employee.experience_years / job.experience_required) * 100
-                else:
-                    exp_match = 100
-            
-            total_score = (skill_match * 0.7) + (exp_match * 0.3)
-            
-            job.match_score = round(total_score, 1)
-            job.skill_gap = job_skills - employee_skills
-            job.skill_match_percent = round(skill_match, 1)
-            job.exp_match_percent = round(exp_match, 1)
-            
-            matched_jobs.append(job)
-            
-        return sorted(matched_jobs, key=lambda x: x.match_score, reverse=True)
+
+        return cached_matches(user.employee_profile, radius_km=self.get_radius())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.copy()
+        query.pop('page', None)
+        context['filter_query'] = query.urlencode()
+        context['radius'] = self.get_radius()
+        context['radius_choices'] = self.radius_choices
+        return context
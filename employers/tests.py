@@ -1,3 +1,27 @@
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from core.testing import create_employer
+
+
+class EmployerListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(25):
+            employer = create_employer(f'employer{i}')
+            employer.company_name = f'Builders {i}' if i % 2 else f'Bakery {i}'
+            employer.location = 'Pune'
+            employer.save()
+        cls.bakeries = sorted(f'Bakery {i}' for i in range(0, 25, 2))
+
+    def test_search_covers_every_page(self):
+        self.client.login(username='employer0', password='password')
+        names, query = [], '?q=BAKERY&limit=5'
+        while query is not None:
+            response = self.client.get(reverse('employer_list') + query)
+            page = response.context['keyset_page']
+            names.extend(employer.company_name for employer in page)
+            # Cursor links keep the search.
+            query = f"?after={page.next_cursor}&{response.context['filter_query']}" if page.has_next else None
+        self.assertEqual(sorted(names), self.bakeries)
+        self.assertEqual(len(self.client.get(reverse('employer_list') + '?q=pune&limit=100').context['employers']), 25)
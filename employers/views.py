@@ -1,7 +1,9 @@
 from django.views.generic import ListView, DetailView, CreateView, UpdateView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
+from django.db.models import Q
 from .models import EmployerProfile
+from core.pagination import KeysetPaginationMixin
 
 class EmployerProfileUpdateView(LoginRequiredMixin, UpdateView):
     model = EmployerProfile
@@ -22,7 +24,17 @@ class EmployerCreateView(LoginRequiredMixin, CreateView):
         form.instance.user = self.request.user
         return super().form_valid(form)
 
-class EmployerListView(LoginRequiredMixin, ListView):
+class EmployerListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = EmployerProfile
     template_name = 'employers/employer_list.html'
     context_object_name = 'employers'
+    keyset = ('pk',)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # Company name or location. Filtered here rather than in the page, so
+        # the search covers every page; the cursor links carry ?q= along.
+        query = self.request.GET.get('q', '').strip()
+        if query:
+            queryset = queryset.filter(Q(company_name__icontains=query) | Q(location__icontains=query))
+        return queryset
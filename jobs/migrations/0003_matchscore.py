@@ -0,0 +1,73 @@
+# Generated by Django 4.1.13 on 2026-10-18 08:11
+
+from collections import defaultdict
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def score_existing_pairs(apps, schema_editor):
+    # Stored scores are read as soon as an employee has any, so every existing
+    # pair is scored here. Same formula as core.scoring, copied so that this
+    # migration keeps working however the live code changes.
+    Job = apps.get_model('jobs', 'Job')
+    EmployeeProfile = apps.get_model('employees', 'EmployeeProfile')
+    MatchScore = apps.get_model('jobs', 'MatchScore')
+
+    job_skills = defaultdict(set)
+    for job_id, skill_id in Job.required_skills.through.objects.values_list('job_id', 'skill_id'):
+        job_skills[job_id].add(skill_id)
+    jobs = [(pk, required, job_skills[pk]) for pk, required in Job.objects.values_list('pk', 'experience_required')]
+    employee_skills = defaultdict(set)
+    for employee_id, skill_id in EmployeeProfile.skills.through.objects.values_list('employeeprofile_id', 'skill_id'):
+        employee_skills[employee_id].add(skill_id)
+
+    rows = []
+    for employee_id, experience in EmployeeProfile.objects.values_list('pk', 'experience_years').iterator():
+        skills = employee_skills[employee_id]
+        for job_id, experience_required, required_skills in jobs:
+            skill_match = (len(required_skills & skills) / len(required_skills)) * 100 if required_skills else 100.0
+            if experience >= experience_required or experience_required <= 0:
+                exp_match = 100.0
+            else:
+                exp_match = (experience / experience_required) * 100
+            rows.append(MatchScore(
+                employee_id=employee_id, job_id=job_id, skill_match=skill_match, exp_match=exp_match,
+                score=(skill_match * 0.7) + (exp_match * 0.3),
+            ))
+            if len(rows) >= 1000:
+                MatchScore.objects.bulk_create(rows)
+                rows = []
+    MatchScore.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0001_initial'),
+        ('jobs', '0002_job_filled_at_job_filled_by'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('skill_match', models.FloatField()),
+                ('exp_match', models.FloatField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='match_scores', to='employees.employeeprofile')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='match_scores', to='jobs.job')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='matchscore',
+            index=models.Index(fields=['employee', '-score'], name='jobs_matchs_employe_11213b_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='matchscore',
+            unique_together={('employee', 'job')},
+        ),
+        migrations.RunPython(score_existing_pairs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.1.13 on 2026-10-18 08:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def resolve_places(apps, schema_editor):
+    from core.gazetteer import resolve_place_id
+    PlaceName = apps.get_model('core', 'PlaceName')
+    Job = apps.get_model('jobs', 'Job')
+    for obj in Job.objects.all():
+        obj.place_id = resolve_place_id(PlaceName, obj.location)
+        if obj.place_id is not None:
+            obj.save(update_fields=['place'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_place_placename'),
+        ('jobs', '0003_matchscore'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='place',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.place'),
+        ),
+        migrations.RunPython(resolve_places, migrations.RunPython.noop),
+    ]
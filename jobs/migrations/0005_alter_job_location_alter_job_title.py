@@ -0,0 +1,23 @@
+# Generated by Django 4.1.13 on 2026-10-18 08:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0004_job_place'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='location',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='job',
+            name='title',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+    ]
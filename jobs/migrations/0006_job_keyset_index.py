@@ -0,0 +1,17 @@
+# Generated by Django 4.1.13 on 2026-10-18 08:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0005_alter_job_location_alter_job_title'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['-created_at', '-id'], name='jobs_job_created_f3f2db_idx'),
+        ),
+    ]
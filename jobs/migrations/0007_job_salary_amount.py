@@ -0,0 +1,43 @@
+# Generated by Django 4.1.13 on 2026-10-18 14:02
+
+import re
+
+from django.db import migrations, models
+
+
+SALARY = re.compile(r'(\d[\d,]*(?:\.\d+)?)\s*([kK])?')
+
+
+def parse_salary(text):
+    # A copy of core.facets.parse_salary as it stood when this was written.
+    match = SALARY.search(text or '')
+    if not match:
+        return None
+    amount = float(match.group(1).replace(',', ''))
+    return int(amount * 1000 if match.group(2) else amount)
+
+
+def parse_salaries(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    parsed = []
+    for obj in Job.objects.only('salary').iterator():
+        obj.salary_amount = parse_salary(obj.salary)
+        if obj.salary_amount is not None:
+            parsed.append(obj)
+    Job.objects.bulk_update(parsed, ['salary_amount'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0006_job_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='salary_amount',
+            field=models.IntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(parse_salaries, migrations.RunPython.noop),
+    ]
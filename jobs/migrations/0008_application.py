@@ -0,0 +1,36 @@
+# Generated by Django 4.1.13 on 2026-10-18 08:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0004_employee_directory_indexes'),
+        ('jobs', '0007_job_salary_amount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Application',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('accepted', 'Accepted'), ('rejected', 'Rejected')], default='pending', max_length=10)),
+                ('claim', models.CharField(blank=True, max_length=32)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('decided_at', models.DateTimeField(blank=True, null=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='applications', to='employees.employeeprofile')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='applications', to='jobs.job')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['status', 'id'], name='jobs_applic_status_f4621e_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='application',
+            unique_together={('job', 'employee')},
+        ),
+    ]
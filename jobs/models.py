@@ -1,17 +1,117 @@
 from django.db import models
+from django.db.models import Case, Value, When
+from django.dispatch import Signal
+from django.utils import timezone
 from employers.models import EmployerProfile
 from core.models import Skill
 
+# Sent by fill_jobs(), whose update() sends no post_save, with fills
+# ({job_id: employee_id} of the jobs it filled) and filled_at.
+jobs_filled = Signal()
+
 class Job(models.Model):
     employer = models.ForeignKey(EmployerProfile, on_delete=models.CASCADE, related_name='jobs')
-    title = models.CharField(max_length=100)
+    title = models.CharField(max_length=100, db_index=True)
     required_skills = models.ManyToManyField(Skill, blank=True)
     experience_required = models.IntegerField(default=0)
     salary = models.CharField(max_length=50)
-    location = models.CharField(max_length=100)
+    salary_amount = models.IntegerField(null=True, blank=True, editable=False, db_index=True)
+    location = models.CharField(max_length=100, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     filled_by = models.ForeignKey('employees.EmployeeProfile', on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs_taken')
     filled_at = models.DateTimeField(null=True, blank=True)
+    place = models.ForeignKey('core.Place', on_delete=models.SET_NULL, null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination order of the job list.
+            models.Index(fields=['-created_at', '-id']),
+        ]
 
     def __str__(self):
         return self.title
+
+def fill_job(job_id, employee):
+    """
+    Fill job ``job_id`` with ``employee`` if it is still open, in one
+    conditional UPDATE. Returns whether this call filled it; when several
+    applicants race, exactly one wins.
+    """
+    return job_id in fill_jobs({job_id: employee})
+
+def fill_jobs(fills):
+    """
+    Fill each job in ``{job_id: employee}`` that is still open, in one
+    conditional UPDATE. Returns the ids of the jobs this call filled.
+    """
+    if not fills:
+        return set()
+    now = timezone.now()
+    # Millisecond precision, so the re-read below matches on every backend.
+    filled_at = now.replace(microsecond=now.microsecond // 1000 * 1000)
+    employee_ids = {job_id: employee.pk for job_id, employee in fills.items()}
+    count = Job.objects.filter(pk__in=employee_ids, filled_by__isnull=True).update(
+        filled_by=Case(
+            *[When(pk=job_id, then=Value(employee_id)) for job_id, employee_id in employee_ids.items()],
+            output_field=models.BigIntegerField(),
+        ),
+        filled_at=filled_at,
+    )
+    if not count:
+        return set()
+    if count < len(employee_ids):
+        # Some were filled already; keep the ones this UPDATE wrote.
+        written = Job.objects.filter(pk__in=employee_ids, filled_at=filled_at).values_list('pk', 'filled_by_id')
+        employee_ids = {job_id: employee_id for job_id, employee_id in written if employee_ids[job_id] == employee_id}
+    if employee_ids:
+        jobs_filled.send(sender=Job, fills=employee_ids, filled_at=filled_at)
+    return set(employee_ids)
+
+class Application(models.Model):
+    # Queued by JobApplyView and decided in batches by the
+    # process_applications worker (see core.applications).
+    PENDING = 'pending'
+    PROCESSING = 'processing'
+    ACCEPTED = 'accepted'
+    REJECTED = 'rejected'
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (PROCESSING, 'Processing'),
+        (ACCEPTED, 'Accepted'),
+        (REJECTED, 'Rejected'),
+    )
+
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='applications')
+    employee = models.ForeignKey('employees.EmployeeProfile', on_delete=models.CASCADE, related_name='applications')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    claim = models.CharField(max_length=32, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    decided_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('job', 'employee')
+        indexes = [
+            # The queue: pending applications in arrival order.
+            models.Index(fields=['status', 'id']),
+        ]
+
+    def __str__(self):
+        return f'{self.employee} -> {self.job}: {self.status}'
+
+class MatchScore(models.Model):
+    employee = models.ForeignKey('employees.EmployeeProfile', on_delete=models.CASCADE, related_name='match_scores')
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='match_scores')
+    score = models.FloatField()
+    skill_match = models.FloatField()
+    exp_match = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('employee', 'job')
+        indexes = [
+            models.Index(fields=['employee', '-score']),
+        ]
+
+    def __str__(self):
+        return f'{self.employee} / {self.job}: {self.score:.1f}'
@@ -0,0 +1,86 @@
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save
+from django.dispatch import receiver
+from .models import Job, jobs_filled
+from employees.models import EmployeeProfile
+from core.caching import bump_version
+from core.matching import refresh_scores_on_commit
+
+# Stored match scores only depend on skills and experience, and cached match
+# lists on those plus the location (which sets the radius), so other saves
+# are skipped. The 'employees' version covers cached employee searches, so it
+# only moves with the fields they filter on (name, location and skills);
+# 'employee_profiles' moves with any profile field, for the directory pages
+# that show them all. A save that changes nothing bumps nothing.
+PROFILE_FIELDS = ('name', 'age', 'experience_years', 'phone', 'location')
+SEARCHED_FIELDS = {'name', 'location'}
+
+def _profile_state(profile):
+    return {name: profile.__dict__.get(name) for name in PROFILE_FIELDS}
+
+@receiver(post_init, sender=Job)
+def remember_job_experience(sender, instance, **kwargs):
+    instance._stored_experience = instance.__dict__.get('experience_required')
+
+@receiver(post_init, sender=EmployeeProfile)
+def remember_employee_state(sender, instance, **kwargs):
+    instance._stored_state = _profile_state(instance)
+
+@receiver(post_save, sender=Job)
+def update_job_scores(sender, instance, created, **kwargs):
+    # Queued, so a new job and the skills saved right after it are scored once.
+    if created or instance.experience_required != instance._stored_experience:
+        refresh_scores_on_commit(jobs=[instance.pk])
+    instance._stored_experience = instance.experience_required
+    bump_version('jobs')
+
+@receiver(post_save, sender=EmployeeProfile)
+def update_employee_scores(sender, instance, created, **kwargs):
+    state = _profile_state(instance)
+    changed = set(PROFILE_FIELDS) if created else {
+        name for name, value in state.items() if value != instance._stored_state[name]
+    }
+    instance._stored_state = state
+    if 'experience_years' in changed:
+        refresh_scores_on_commit(employees=[instance.pk])
+    if changed & {'experience_years', 'location'}:
+        bump_version(f'employee:{instance.pk}')
+    if changed & SEARCHED_FIELDS:
+        bump_version('employees', 'employee_profiles')
+    elif changed:
+        bump_version('employee_profiles')
+
+@receiver(jobs_filled)
+def invalidate_filled_jobs(sender, fills, **kwargs):
+    bump_version('jobs')
+
+@receiver(post_delete, sender=Job)
+def invalidate_job_matches(sender, instance, **kwargs):
+    bump_version('jobs')
+
+@receiver(post_delete, sender=EmployeeProfile)
+def invalidate_employee_matches(sender, instance, **kwargs):
+    bump_version(f'employee:{instance.pk}', 'employees', 'employee_profiles')
+
+def _changed_owners(instance, reverse, pk_set):
+    """Primary keys of the jobs/profiles whose skills an m2m change touched."""
+    if not reverse:
+        return {instance.pk}
+    # A reverse clear sends no pk_set, so the owners are captured on pre_clear.
+    return set(pk_set or ()) | instance.__dict__.pop('_cleared_skill_owners', set())
+
+@receiver(m2m_changed, sender=Job.required_skills.through)
+def update_scores_on_required_skills(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        instance._cleared_skill_owners = set(instance.job_set.values_list('pk', flat=True))
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        refresh_scores_on_commit(jobs=_changed_owners(instance, reverse, pk_set))
+        bump_version('jobs')
+
+@receiver(m2m_changed, sender=EmployeeProfile.skills.through)
+def update_scores_on_employee_skills(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        instance._cleared_skill_owners = set(instance.employeeprofile_set.values_list('pk', flat=True))
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        owners = _changed_owners(instance, reverse, pk_set)
+        refresh_scores_on_commit(employees=owners)
+        bump_version(*[f'employee:{pk}' for pk in owners], 'employees', 'employee_profiles')
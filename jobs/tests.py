@@ -1,3 +1,382 @@
-from django.test import TestCase
+import random
+from fractions import Fraction
+from importlib import import_module
+from unittest import mock
 
-# Create your tests here.
+from datetime import timedelta
+
+from django.apps import apps
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core import applications, stats
+from core.caching import get_versions
+from core.matching import (
+    SkillMatrix, cached_matches, match_jobs, rank_candidates, refresh_job_scores, stored_matches,
+)
+from core.models import Skill
+from core.scoring import score
+from core.testing import QueryBudgetTestMixin, create_employee, create_employer
+from employees.models import EmployeeProfile
+from jobs.models import Application, Job, MatchScore, fill_job, fill_jobs
+
+
+def reference_score(employee_skills, experience, job_skills, experience_required):
+    """``(skill_match, exp_match, total)`` by the per-job loop the views used before the bitset engine."""
+    if not job_skills:
+        skill_match = 100
+    else:
+        skill_match = (len(employee_skills & job_skills) / len(job_skills)) * 100
+    if experience >= experience_required:
+        exp_match = 100
+    elif experience_required > 0:
+        exp_match = (experience / experience_required) * 100
+    else:
+        exp_match = 100
+    return skill_match, exp_match, (skill_match * 0.7) + (exp_match * 0.3)
+
+
+class BitsetScoringTests(SimpleTestCase):
+    def test_matches_the_per_job_formula(self):
+        rng = random.Random(0)
+        for case in range(300):
+            # Skill ids up to 200 span several 64-bit words.
+            employee_skills = set(rng.sample(range(1, 200), rng.randint(0, 8)))
+            experience = rng.randint(0, 12)
+            jobs = [(set(rng.sample(range(1, 200), rng.randint(0, 6))), rng.randint(0, 10)) for _ in range(5)]
+            employee = SkillMatrix.build([(1, experience)], [(1, skill) for skill in employee_skills])
+            catalogue = SkillMatrix.build(
+                [(pk, required) for pk, (_, required) in enumerate(jobs, 1)],
+                [(pk, skill) for pk, (skills, _) in enumerate(jobs, 1) for skill in skills],
+            )
+            got = score(employee.bits[0], employee.experience[0], catalogue.bits, catalogue.experience)
+            for position, (skills, required) in enumerate(jobs):
+                expected = reference_score(employee_skills, experience, skills, required)
+                with self.subTest(case=case, job=position):
+                    for got_values, value in zip(got, expected):
+                        self.assertAlmostEqual(float(got_values[position]), value)
+
+
+class MatchJobsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        skills = [Skill.objects.create(name=f'Skill {i}') for i in range(5)]
+        employer = create_employer()
+        cls.employee = create_employee()
+        cls.employee.experience_years = 3
+        cls.employee.save()
+        cls.employee.skills.set(skills[:2])
+        for i in range(12):
+            job = Job.objects.create(
+                employer=employer, title=f'Job {i}', experience_required=i % 5,
+                salary='10000', location='Pune',
+            )
+            job.required_skills.set(skills[i % 3:i % 3 + i % 4])
+
+    def test_ranks_like_the_per_job_formula(self):
+        employee_skills = set(self.employee.skills.all())
+        expected = []
+        for job in Job.objects.prefetch_related('required_skills'):
+            job_skills = set(job.required_skills.all())
+            skill_match, _, total = reference_score(
+                employee_skills, self.employee.experience_years, job_skills, job.experience_required,
+            )
+            expected.append((-round(total, 1), job.pk, round(skill_match, 1), job_skills - employee_skills))
+        expected.sort()
+
+        ranked = [
+            (-job.match_score, job.pk, job.skill_match_percent, set(job.skill_gap))
+            for job in match_jobs(self.employee)
+        ]
+        self.assertEqual(ranked, expected)
+
+
+class StoredMatchScoreTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.skills = [Skill.objects.create(name=f'Skill {i}') for i in range(3)]
+        cls.employer = create_employer()
+        cls.employee = create_employee()
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.employee.skills.set(cls.skills[:2])
+        for i in range(5):
+            cls.post_job(i, cls.skills[i % 3:])
+
+    @classmethod
+    def post_job(cls, i, skills):
+        # Scores are refreshed when the job and its skills are committed.
+        with cls.captureOnCommitCallbacks(execute=True):
+            job = Job.objects.create(
+                employer=cls.employer, title=f'Job {i}', experience_required=i % 3, salary='10000', location='Pune',
+            )
+            job.required_skills.set(skills)
+        return job
+
+    def assertStoredMatchesScored(self):
+        """The stored ranking is the in-memory one, job for job."""
+        def ranking(matches):
+            return [(job.pk, job.match_score, job.skill_match_percent, job.exp_match_percent) for job in matches]
+        self.assertEqual(ranking(stored_matches(self.employee)), ranking(match_jobs(self.employee)))
+
+    def test_signals_keep_scores_current(self):
+        job = self.post_job(5, [])
+        self.assertStoredMatchesScored()
+        with self.captureOnCommitCallbacks(execute=True):
+            job.required_skills.add(self.skills[2])
+            job.experience_required = 4
+            job.save()
+        self.assertStoredMatchesScored()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.employee.skills.remove(self.skills[0])
+            self.employee.experience_years = 2
+            self.employee.save()
+        self.assertStoredMatchesScored()
+        self.assertEqual(MatchScore.objects.filter(employee=self.employee).count(), 6)
+
+    def test_migration_scores_existing_pairs(self):
+        # Jobs and employees from before scores were stored.
+        MatchScore.objects.all().delete()
+        import_module('jobs.migrations.0003_matchscore').score_existing_pairs(apps, None)
+        self.assertStoredMatchesScored()
+        # A new job adds its own scores without hiding the older matches.
+        self.post_job(5, self.skills[:1])
+        self.assertEqual(len(stored_matches(self.employee)), 6)
+        self.assertStoredMatchesScored()
+
+    def test_posting_a_job_scores_it_once(self):
+        self.client.login(username='employer', password='password')
+        with mock.patch('core.matching.refresh_job_scores', wraps=refresh_job_scores) as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(reverse('create_job'), {
+                    'title': 'Job 5', 'required_skills': [skill.pk for skill in self.skills[1:]],
+                    'experience_required': 1, 'salary': '10000', 'location': 'Pune',
+                })
+        self.assertEqual(response.status_code, 302)
+        refresh.assert_called_once()
+        self.assertStoredMatchesScored()
+
+    def test_employee_changes_leave_filled_jobs_alone(self):
+        taken, other = Job.objects.order_by('pk')[:2]
+        fill_jobs({taken.pk: self.employee, other.pk: create_employee('other')})
+        placement = MatchScore.objects.get(job=taken, employee=self.employee)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.employee.experience_years = 5
+            self.employee.save()
+        self.assertEqual(MatchScore.objects.get(job=taken, employee=self.employee), placement)
+        self.assertTrue(MatchScore.objects.filter(employee=self.employee, job__filled_by__isnull=True).exists())
+        self.assertStoredMatchesScored()
+
+
+class MatchCacheInvalidationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.skill = Skill.objects.create(name='Cooking')
+        cls.employer = create_employer()
+        cls.employee = create_employee()
+        cls.post_job()
+
+    @classmethod
+    def post_job(cls):
+        job = Job.objects.create(employer=cls.employer, title='Cook', salary='10000', location='Pune')
+        job.required_skills.add(cls.skill)
+        return job
+
+    def versions(self):
+        return get_versions(f'employee:{self.employee.pk}', 'employees', 'employee_profiles')
+
+    def test_login_keeps_the_caches(self):
+        before = self.versions()
+        self.assertTrue(self.client.login(username='employee', password='password'))
+        self.client.get(reverse('matching_jobs'))
+        self.assertEqual(self.versions(), before)
+
+    def test_only_score_inputs_drop_the_match_cache(self):
+        profile_version, employees_version, profiles_version = self.versions()
+        self.employee.phone = '555-0100'
+        self.employee.save()
+        # Not a searched field: only the directory pages change.
+        self.assertEqual(self.versions()[:2], [profile_version, employees_version])
+        self.assertNotEqual(self.versions()[2], profiles_version)
+        self.employee.name = 'Asha'
+        self.employee.save()
+        self.assertEqual(self.versions()[0], profile_version)
+        self.assertNotEqual(self.versions()[1], employees_version)
+
+        for field, value in (('experience_years', 4), ('location', 'Mumbai')):
+            with self.subTest(field=field):
+                profile_version = self.versions()[0]
+                setattr(self.employee, field, value)
+                self.employee.save()
+                self.assertNotEqual(self.versions()[0], profile_version)
+
+        profile_version = self.versions()[0]
+        self.employee.skills.add(self.skill)
+        self.assertNotEqual(self.versions()[0], profile_version)
+
+    def test_cached_matches_follow_the_catalogue(self):
+        def scores():
+            return [job.match_score for job in cached_matches(self.employee)]
+        self.assertEqual(scores(), [30.0])
+        self.post_job()
+        self.assertEqual(scores(), [30.0, 30.0])
+        self.employee.skills.add(self.skill)
+        self.assertEqual(scores(), [100.0, 100.0])
+
+
+class RankCandidatesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.skills = [Skill.objects.create(name=f'Skill {i}') for i in range(4)]
+        cls.employer = create_employer()
+        rng = random.Random(1)
+        for i in range(25):
+            employee = create_employee(f'employee{i}')
+            # Few distinct profiles, so many scores tie.
+            employee.experience_years = rng.choice((0, 2, 5, 9))
+            employee.save()
+            employee.skills.set(rng.sample(cls.skills, rng.randint(0, 3)))
+
+    def expected(self, job, limit):
+        """Ids of the ``limit`` best employees by exact score, then id."""
+        required = set(job.required_skills.all())
+        ranked = []
+        for employee in EmployeeProfile.objects.prefetch_related('skills'):
+            matched = len(required & set(employee.skills.all()))
+            if required and not matched:
+                continue
+            skill_match = Fraction(100 * matched, len(required)) if required else 100
+            if employee.experience_years >= job.experience_required:
+                exp_match = 100
+            else:
+                exp_match = Fraction(100 * employee.experience_years, job.experience_required)
+            ranked.append((-(skill_match * Fraction(7, 10) + exp_match * Fraction(3, 10)), employee.pk))
+        return [pk for _, pk in sorted(ranked)[:limit]]
+
+    def test_ranks_by_score_then_id_with_and_without_skills(self):
+        for skills, experience_required in (([], 3), ([], 0), (self.skills[:1], 4), (self.skills[1:], 6)):
+            job = Job.objects.create(
+                employer=self.employer, title='Job', experience_required=experience_required,
+                salary='10000', location='Pune',
+            )
+            job.required_skills.set(skills)
+            with self.subTest(skills=len(skills), experience_required=experience_required):
+                candidates = rank_candidates(job, limit=8)
+                self.assertEqual([employee.pk for employee in candidates], self.expected(job, 8))
+                scores = [employee.match_score for employee in candidates]
+                self.assertEqual(scores, sorted(scores, reverse=True))
+
+
+class FillJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        employer = create_employer()
+        cls.job = Job.objects.create(employer=employer, title='Cook', salary='10000', location='Pune')
+        cls.employees = [create_employee(f'employee{i}') for i in range(2)]
+
+    def test_only_the_first_applicant_fills_the_job(self):
+        self.assertTrue(fill_job(self.job.pk, self.employees[0]))
+        self.assertFalse(fill_job(self.job.pk, self.employees[1]))
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.filled_by, self.employees[0])
+        self.assertEqual(stats.get_values(stats.JOBS_TAKEN), {stats.JOBS_TAKEN: 1})
+
+    def test_batch_fill_skips_jobs_filled_already(self):
+        other = Job.objects.create(employer=self.job.employer, title='Driver', salary='10000', location='Pune')
+        fill_job(other.pk, self.employees[0])
+        self.assertEqual(fill_jobs({self.job.pk: self.employees[1], other.pk: self.employees[1]}), {self.job.pk})
+        self.assertEqual(
+            dict(Job.objects.values_list('pk', 'filled_by')),
+            {self.job.pk: self.employees[1].pk, other.pk: self.employees[0].pk},
+        )
+        self.assertEqual(stats.get_values(stats.JOBS_TAKEN), {stats.JOBS_TAKEN: 2})
+
+    @override_settings(APPLICATION_QUEUE=False)
+    def test_apply_view_reports_a_lost_race(self):
+        fill_job(self.job.pk, self.employees[0])
+        self.client.login(username='employee1', password='password')
+        response = self.client.post(reverse('apply_job', args=[self.job.pk]), follow=True)
+        self.assertContains(response, 'already been filled')
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.filled_by, self.employees[0])
+
+
+class ApplicationQueueTests(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        employer = create_employer()
+        cls.jobs = [
+            Job.objects.create(employer=employer, title=f'Job {i}', salary='10000', location='Pune')
+            for i in range(2)
+        ]
+        cls.employees = [create_employee(f'employee{i}') for i in range(3)]
+
+    def apply(self, job, employee):
+        self.client.force_login(employee.user)
+        return self.client.post(reverse('apply_job', args=[job.pk]))
+
+    def test_applications_are_queued_then_decided_in_order(self):
+        for employee in self.employees:
+            response = self.apply(self.jobs[0], employee)
+        self.apply(self.jobs[1], self.employees[2])
+        # Applying twice does not queue a second application.
+        self.apply(self.jobs[1], self.employees[2])
+        self.assertEqual(Application.objects.filter(status=Application.PENDING).count(), 4)
+        self.assertIsNone(Job.objects.get(pk=self.jobs[0].pk).filled_by)
+
+        self.assertEqual(applications.drain(size=2), (2, 2))
+        statuses = dict(Application.objects.filter(job=self.jobs[0]).values_list('employee', 'status'))
+        self.assertEqual(statuses, {
+            self.employees[0].pk: Application.ACCEPTED,
+            self.employees[1].pk: Application.REJECTED,
+            self.employees[2].pk: Application.REJECTED,
+        })
+        self.assertEqual(Job.objects.get(pk=self.jobs[1].pk).filled_by, self.employees[2])
+        application = Application.objects.get(job=self.jobs[0], employee=self.employees[2])
+        self.assertRedirects(response, reverse('application_detail', args=[application.pk]))
+        status = self.client.get(reverse('application_status', args=[application.pk]))
+        self.assertEqual(status.json()['status'], Application.REJECTED)
+
+    def test_repeat_application_stays_within_budget(self):
+        self.apply(self.jobs[0], self.employees[0])
+        with self.assertQueryBudget('apply_job'):
+            self.client.post(reverse('apply_job', args=[self.jobs[0].pk]))
+        self.assertEqual(Application.objects.count(), 1)
+
+    def test_decide_costs_the_same_for_any_number_of_jobs(self):
+        employer = self.jobs[0].employer
+        skill = Skill.objects.create(name='Cooking')
+
+        def decide_queries(job_count):
+            jobs = []
+            for i in range(job_count):
+                job = Job.objects.create(employer=employer, title='Cook', salary='10000', location='Pune')
+                job.required_skills.add(skill)
+                jobs.append(job)
+            for job in jobs:
+                for employee in self.employees:
+                    applications.submit(job.pk, employee)
+            batch = applications.claim_batch(100)
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(applications.decide(batch), (job_count, job_count * 2))
+            return len(queries)
+
+        self.assertEqual(decide_queries(2), decide_queries(6))
+        self.assertEqual(stats.get_values(stats.JOBS_TAKEN), {stats.JOBS_TAKEN: 8})
+
+    def test_reclaimed_batch_keeps_a_fill_it_made(self):
+        application = applications.submit(self.jobs[0].pk, self.employees[0])
+        applications.claim_batch(10)
+        fill_job(self.jobs[0].pk, self.employees[0])
+        # The worker died before recording the outcome.
+        Application.objects.update(claimed_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(applications.drain(size=10), (1, 0))
+        application.refresh_from_db()
+        self.assertEqual(application.status, Application.ACCEPTED)
+
+    def test_status_is_private(self):
+        application = applications.submit(self.jobs[0].pk, self.employees[0])
+        self.client.force_login(self.employees[1].user)
+        self.assertEqual(self.client.get(reverse('application_status', args=[application.pk])).status_code, 404)
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import JobListView, JobCreateView, JobUpdateView, JobDeleteView, JobApplyView
+from .views import JobListView, JobCreateView, JobUpdateView, JobDeleteView, JobApplyView, JobCandidatesView, JobCandidatesAPIView, ApplicationDetailView, ApplicationStatusView
 
 urlpatterns = [
     path('list/', JobListView.as_view(), name='job_list'),
@@ -7,4 +7,8 @@ urlpatterns = [
     path('update/<int:pk>/', JobUpdateView.as_view(), name='update_job'),
     path('delete/<int:pk>/', JobDeleteView.as_view(), name='delete_job'),
     path('apply/<int:pk>/', JobApplyView.as_view(), name='apply_job'),
+    path('applications/<int:pk>/', ApplicationDetailView.as_view(), name='application_detail'),
+    path('applications/<int:pk>.json', ApplicationStatusView.as_view(), name='application_status'),
+    path('candidates/<int:pk>/', JobCandidatesView.as_view(), name='job_candidates'),
+    path('api/candidates/<int:pk>/', JobCandidatesAPIView.as_view(), name='job_candidates_api'),
 ]
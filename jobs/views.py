@@ -3,57 +3,204 @@ from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.urls import reverse_lazy
 from django.shortcuts import get_object_or_404, redirect
 from django.contrib import messages
-from django.utils import timezone
-from .models import Job
+from django.conf import settings
+from django.db import transaction
+from django.http import JsonResponse
+from django.utils.cache import patch_cache_control
+from .models import Application, Job, fill_job
+from core.applications import submit as submit_application
+from core.matching import rank_candidates
+from core.facets import EXPERIENCE_BANDS, FACET_LABELS, FACET_PARAMS, SALARY_BANDS, band_range, facet_counts
+from core.pagination import KeysetPaginationMixin
+from core.resultcache import result_ids
+from core.search import search, search_filter
 
-class JobListView(LoginRequiredMixin, ListView):
+class JobListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = Job
     template_name = 'jobs/job_list.html'
     context_object_name = 'jobs'
-    
+    keyset = ('-created_at', '-pk')
+
+    filters = ('skill', 'title', 'location', *FACET_PARAMS.values())
+
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().select_related('employer').prefetch_related('required_skills')
         # Filter out filled jobs
         queryset = queryset.filter(filled_by__isnull=True)
-        
-        skill_query = self.request.GET.get('skill')
-        location_query = self.request.GET.get('location')
-        
+        # Matching ids are cached per normalized filter set (see core.resultcache).
+        ids = result_ids('jobs', self.request.GET, self.filters, self.filter_jobs)
+        if ids is not None:
+            queryset = queryset.filter(pk__in=ids)
+        return queryset
+
+    def filter_jobs(self, params):
+        queryset = Job.objects.filter(filled_by__isnull=True)
+        skill_query = params.get('skill')
+        title_query = params.get('title')
+        location_query = params.get('location')
+
+        # Substring queries are resolved through the trigram index (see
+        # core.search), to exact values or straight to job ids, then matched
+        # with indexed lookups.
         if skill_query:
-            queryset = queryset.filter(required_skills__name__icontains=skill_query)
+            links = Job.required_skills.through.objects.filter(skill__name__in=search('skill', skill_query))
+            queryset = queryset.filter(pk__in=links.values('job_id'))
+        if title_query:
+            queryset = queryset.filter(search_filter('title', title_query))
         if location_query:
-            queryset = queryset.filter(location__icontains=location_query)
-            
-        return queryset.distinct()
+            queryset = queryset.filter(location__in=search('location', location_query))
+
+        # Facet selections (see core.facets).
+        skill_id = params.get('skill_id', '')
+        if skill_id.isdigit():
+            links = Job.required_skills.through.objects.filter(skill_id=int(skill_id))
+            queryset = queryset.filter(pk__in=links.values('job_id'))
+        place = params.get('place', '')
+        if place.isdigit():
+            queryset = queryset.filter(place_id=int(place))
+        for field, bands, param in (
+            ('experience_required', EXPERIENCE_BANDS, 'experience'),
+            ('salary_amount', SALARY_BANDS, 'salary'),
+        ):
+            bounds = band_range(bands, params.get(param))
+            if bounds is not None:
+                lowest, highest = bounds
+                queryset = queryset.filter(**{f'{field}__gte': lowest})
+                if highest is not None:
+                    queryset = queryset.filter(**{f'{field}__lte': highest})
+
+        return queryset
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        facets = []
+        for facet, values in facet_counts(self.request.GET).items():
+            param = FACET_PARAMS[facet]
+            selected = self.request.GET.get(param, '')
+            links = []
+            for value, label, count in values:
+                query = self.request.GET.copy()
+                query.pop('after', None)
+                query.pop('before', None)
+                active = str(value) == selected
+                if active:
+                    query.pop(param, None)
+                else:
+                    query[param] = value
+                links.append({'label': label, 'count': count, 'query': query.urlencode(), 'active': active})
+            facets.append((FACET_LABELS[facet], links))
+        context['facets'] = facets
+        return context
+
+class JobCandidatesMixin(LoginRequiredMixin, UserPassesTestMixin):
+    max_limit = 100
+
+    def get_job(self):
+        if not hasattr(self, 'job'):
+            self.job = get_object_or_404(Job, pk=self.kwargs['pk'])
+        return self.job
+
+    def test_func(self):
+        user = self.request.user
+        job = self.get_job()
+        return user.is_admin_role() or getattr(user, 'employer_profile', None) == job.employer
+
+    def get_candidates(self):
+        try:
+            limit = int(self.request.GET.get('limit', 10))
+        except ValueError:
+            limit = 10
+        limit = max(1, min(limit, self.max_limit))
+        return rank_candidates(self.get_job(), limit=limit)
+
+class JobCandidatesView(JobCandidatesMixin, ListView):
+    template_name = 'jobs/job_candidates.html'
+    context_object_name = 'candidates'
+
+    def get_queryset(self):
+        return self.get_candidates()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['job'] = self.get_job()
+        return context
+
+class JobCandidatesAPIView(JobCandidatesMixin, View):
+    def get(self, request, pk):
+        candidates = [
+            {
+                'id': employee.pk,
+                'name': employee.name,
+                'location': employee.location,
+                'experience_years': employee.experience_years,
+                'skills': [skill.name for skill in employee.skills.all()],
+                'match_score': employee.match_score,
+                'skill_match_percent': employee.skill_match_percent,
+                'exp_match_percent': employee.exp_match_percent,
+            }
+            for employee in self.get_candidates()
+        ]
+        return JsonResponse({'job': self.get_job().pk, 'candidates': candidates})
 
 class JobApplyView(LoginRequiredMixin, View):
     def post(self, request, pk):
-        job = get_object_or_404(Job, pk=pk)
-        
         # Check if user is an employee
         if not hasattr(request.user, 'employee_profile'):
+            get_object_or_404(Job.objects.only('pk'), pk=pk)
             messages.error(request, "Only employees can apply for jobs.")
             return redirect('dashboard')
-            
-        # Check if job is already filled
-        if job.filled_by:
+
+        if settings.APPLICATION_QUEUE:
+            # Queue the application; the process_applications worker decides it.
+            if get_object_or_404(Job.objects.values_list('filled_by_id', flat=True), pk=pk) is not None:
+                messages.error(request, "This job has already been filled.")
+                return redirect('job_list')
+            application = submit_application(pk, request.user.employee_profile)
+            return redirect('application_detail', pk=application.pk)
+
+        # Fill the job if it is still open; of concurrent applicants, only one wins.
+        if not fill_job(pk, request.user.employee_profile):
+            get_object_or_404(Job.objects.only('pk'), pk=pk)
             messages.error(request, "This job has already been filled.")
             return redirect('dashboard')
-            
-        # Fill the job
-        job.filled_by = request.user.employee_profile
-        job.filled_at = timezone.now()
-        job.save()
-        
-        messages.success(request, f"You have successfully applied for {job.title}!")
+
+        title = Job.objects.values_list('title', flat=True).get(pk=pk)
+        messages.success(request, f"You have successfully applied for {title}!")
         return redirect('dashboard')
 
+class ApplicationMixin(LoginRequiredMixin):
+    def get_queryset(self):
+        # Employees only see their own applications.
+        return Application.objects.filter(employee__user=self.request.user)
+
+class ApplicationDetailView(ApplicationMixin, DetailView):
+    template_name = 'jobs/application_detail.html'
+    context_object_name = 'application'
+
+    def get_queryset(self):
+        return super().get_queryset().select_related('job')
+
+class ApplicationStatusView(ApplicationMixin, View):
+    """The status of one application, polled until it is decided."""
+
+    def get(self, request, pk):
+        application = get_object_or_404(self.get_queryset(), pk=pk)
+        response = JsonResponse({
+            'status': application.status,
+            'decided': application.status in (Application.ACCEPTED, Application.REJECTED),
+            'decided_at': application.decided_at,
+        })
+        patch_cache_control(response, no_cache=True)
+        return response
+
 class JobCreateView(LoginRequiredMixin, CreateView):
     model = Job
     fields = ['title', 'required_skills', 'experience_required', 'salary', 'location']
     template_name = 'jobs/job_form.html'
     success_url = reverse_lazy('dashboard')
 
+    # The job and its skills commit together, so their score refreshes run as one.
+    @transaction.atomic
     def form_valid(self, form):
         form.instance.employer = self.request.user.employer_profile
         return super().form_valid(form)
@@ -68,6 +215,11 @@ class JobUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
         job = self.get_object()
         return self.request.user.employer_profile == job.employer
 
+    @transaction.atomic
+    def form_valid(self, form):
+        # See JobCreateView.
+        return super().form_valid(form)
+
 class JobDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
     model = Job
     template_name = 'jobs/job_confirm_delete.html'
@@ -45,6 +45,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.querybudget.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -86,6 +87,108 @@ DATABASES = {
 }
 
 
+# Caches
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+# Local memory is fine for development and tests; point both aliases at a
+# shared backend (Redis/Memcached) when running several workers.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'default',
+    },
+    'matches': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'matches',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+# Rendered dashboard charts, keyed by a fingerprint of the data behind them.
+CHART_CACHE_ALIAS = 'default'
+CHART_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Charts are drawn in this many worker processes, started with the web worker
+# (0 draws them in the request thread). A page waits at most
+# CHART_RENDER_TIMEOUT seconds for them and shows a placeholder for the rest.
+CHART_RENDER_WORKERS = 4
+CHART_RENDER_TIMEOUT = 30
+
+# 'server' serves the dashboard charts as cached PNGs; 'client' has the
+# browser draw them from the JSON chart data, refetched every
+# CHART_DATA_MAX_AGE seconds.
+DASHBOARD_CHART_MODE = 'server'
+CHART_DATA_MAX_AGE = 60
+
+# Per-employee match cache: how long entries live, and how many of the best
+# matches are kept per employee (later pages are read from the database).
+MATCH_CACHE_ALIAS = 'matches'
+MATCH_CACHE_TIMEOUT = 300
+MATCH_CACHE_RESULTS = 200
+
+# Ids matching job and employee list searches, per normalized filter set;
+# larger results are run as a subquery instead. Lookup counts are served at
+# /metrics.
+RESULT_CACHE_ALIAS = 'default'
+RESULT_CACHE_TIMEOUT = 300
+RESULT_CACHE_MAX_IDS = 5000
+
+# Title and name searches matching more rows than this filter with icontains
+# (dense matches fill a page early) instead of a list of ids.
+SEARCH_MAX_IDS = 1000
+
+# How long browsers may reuse an employee directory page before revalidating
+# it with its ETag.
+EMPLOYEE_DIRECTORY_MAX_AGE = 30
+
+# Queue job applications for the process_applications worker instead of
+# filling the job during the request.
+APPLICATION_QUEUE = True
+
+# Rows read, and skills fetched, per chunk of a streaming export.
+EXPORT_CHUNK_SIZE = 2000
+
+# Per-view query budgets, by URL name, checked by QueryBudgetMiddleware.
+# Requests over budget are logged with their most repeated queries; with
+# QUERY_BUDGET_STRICT (enabled for the tests by TEST_RUNNER) they raise instead.
+QUERY_BUDGETS = {
+    'dashboard': {'queries': 15},
+    'dashboard_chart': {'queries': 12},
+    'dashboard_chart_data': {'queries': 12},
+    'dashboard_trends': {'queries': 12},
+    'matching_jobs': {'queries': 12},
+    # Includes bringing the facet and skill search indexes up to date after a job change.
+    'job_list': {'queries': 10},
+    'job_candidates': {'queries': 12},
+    'job_candidates_api': {'queries': 12},
+    'employee_list': {'queries': 8},
+    'employee_directory': {'queries': 8},
+    'employer_list': {'queries': 8},
+    'apply_job': {'queries': 8},
+    'application_status': {'queries': 4},
+}
+QUERY_BUDGET_STRICT = False
+TEST_RUNNER = 'core.testing.StrictQueryBudgetRunner'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.queries': {'handlers': ['console'], 'level': 'WARNING'},
+        'accounts.identifiers': {'handlers': ['console'], 'level': 'WARNING'},
+    },
+}
+
+# Matching jobs are limited to this distance from the employee's location
+# by default (?radius=any lifts the limit).
+MATCH_DEFAULT_RADIUS_KM = 50
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -130,6 +233,10 @@ AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
 ]
 
+# Login identifier -> user id lookups (see accounts.identifiers).
+LOGIN_CACHE_ALIAS = 'default'
+LOGIN_CACHE_TIMEOUT = 60
+
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'login'
 
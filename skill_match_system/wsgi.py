@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'skill_match_system.settings')
 
 application = get_wsgi_application()
+
+# Spawn the chart renderers with the worker rather than on its first dashboard request.
+from core.charts import start_render_pool  # noqa: E402
+
+start_render_pool()
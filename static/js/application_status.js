@@ -0,0 +1,34 @@
+// Application page: polls the application's status until the worker has
+// decided it, then shows the outcome.
+
+(function() {
+    const POLL_SECONDS = 2;
+
+    function show(status) {
+        const outcome = status === 'processing' ? 'pending' : status;
+        document.querySelectorAll('[data-application-outcome]').forEach(element => {
+            element.classList.toggle('d-none', element.dataset.applicationOutcome !== outcome);
+        });
+    }
+
+    document.addEventListener('DOMContentLoaded', function() {
+        const root = document.querySelector('[data-application-status-url]');
+        if (!root) {
+            return;
+        }
+        const url = root.dataset.applicationStatusUrl;
+
+        function poll() {
+            fetch(url, {credentials: 'same-origin'})
+                .then(response => response.ok ? response.json() : Promise.reject(response.status))
+                .then(application => {
+                    show(application.status);
+                    if (!application.decided) {
+                        setTimeout(poll, POLL_SECONDS * 1000);
+                    }
+                })
+                .catch(error => console.error('Application status failed to load:', error));
+        }
+        setTimeout(poll, POLL_SECONDS * 1000);
+    });
+})();
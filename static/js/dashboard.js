@@ -0,0 +1,93 @@
+// Client-side dashboard charts (DASHBOARD_CHART_MODE = 'client').
+// Draws the series from the chart-data endpoint with Chart.js and refetches
+// them periodically; the browser revalidates with the ETag, so unchanged
+// data costs a 304.
+
+(function() {
+    const MATCH_COLORS = {
+        'High Match (70-100%)': '#27ae60',
+        'Medium Match (40-69%)': '#f39c12',
+        'Low Match (<40%)': '#c0392b'
+    };
+
+    const CONFIGS = {
+        overview: data => ({
+            type: 'bar',
+            data: {
+                labels: data.categories,
+                datasets: [{data: data.counts, backgroundColor: ['#3498db', '#2ecc71', '#f1c40f', '#e74c3c']}]
+            },
+            options: {plugins: {legend: {display: false}, title: {display: true, text: 'System Overview'}}}
+        }),
+        skills: data => ({
+            type: 'bar',
+            // Series arrive in ascending order for the PNG's bottom-up bars.
+            data: {
+                labels: data.skills.slice().reverse(),
+                datasets: [{label: 'Number of Jobs', data: data.counts.slice().reverse(), backgroundColor: '#9b59b6'}]
+            },
+            options: {indexAxis: 'y', plugins: {legend: {display: false}, title: {display: true, text: 'Top Skills in Demand'}}}
+        }),
+        match_quality: data => ({
+            type: 'doughnut',
+            data: {
+                labels: data.labels,
+                datasets: [{data: data.sizes, backgroundColor: data.labels.map(label => MATCH_COLORS[label])}]
+            },
+            options: {plugins: {title: {display: true, text: 'Match Quality Distribution (Taken Jobs)'}}}
+        }),
+        jobs_taken: data => ({
+            type: 'line',
+            data: {
+                labels: data.periods,
+                datasets: [{label: 'Cumulative Jobs', data: data.cumulative, borderColor: '#2980b9', tension: 0}]
+            },
+            options: {
+                plugins: {legend: {display: false}, title: {display: true, text: 'Jobs Taken Trend (Cumulative)'}},
+                scales: {y: {beginAtZero: true, ticks: {precision: 0}}}
+            }
+        })
+    };
+
+    const charts = {};
+
+    function draw(name, data) {
+        const canvas = document.querySelector(`[data-chart="${name}"]`);
+        const empty = document.querySelector(`[data-chart-empty="${name}"]`);
+        if (!canvas) {
+            return;
+        }
+        canvas.classList.toggle('d-none', data === null);
+        empty.classList.toggle('d-none', data !== null);
+        if (data === null) {
+            return;
+        }
+        const config = CONFIGS[name](data);
+        if (charts[name]) {
+            charts[name].data = config.data;
+            charts[name].update();
+        } else {
+            charts[name] = new Chart(canvas, config);
+        }
+    }
+
+    function refresh(url) {
+        return fetch(url, {credentials: 'same-origin'})
+            .then(response => response.ok ? response.json() : Promise.reject(response.status))
+            .then(series => Object.keys(CONFIGS).forEach(name => draw(name, series[name] ?? null)))
+            .catch(error => console.error('Dashboard chart data failed to load:', error));
+    }
+
+    document.addEventListener('DOMContentLoaded', function() {
+        const root = document.querySelector('[data-chart-url]');
+        if (!root) {
+            return;
+        }
+        const url = root.dataset.chartUrl;
+        const seconds = parseInt(root.dataset.chartPoll, 10);
+        refresh(url);
+        if (seconds > 0) {
+            setInterval(() => refresh(url), seconds * 1000);
+        }
+    });
+})();
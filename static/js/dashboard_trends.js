@@ -0,0 +1,33 @@
+// Dashboard hiring trends: totals and the top skills and places for jobs
+// posted and filled over the range picked for the Jobs Taken chart, from the
+// trends endpoint.
+
+(function() {
+    const SHOWN = 3;
+
+    function names(items) {
+        return items.slice(0, SHOWN).map(item => `${item.name} (${item.count})`).join(', ') || '-';
+    }
+
+    function show(root, trends) {
+        ['posted', 'filled'].forEach(metric => {
+            const series = trends[metric];
+            const element = root.querySelector(`[data-trend="${metric}"]`);
+            element.querySelector('[data-trend-total]').textContent = series.counts.reduce((a, b) => a + b, 0);
+            element.querySelector('[data-trend-skills]').textContent = names(series.skills);
+            element.querySelector('[data-trend-places]').textContent = names(series.places);
+        });
+        root.classList.remove('d-none');
+    }
+
+    document.addEventListener('DOMContentLoaded', function() {
+        const root = document.querySelector('[data-trends-url]');
+        if (!root) {
+            return;
+        }
+        fetch(root.dataset.trendsUrl, {credentials: 'same-origin'})
+            .then(response => response.ok ? response.json() : Promise.reject(response.status))
+            .then(trends => show(root, trends))
+            .catch(error => console.error('Dashboard trends failed to load:', error));
+    });
+})();
@@ -0,0 +1,119 @@
+// Employee list: fetches results from the directory endpoint as the user
+// types, and the next page as the end of the list scrolls into view. The
+// server-rendered first page and pagination links remain for browsers
+// without JavaScript.
+
+(function() {
+    const TYPING_DELAY = 250;
+
+    function element(tag, className, text) {
+        const node = document.createElement(tag);
+        if (className) {
+            node.className = className;
+        }
+        if (text !== undefined) {
+            node.textContent = text;
+        }
+        return node;
+    }
+
+    function card(employee) {
+        const column = element('div', 'col-md-6 mb-4 employee-card');
+        const body = element('div', 'card-body');
+        column.appendChild(element('div', 'card h-100 shadow-sm')).appendChild(body);
+
+        const header = body.appendChild(element('div', 'd-flex justify-content-between align-items-start'));
+        const heading = header.appendChild(element('div'));
+        heading.appendChild(element('h5', 'card-title', employee.name));
+        heading.appendChild(element('h6', 'card-subtitle mb-2 text-muted',
+            `${employee.age} years old • ${employee.experience_years} years exp`));
+        header.appendChild(element('span', 'badge bg-secondary', employee.location));
+
+        const skills = body.appendChild(element('p', 'card-text mt-2'));
+        skills.appendChild(element('strong', null, 'Skills:'));
+        skills.appendChild(element('br'));
+        if (employee.skills.length) {
+            employee.skills.forEach(name => {
+                skills.appendChild(element('span', 'badge bg-info text-dark', name));
+                skills.appendChild(document.createTextNode(' '));
+            });
+        } else {
+            skills.appendChild(element('span', 'text-muted', 'No skills listed'));
+        }
+
+        const contact = body.appendChild(element('div', 'mt-3'))
+            .appendChild(element('a', 'btn btn-outline-primary btn-sm', ' Contact'));
+        contact.href = `tel:${employee.phone}`;
+        contact.prepend(element('i', 'fas fa-phone'));
+        return column;
+    }
+
+    document.addEventListener('DOMContentLoaded', function() {
+        const list = document.getElementById('employeeList');
+        const more = document.getElementById('employeeListMore');
+        const input = document.getElementById('searchInput');
+        if (!list || !('IntersectionObserver' in window)) {
+            return;
+        }
+        document.getElementById('employeeListPages').classList.add('d-none');
+
+        let query = input.value.trim();
+        let next = more.dataset.nextCursor || null;
+        let pending = null;
+
+        function load(replace) {
+            if (pending) {
+                pending.abort();
+            }
+            pending = new AbortController();
+            // Keep every filter on the page (skill, location, ...), not just the search box.
+            const params = new URLSearchParams(window.location.search);
+            ['page', 'after', 'before'].forEach(name => params.delete(name));
+            params.set('sort', list.dataset.directorySort);
+            if (query) {
+                params.set('q', query);
+            } else {
+                params.delete('q');
+            }
+            if (!replace) {
+                params.set('after', next);
+            }
+            return fetch(`${list.dataset.directoryUrl}?${params}`, {credentials: 'same-origin', signal: pending.signal})
+                .then(response => response.ok ? response.json() : Promise.reject(response.status))
+                .then(page => {
+                    pending = null;
+                    if (replace) {
+                        list.replaceChildren();
+                    }
+                    page.results.forEach(employee => list.appendChild(card(employee)));
+                    if (!list.children.length) {
+                        list.appendChild(element('div', 'col-12'))
+                            .appendChild(element('div', 'alert alert-info', 'No employees found.'));
+                    }
+                    next = page.next;
+                })
+                .catch(error => {
+                    if (error.name !== 'AbortError') {
+                        console.error('Employee directory failed to load:', error);
+                    }
+                });
+        }
+
+        let timer = null;
+        input.addEventListener('input', function() {
+            clearTimeout(timer);
+            timer = setTimeout(() => {
+                if (this.value.trim() !== query) {
+                    query = this.value.trim();
+                    load(true);
+                }
+            }, TYPING_DELAY);
+        });
+
+        new IntersectionObserver(entries => {
+            if (entries[0].isIntersecting && next && !pending) {
+                load(false);
+            }
+        }, {rootMargin: '400px'}).observe(more);
+    });
+})();